@@ -0,0 +1,333 @@
+import os
+import io
+import sys
+import json
+import random
+import sqlite3
+import tarfile
+import zipfile
+import argparse
+import importlib.util
+from email.message import EmailMessage
+from xml.sax.saxutils import escape
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from email_filter import EmailFilter, UrlFilter, VALID
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FIRST_NAMES = ['alice', 'bruno', 'chen', 'dana', 'emeka', 'farah', 'goran', 'hana', 'ivan', 'jonas', 'kiri', 'lena']
+LAST_NAMES = ['okafor', 'lindqvist', 'moreau', 'tanaka', 'haddad', 'kowalski', 'rossi', 'nguyen', 'silva', 'berg']
+COMPANIES = ['northwind', 'bluepeak', 'ironbridge', 'quillfield', 'harbourline', 'redmaple', 'stonegate', 'coralbay']
+TLDS = ['com', 'net', 'org', 'io', 'co.uk', 'de']
+FILLER = (
+    'quarterly report meeting notes invoice shipment contract review budget forecast '
+    'customer support escalation warehouse inventory schedule agenda minutes summary'
+).split()
+
+FORMATS = ['txt', 'csv', 'xlsx', 'docx', 'pdf_text', 'pdf_scan', 'image', 'sqlite', 'eml', 'msg', 'zip_nested', 'tar_nested']
+
+
+def load_domain_list(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.strip().lower() for line in f if line.strip() and not line.startswith('#')}
+
+
+class Planter:
+    def __init__(self, seed):
+        self.rng = random.Random(seed)
+        self.email_filter = EmailFilter(load_domain_list(os.path.join(REPO_ROOT, 'disposable_domains.txt')))
+        self.url_filter = UrlFilter(load_domain_list(os.path.join(REPO_ROOT, 'blocked_domains.txt')))
+        self.counter = 0
+
+    def host(self):
+        while True:
+            self.counter += 1
+            host = f"{self.rng.choice(COMPANIES)}{self.counter}.{self.rng.choice(TLDS)}"
+            if self.url_filter.classify_one(f"https://{host}/") == VALID:
+                return host
+
+    def email(self):
+        while True:
+            self.counter += 1
+            email = f"{self.rng.choice(FIRST_NAMES)}.{self.rng.choice(LAST_NAMES)}{self.counter}@{self.host()}"
+            if self.email_filter.classify_one(email) == VALID:
+                return email
+
+    def url(self):
+        return f"https://www.{self.host()}/{self.rng.choice(FILLER)}/{self.counter}"
+
+    def sentence(self, words=12):
+        return ' '.join(self.rng.choice(FILLER) for _ in range(words)).capitalize() + '.'
+
+    def paragraphs(self, emails, urls, filler_lines):
+        lines = [self.sentence() for _ in range(filler_lines)]
+        for entity in emails + urls:
+            lines.insert(self.rng.randint(0, len(lines)), f"{self.sentence(6)} Contact: {entity} for details.")
+        return lines
+
+
+def write_txt(path, lines):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('\n'.join(lines) + '\n')
+
+
+def write_csv(path, planter, emails, urls):
+    import csv
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['name', 'email', 'website', 'notes'])
+        for i in range(max(len(emails), len(urls))):
+            writer.writerow([
+                planter.rng.choice(FIRST_NAMES).title(),
+                emails[i] if i < len(emails) else '',
+                urls[i] if i < len(urls) else '',
+                planter.sentence(5),
+            ])
+
+
+def write_xlsx(path, planter, emails, urls):
+    strings = ['name', 'email', 'website'] + emails + urls
+    rows = []
+    for i in range(max(len(emails), len(urls))):
+        cells = [f'<c r="A{i + 2}"><v>{planter.rng.randint(1, 10 ** 6)}</v></c>']
+        if i < len(emails):
+            cells.append(f'<c r="B{i + 2}" t="s"><v>{3 + i}</v></c>')
+        if i < len(urls):
+            cells.append(f'<c r="C{i + 2}" t="inlineStr"><is><t>{escape(urls[i])}</t></is></c>')
+        rows.append(f'<row r="{i + 2}">' + ''.join(cells) + '</row>')
+    header = '<row r="1"><c r="A1" t="s"><v>0</v></c><c r="B1" t="s"><v>1</v></c><c r="C1" t="s"><v>2</v></c></row>'
+    sheet = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+        + header + ''.join(rows) + '</sheetData></worksheet>'
+    )
+    shared = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        f'<sst xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" count="{len(strings)}" uniqueCount="{len(strings)}">'
+        + ''.join(f'<si><t>{escape(s)}</t></si>' for s in strings) + '</sst>'
+    )
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+            '<Override PartName="/xl/sharedStrings.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sharedStrings+xml"/>'
+            '</Types>'
+        ))
+        z.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'
+        ))
+        z.writestr('xl/workbook.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            '<sheets><sheet name="Sheet1" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ))
+        z.writestr('xl/_rels/workbook.xml.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+            '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/sharedStrings" Target="sharedStrings.xml"/>'
+            '</Relationships>'
+        ))
+        z.writestr('xl/worksheets/sheet1.xml', sheet)
+        z.writestr('xl/sharedStrings.xml', shared)
+
+
+def write_docx(path, lines):
+    body = ''.join(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>' for line in lines)
+    with zipfile.ZipFile(path, 'w', zipfile.ZIP_DEFLATED) as z:
+        z.writestr('[Content_Types].xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+            '</Types>'
+        ))
+        z.writestr('_rels/.rels', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+            '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>'
+            '</Relationships>'
+        ))
+        z.writestr('word/document.xml', (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+            f'<w:body>{body}</w:body></w:document>'
+        ))
+
+
+def write_pdf_text(path, lines):
+    def pdf_string(s):
+        return s.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+    pages = [lines[i:i + 45] for i in range(0, len(lines), 45)] or [[]]
+    objects = [None, None, '<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>']
+    page_ids = []
+    for page_lines in pages:
+        ops = ['BT', '/F1 9 Tf', '11 TL', '36 800 Td']
+        for line in page_lines:
+            ops.append(f'({pdf_string(line)}) Tj T*')
+        ops.append('ET')
+        stream = '\n'.join(ops).encode('latin-1', errors='replace')
+        objects.append(b'<< /Length %d >>\nstream\n' % len(stream) + stream + b'\nendstream')
+        content_id = len(objects)
+        objects.append(f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 842] /Contents {content_id} 0 R '
+                       '/Resources << /Font << /F1 3 0 R >> >> >>')
+        page_ids.append(len(objects))
+    objects[0] = '<< /Type /Catalog /Pages 2 0 R >>'
+    objects[1] = f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in page_ids)}] /Count {len(page_ids)} >>"
+
+    out = io.BytesIO()
+    out.write(b'%PDF-1.4\n')
+    offsets = []
+    for num, obj in enumerate(objects, 1):
+        offsets.append(out.tell())
+        data = obj if isinstance(obj, bytes) else obj.encode('latin-1')
+        out.write(b'%d 0 obj\n' % num + data + b'\nendobj\n')
+    xref = out.tell()
+    out.write(b'xref\n0 %d\n0000000000 65535 f \n' % (len(objects) + 1))
+    for offset in offsets:
+        out.write(b'%010d 00000 n \n' % offset)
+    out.write(b'trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n' % (len(objects) + 1, xref))
+    with open(path, 'wb') as f:
+        f.write(out.getvalue())
+
+
+def render_image(lines):
+    from PIL import Image, ImageDraw, ImageFont
+    try:
+        font = ImageFont.load_default(size=28)
+    except TypeError:
+        font = ImageFont.load_default()
+    img = Image.new('L', (1700, 60 + 44 * len(lines)), 255)
+    draw = ImageDraw.Draw(img)
+    for i, line in enumerate(lines):
+        draw.text((40, 30 + 44 * i), line, fill=0, font=font)
+    return img
+
+
+def write_sqlite(path, planter, emails, urls):
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE contacts (id INTEGER PRIMARY KEY, name TEXT, email TEXT, score REAL)")
+    conn.execute("CREATE TABLE links (id INTEGER PRIMARY KEY, url TEXT, note TEXT)")
+    conn.executemany("INSERT INTO contacts (name, email, score) VALUES (?, ?, ?)",
+                     [(planter.rng.choice(FIRST_NAMES), e, planter.rng.random()) for e in emails])
+    conn.executemany("INSERT INTO links (url, note) VALUES (?, ?)", [(u, planter.sentence(4)) for u in urls])
+    conn.commit()
+    conn.close()
+
+
+def write_eml(path, planter, emails, urls, lines):
+    msg = EmailMessage()
+    msg['From'] = f"{planter.rng.choice(FIRST_NAMES).title()} <{emails[0]}>"
+    msg['To'] = ', '.join(emails[1:2]) or emails[0]
+    msg['Subject'] = planter.sentence(5)
+    msg.set_content('\n'.join(lines + emails[2:] + urls))
+    with open(path, 'wb') as f:
+        f.write(bytes(msg))
+
+
+def generate(out_dir, seed=1, scale=20, filler_lines=40):
+    planter = Planter(seed)
+    # Files live under files/ so the scanners never see manifest.json and its planted answers
+    data_dir = os.path.join(out_dir, 'files')
+    os.makedirs(data_dir, exist_ok=True)
+    manifest = {'seed': seed, 'scale': scale, 'files': [], 'skipped_formats': {}}
+
+    def record(rel_path, fmt, emails, urls):
+        manifest['files'].append({'path': rel_path, 'format': fmt, 'emails': sorted(emails), 'urls': sorted(urls)})
+
+    # Only probed here; the image writers import Pillow themselves
+    if importlib.util.find_spec('PIL') is None:
+        manifest['skipped_formats']['image'] = manifest['skipped_formats']['pdf_scan'] = 'Pillow not installed'
+    # Outlook .msg is an OLE compound file and nothing in the dependency set can write one
+    manifest['skipped_formats']['msg'] = 'no .msg writer available'
+
+    for fmt in FORMATS:
+        if fmt in manifest['skipped_formats']:
+            continue
+        fmt_dir = os.path.join(data_dir, fmt)
+        os.makedirs(fmt_dir, exist_ok=True)
+        for i in range(scale):
+            emails = [planter.email() for _ in range(planter.rng.randint(2, 6))]
+            urls = [planter.url() for _ in range(planter.rng.randint(1, 4))]
+            lines = planter.paragraphs(emails, urls, filler_lines)
+            name = f"{fmt}_{i:04d}"
+            if fmt == 'txt':
+                rel = f"{fmt}/{name}.txt"
+                write_txt(os.path.join(data_dir, rel), lines)
+            elif fmt == 'csv':
+                rel = f"{fmt}/{name}.csv"
+                write_csv(os.path.join(data_dir, rel), planter, emails, urls)
+            elif fmt == 'xlsx':
+                rel = f"{fmt}/{name}.xlsx"
+                write_xlsx(os.path.join(data_dir, rel), planter, emails, urls)
+            elif fmt == 'docx':
+                rel = f"{fmt}/{name}.docx"
+                write_docx(os.path.join(data_dir, rel), lines)
+            elif fmt == 'pdf_text':
+                rel = f"{fmt}/{name}.pdf"
+                write_pdf_text(os.path.join(data_dir, rel), lines)
+            elif fmt == 'pdf_scan':
+                rel = f"{fmt}/{name}.pdf"
+                lines = [f"Contact: {e}" for e in emails] + [f"Web: {u}" for u in urls]
+                render_image(lines).save(os.path.join(data_dir, rel), 'PDF', resolution=150)
+            elif fmt == 'image':
+                rel = f"{fmt}/{name}.png"
+                lines = [f"Contact: {e}" for e in emails] + [f"Web: {u}" for u in urls]
+                render_image(lines).save(os.path.join(data_dir, rel))
+            elif fmt == 'sqlite':
+                rel = f"{fmt}/{name}.sqlite"
+                write_sqlite(os.path.join(data_dir, rel), planter, emails, urls)
+            elif fmt == 'eml':
+                rel = f"{fmt}/{name}.eml"
+                write_eml(os.path.join(data_dir, rel), planter, emails, urls, lines)
+            elif fmt == 'zip_nested':
+                rel = f"{fmt}/{name}.zip"
+                inner = io.BytesIO()
+                with tarfile.open(fileobj=inner, mode='w:gz') as tar:
+                    data = '\n'.join(lines[len(lines) // 2:]).encode('utf-8')
+                    info = tarfile.TarInfo(f"{name}_inner.txt")
+                    info.size = len(data)
+                    tar.addfile(info, io.BytesIO(data))
+                with zipfile.ZipFile(os.path.join(data_dir, rel), 'w', zipfile.ZIP_DEFLATED) as z:
+                    z.writestr(f"{name}_outer.txt", '\n'.join(lines[:len(lines) // 2]))
+                    z.writestr(f"{name}_inner.tar.gz", inner.getvalue())
+            elif fmt == 'tar_nested':
+                rel = f"{fmt}/{name}.tar"
+                inner = io.BytesIO()
+                with zipfile.ZipFile(inner, 'w', zipfile.ZIP_DEFLATED) as z:
+                    z.writestr(f"{name}_inner.txt", '\n'.join(lines[len(lines) // 2:]))
+                with tarfile.open(os.path.join(data_dir, rel), 'w') as tar:
+                    for member, data in ((f"{name}_outer.txt", '\n'.join(lines[:len(lines) // 2]).encode('utf-8')),
+                                         (f"{name}_inner.zip", inner.getvalue())):
+                        info = tarfile.TarInfo(member)
+                        info.size = len(data)
+                        tar.addfile(info, io.BytesIO(data))
+            record(rel, fmt, emails, urls)
+
+    manifest['total_files'] = len(manifest['files'])
+    manifest['total_bytes'] = sum(os.path.getsize(os.path.join(data_dir, f['path'])) for f in manifest['files'])
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Generate a deterministic synthetic corpus with planted emails/URLs")
+    parser.add_argument('output', help='Corpus directory to create')
+    parser.add_argument('-s', '--seed', type=int, default=1, help='Random seed')
+    parser.add_argument('-n', '--scale', type=int, default=20, help='Files per format')
+    parser.add_argument('--filler', type=int, default=40, help='Filler lines per document')
+    args = parser.parse_args()
+    m = generate(args.output, args.seed, args.scale, args.filler)
+    print(f"Wrote {m['total_files']} files ({m['total_bytes'] / 1e6:.1f} MB) to {args.output}")
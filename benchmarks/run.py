@@ -0,0 +1,187 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import subprocess
+import tempfile
+from urllib.parse import urlparse
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from corpus import generate, REPO_ROOT
+
+ENTRY_POINTS = ['extractor', 'multi-thread', 'backend']
+
+DISPOSABLE_FILE = os.path.join(REPO_ROOT, 'disposable_domains.txt')
+BLOCKED_FILE = os.path.join(REPO_ROOT, 'blocked_domains.txt')
+
+BACKEND_SNIPPET = """
+import sys
+sys.path.insert(0, {repo!r})
+from streamlit_extractor_backend import real_extractor
+noop = lambda *a: None
+real_extractor({folder!r}, {work!r}, 'emails.txt', 'urls.txt', '', {blocked!r}, {disposable!r},
+               [], [], 'all', {processes}, False, False, False, noop, noop, noop, [False])
+"""
+
+
+def entry_commands(entry, folder, work, processes):
+    emails = os.path.join(work, 'emails.txt')
+    urls = os.path.join(work, 'urls.txt')
+    if entry == 'extractor':
+        return [sys.executable, os.path.join(REPO_ROOT, 'extractor.py'), folder, '-o', emails, '-u', urls,
+                '-l', os.path.join(work, 'extractor.log'), '-d', DISPOSABLE_FILE, '-b', BLOCKED_FILE]
+    if entry == 'multi-thread':
+        return [sys.executable, os.path.join(REPO_ROOT, 'email_extractor_multi-thread.py'), folder, '-o', emails,
+                '-u', urls, '-b', BLOCKED_FILE, '-d', DISPOSABLE_FILE, '-p', str(processes)]
+    if entry == 'backend':
+        return [sys.executable, '-c', BACKEND_SNIPPET.format(
+            repo=REPO_ROOT, folder=folder, work=work, blocked=BLOCKED_FILE,
+            disposable=DISPOSABLE_FILE, processes=processes)]
+    raise ValueError(f"Unknown entry point: {entry}")
+
+
+def measure(cmd, cwd):
+    # Runs in a dedicated child so RUSAGE_CHILDREN only covers this entry point and its pool workers
+    t0 = time.perf_counter()
+    proc = subprocess.run(cmd, cwd=cwd, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    wall = time.perf_counter() - t0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return {
+        'exit_code': proc.returncode,
+        'wall_s': wall,
+        'cpu_s': usage.ru_utime + usage.ru_stime,
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        'peak_rss_mb': usage.ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024),
+        'stderr_tail': proc.stderr.decode('utf-8', errors='ignore')[-2000:],
+    }
+
+
+def read_lines(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def host_of(url):
+    try:
+        host = urlparse(url).netloc.lower()
+    except ValueError:
+        return ''
+    return host[4:] if host.startswith('www.') else host
+
+
+def score(manifest, work):
+    planted_emails = {e for f in manifest['files'] for e in f['emails']}
+    planted_hosts = {host_of(u) for f in manifest['files'] for u in f['urls']}
+    found_emails = read_lines(os.path.join(work, 'emails.txt'))
+    found_hosts = {host_of(u) for u in read_lines(os.path.join(work, 'urls.txt'))}
+    per_format = {}
+    for f in manifest['files']:
+        stats = per_format.setdefault(f['format'], [0, 0])
+        stats[0] += len(f['emails'])
+        stats[1] += len(set(f['emails']) & found_emails)
+    return {
+        'found_emails': len(found_emails),
+        'recall_emails': len(planted_emails & found_emails) / max(len(planted_emails), 1),
+        'unexpected_emails': len(found_emails - planted_emails),
+        'recall_url_hosts': len(planted_hosts & found_hosts) / max(len(planted_hosts), 1),
+        'recall_emails_by_format': {fmt: hit / max(total, 1) for fmt, (total, hit) in sorted(per_format.items())},
+    }
+
+
+def run_entry(entry, corpus_dir, manifest, processes):
+    work = tempfile.mkdtemp(prefix=f"bench_{entry}_")
+    # Scan a private copy: extractor.py creates _temp_extract inside the scanned folder
+    folder = os.path.join(work, 'corpus')
+    shutil.copytree(os.path.join(corpus_dir, 'files'), folder)
+    try:
+        cmd = [sys.executable, os.path.abspath(__file__), '--measure', json.dumps(entry_commands(entry, folder, work, processes))]
+        proc = subprocess.run(cmd, cwd=work, stdout=subprocess.PIPE, check=True)
+        result = json.loads(proc.stdout)
+        result.update(score(manifest, work))
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+    result['entry'] = entry
+    result['processes'] = processes
+    result['files_per_s'] = manifest['total_files'] / result['wall_s'] if result['wall_s'] else 0.0
+    result['mb_per_s'] = manifest['total_bytes'] / 1e6 / result['wall_s'] if result['wall_s'] else 0.0
+    return result
+
+
+def compare(results, baseline_path):
+    with open(baseline_path, 'r', encoding='utf-8') as f:
+        baseline = {r['entry']: r for r in json.load(f)['results']}
+    print(f"\nComparison against {baseline_path}:")
+    for r in results:
+        old = baseline.get(r['entry'])
+        if not old:
+            print(f"  {r['entry']}: no baseline entry")
+            continue
+        for key in ('files_per_s', 'mb_per_s', 'peak_rss_mb', 'recall_emails', 'recall_url_hosts'):
+            delta = (r[key] - old[key]) / old[key] * 100 if old[key] else 0.0
+            print(f"  {r['entry']:<13} {key:<17} {old[key]:>10.3f} -> {r[key]:>10.3f} ({delta:+.1f}%)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Throughput/recall benchmark for every extractor entry point")
+    parser.add_argument('--corpus', default=os.path.join(tempfile.gettempdir(), 'uee_bench_corpus'), help='Corpus directory (generated if missing)')
+    parser.add_argument('-s', '--seed', type=int, default=1, help='Corpus seed')
+    parser.add_argument('-n', '--scale', type=int, default=20, help='Files per format when generating')
+    parser.add_argument('-e', '--entry', nargs='*', default=ENTRY_POINTS, choices=ENTRY_POINTS, help='Entry points to run')
+    parser.add_argument('-p', '--processes', type=int, default=4, help='Processes for the parallel entry points')
+    parser.add_argument('-o', '--output', default=None, help='Results JSON (default: benchmarks/results/<timestamp>.json)')
+    parser.add_argument('-c', '--compare', default=None, help='Baseline results JSON to compare against')
+    parser.add_argument('--measure', default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.measure:
+        print(json.dumps(measure(json.loads(args.measure), os.getcwd())))
+        return
+
+    manifest_path = os.path.join(args.corpus, 'manifest.json')
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if (manifest.get('seed'), manifest.get('scale')) != (args.seed, args.scale):
+            # A corpus built for other arguments would make the results incomparable; its files are rebuilt
+            print(f"Corpus in {args.corpus} has seed {manifest.get('seed')} and scale {manifest.get('scale')}, "
+                  f"regenerating for seed {args.seed} and scale {args.scale}")
+            shutil.rmtree(os.path.join(args.corpus, 'files'), ignore_errors=True)
+            manifest = None
+    if manifest is None:
+        manifest = generate(args.corpus, args.seed, args.scale)
+    print(f"Corpus: {manifest['total_files']} files, {manifest['total_bytes'] / 1e6:.1f} MB "
+          f"(seed {manifest['seed']}, skipped formats: {', '.join(manifest['skipped_formats']) or 'none'})")
+
+    results = []
+    for entry in args.entry:
+        r = run_entry(entry, args.corpus, manifest, args.processes)
+        results.append(r)
+        print(f"{entry:<13} exit={r['exit_code']} {r['wall_s']:.2f}s  {r['files_per_s']:.1f} files/s  "
+              f"{r['mb_per_s']:.2f} MB/s  peak {r['peak_rss_mb']:.0f} MB  "
+              f"recall emails {r['recall_emails']:.1%}  url hosts {r['recall_url_hosts']:.1%}")
+
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'results',
+                                         time.strftime('%Y%m%d-%H%M%S') + '.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'corpus': {k: manifest[k] for k in ('seed', 'scale', 'total_files', 'total_bytes', 'skipped_formats')},
+            'results': results,
+        }, f, indent=2)
+    print(f"Results written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
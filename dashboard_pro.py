@@ -6,6 +6,7 @@ import time
 
 # --- Import your real_extractor from the backend file ---
 from streamlit_extractor_backend import real_extractor
+from sorted_spill import SPILL_ITEMS
 
 def list_subdirs(path):
     try:
@@ -68,7 +69,7 @@ def run_extractor_thread(
     input_folder, output_folder, email_file, url_file, map_file,
     blocklist_path, disposable_path, include_ext, exclude_ext,
     url_mode, processes, validate_urls, checkpointing, enable_mapping,
-    url_regex, email_regex
+    url_regex, email_regex, ordered_results, spill_items
 ):
     st.session_state.stats = {
         "files_processed": 0,
@@ -104,7 +105,9 @@ def run_extractor_thread(
         url_callback,
         stop_signal,
         url_regex,
-        email_regex
+        email_regex,
+        ordered=ordered_results,
+        spill_items=spill_items
     )
     st.session_state.extraction_running = False
     st.session_state.stop_signal = False
@@ -158,6 +161,7 @@ if menu == "Extraction":
         processes = st.number_input("Number of parallel processes", min_value=1, max_value=32, value=4, disabled=st.session_state.extraction_running)
         url_regex = st.text_input("Custom URL regex (optional)", value="", disabled=st.session_state.extraction_running)
         email_regex = st.text_input("Custom Email regex (optional)", value="", disabled=st.session_state.extraction_running)
+        ordered_results = st.checkbox("Deliver results in file order", value=False, disabled=st.session_state.extraction_running)
 
     st.subheader("5. Advanced Options")
     colA, colB, colC = st.columns(3)
@@ -167,6 +171,8 @@ if menu == "Extraction":
         checkpointing = st.checkbox("Enable checkpointing", value=True, disabled=st.session_state.extraction_running)
     with colC:
         enable_mapping = st.checkbox("Enable mapping export", value=False, disabled=st.session_state.extraction_running)
+    spill_items = st.number_input("Emails/URLs held in memory before sorted output spills to disk (0 = keep all in memory)",
+                                  min_value=0, value=SPILL_ITEMS, step=100000, disabled=st.session_state.extraction_running)
 
     st.markdown("---")
 
@@ -181,7 +187,7 @@ if menu == "Extraction":
                     full_input_path, full_output_path, email_file, url_file, map_file,
                     blocklist_file, disposable_file, include_ext, exclude_ext,
                     url_mode, processes, validate_urls, checkpointing, enable_mapping,
-                    url_regex, email_regex
+                    url_regex, email_regex, ordered_results, spill_items
                 ),
                 daemon=True
             ).start()
@@ -0,0 +1,309 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import socket
+import logging
+import argparse
+import tempfile
+import threading
+import multiprocessing
+import urllib.error
+import urllib.request
+from collections import deque
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+import normalize
+
+DEFAULT_PORT = 8765
+CHECKPOINT_FILE = 'distributed_checkpoint.jsonl'
+# Seconds the coordinator keeps answering after the last file for workers that have not been told done=True;
+# one that crashed never asks again
+DONE_GRACE = 60
+
+
+class Coordinator:
+    def __init__(self, folder, email_out, url_out, checkpoint_file=CHECKPOINT_FILE, batch_size=20, lease_timeout=300):
+        from extractor import list_files, is_scannable
+        self.folder = os.path.abspath(folder)
+        self.email_out = email_out
+        self.url_out = url_out
+        self.checkpoint_file = checkpoint_file
+        self.batch_size = batch_size
+        self.lease_timeout = lease_timeout
+        self.lock = threading.Lock()
+        self.finished = threading.Event()
+        self.done = self.load_checkpoint()
+        # Paths go over the wire relative to the share, so workers may mount it anywhere
+        paths = [os.path.relpath(p, self.folder) for p in list_files(self.folder) if is_scannable(p)]
+        self.total = len(paths)
+        self.queue = deque(p for p in paths if p not in self.done)
+        self.leases = {}
+        self.exported_emails = set(map(normalize.email_key, self.load_lines(email_out)))
+        self.exported_urls = set(map(normalize.url_key, self.load_lines(url_out)))
+        self.errors = 0
+        self.workers = set()
+        # Workers that were answered done=True and will not call again
+        self.released = set()
+        self.checkpoint = open(checkpoint_file, 'a', encoding='utf-8')
+        self.f_out = open(email_out, 'a', encoding='utf-8')
+        self.f_url_out = open(url_out, 'a', encoding='utf-8')
+        if not self.queue:
+            self.finished.set()
+
+    def load_checkpoint(self):
+        done = set()
+        if os.path.exists(self.checkpoint_file):
+            with open(self.checkpoint_file, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        done.add(json.loads(line)['path'])
+                    except (ValueError, KeyError):
+                        continue
+        return done
+
+    def load_lines(self, path):
+        # Seeding dedup from earlier output keeps a resumed run from writing duplicates
+        if not os.path.exists(path):
+            return set()
+        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
+            return {line.strip() for line in f if line.strip()}
+
+    def reclaim_expired(self, now):
+        for lease_id, lease in list(self.leases.items()):
+            if lease['expires'] < now:
+                logging.warning(f"Lease {lease_id} of {lease['worker']} expired, requeueing {len(lease['paths'])} files")
+                self.queue.extendleft(reversed(sorted(lease['paths'])))
+                del self.leases[lease_id]
+
+    def lease(self, worker):
+        with self.lock:
+            now = time.time()
+            self.reclaim_expired(now)
+            self.workers.add(worker)
+            if not self.queue:
+                # Workers keep polling while other leases may still expire and come back
+                done = self.finished.is_set()
+                if done:
+                    self.released.add(worker)
+                return {'done': done, 'paths': [], 'root': self.folder}
+            paths = [self.queue.popleft() for _ in range(min(self.batch_size, len(self.queue)))]
+            lease_id = uuid.uuid4().hex
+            self.leases[lease_id] = {'worker': worker, 'paths': set(paths), 'expires': now + self.lease_timeout}
+            return {'lease': lease_id, 'paths': paths, 'root': self.folder, 'timeout': self.lease_timeout}
+
+    def result(self, lease_id, worker, path, emails, urls, error=None):
+        with self.lock:
+            lease = self.leases.get(lease_id)
+            if lease is None or path not in lease['paths']:
+                # Expired and handed to someone else; that worker's result will be the one recorded
+                return {'accepted': False}
+            lease['paths'].discard(path)
+            lease['expires'] = time.time() + self.lease_timeout
+            if not lease['paths']:
+                del self.leases[lease_id]
+            if path in self.done:
+                return {'accepted': False}
+            for email in map(normalize.email_key, emails):
+                if email not in self.exported_emails:
+                    self.f_out.write(email + '\n')
+                    self.exported_emails.add(email)
+            for url in urls:
+                key = normalize.url_key(url)
+                if key not in self.exported_urls:
+                    self.f_url_out.write(url + '\n')
+                    self.exported_urls.add(key)
+            self.f_out.flush()
+            self.f_url_out.flush()
+            if error:
+                self.errors += 1
+                logging.error(f"{worker} failed on {path}: {error}")
+            entry = {'path': path, 'worker': worker, 'emails': len(emails), 'urls': len(urls)}
+            if error:
+                entry['error'] = error
+            self.checkpoint.write(json.dumps(entry) + '\n')
+            self.checkpoint.flush()
+            self.done.add(path)
+            if not self.queue and not self.leases:
+                self.finished.set()
+            return {'accepted': True}
+
+    def status(self):
+        with self.lock:
+            return {
+                'total': self.total, 'done': len(self.done), 'queued': len(self.queue),
+                'leased': sum(len(lease['paths']) for lease in self.leases.values()),
+                'workers': sorted(self.workers), 'errors': self.errors,
+                'emails': len(self.exported_emails), 'urls': len(self.exported_urls),
+            }
+
+    def all_released(self):
+        with self.lock:
+            return self.workers <= self.released
+
+    def close(self):
+        self.checkpoint.close()
+        self.f_out.close()
+        self.f_url_out.close()
+
+
+def make_handler(coordinator, token=None):
+    class Handler(BaseHTTPRequestHandler):
+        def reply(self, code, body):
+            data = json.dumps(body).encode('utf-8')
+            self.send_response(code)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def authorized(self):
+            if token and self.headers.get('X-Token') != token:
+                self.reply(403, {'error': 'bad token'})
+                return False
+            return True
+
+        def do_GET(self):
+            if not self.authorized():
+                return
+            if self.path == '/status':
+                self.reply(200, coordinator.status())
+            else:
+                self.reply(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if not self.authorized():
+                return
+            try:
+                body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+                if self.path == '/lease':
+                    self.reply(200, coordinator.lease(body['worker']))
+                elif self.path == '/result':
+                    self.reply(200, coordinator.result(body['lease'], body['worker'], body['path'],
+                                                       body.get('emails', []), body.get('urls', []), body.get('error')))
+                else:
+                    self.reply(404, {'error': 'not found'})
+            except (ValueError, KeyError) as e:
+                self.reply(400, {'error': str(e)})
+
+        def log_message(self, format, *args):
+            logging.debug(format % args)
+
+    return Handler
+
+def run_coordinator(folder, email_out, url_out, host='127.0.0.1', port=DEFAULT_PORT, checkpoint_file=CHECKPOINT_FILE,
+                    batch_size=20, lease_timeout=300, token=None, done_grace=DONE_GRACE):
+    coordinator = Coordinator(folder, email_out, url_out, checkpoint_file, batch_size, lease_timeout)
+    server = ThreadingHTTPServer((host, port), make_handler(coordinator, token))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    print(f"Coordinating {coordinator.total} files ({len(coordinator.done)} already done) on http://{host}:{server.server_port}")
+    try:
+        while not coordinator.finished.wait(5):
+            s = coordinator.status()
+            print(f"  done {s['done']}/{s['total']}  leased {s['leased']}  queued {s['queued']}  workers {len(s['workers'])}")
+        # Keep serving until every worker has seen done=True, so none is cut off mid-poll or in its backoff
+        deadline = time.time() + done_grace
+        while not coordinator.all_released() and time.time() < deadline:
+            time.sleep(0.2)
+    finally:
+        server.shutdown()
+        coordinator.close()
+    s = coordinator.status()
+    print(f"Finished: {s['done']}/{s['total']} files, {s['errors']} errors, "
+          f"{s['emails']} unique emails ({email_out}), {s['urls']} unique urls ({url_out})")
+    return s
+
+
+def post(url, body, token=None, timeout=60):
+    request = urllib.request.Request(url, data=json.dumps(body).encode('utf-8'), method='POST',
+                                     headers={'Content-Type': 'application/json', **({'X-Token': token} if token else {})})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+def run_worker(coordinator_url, disposable_file, blocked_file, root=None, worker_id=None, token=None, poll_interval=2):
+    from extractor import load_disposable_domains, load_blocked_domains, process_file, extract_urls_from_text
+    coordinator_url = coordinator_url.rstrip('/')
+    worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+    disposable_domains = load_disposable_domains(disposable_file)
+    blocked_domains = load_blocked_domains(blocked_file)
+    temp_dir = tempfile.mkdtemp(prefix='extract_worker_')
+    processed = 0
+    idle = False
+    try:
+        while True:
+            try:
+                lease = post(f"{coordinator_url}/lease", {'worker': worker_id}, token)
+            except urllib.error.HTTPError:
+                raise
+            except (urllib.error.URLError, ConnectionError) as e:
+                if not idle:
+                    raise
+                # Nothing was left to lease at the last poll; the coordinator finished and went away since
+                logging.info(f"Coordinator gone while waiting for work ({e}), treating the scan as finished")
+                break
+            if lease.get('done'):
+                break
+            idle = not lease['paths']
+            if idle:
+                time.sleep(poll_interval)
+                continue
+            base = root or lease['root']
+            for rel in lease['paths']:
+                emails, urls, error = set(), set(), None
+                try:
+                    emails, text_content = process_file(os.path.join(base, rel), temp_dir, disposable_domains)
+                    urls = extract_urls_from_text(text_content, blocked_domains)
+                except Exception as e:
+                    error = f"{e.__class__.__name__}: {e}"
+                # One post per file streams results back and doubles as a lease heartbeat
+                post(f"{coordinator_url}/result", {'lease': lease['lease'], 'worker': worker_id, 'path': rel,
+                                                   'emails': sorted(emails), 'urls': sorted(urls), 'error': error}, token)
+                processed += 1
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    return processed
+
+def _worker_entry(args):
+    coordinator_url, disposable_file, blocked_file, root, worker_id, token = args
+    return run_worker(coordinator_url, disposable_file, blocked_file, root, worker_id, token)
+
+def run_workers(coordinator_url, disposable_file, blocked_file, root=None, processes=1, token=None):
+    if processes <= 1:
+        return run_worker(coordinator_url, disposable_file, blocked_file, root, token=token)
+    host = socket.gethostname()
+    jobs = [(coordinator_url, disposable_file, blocked_file, root, f"{host}-{os.getpid()}-{i}", token) for i in range(processes)]
+    with multiprocessing.Pool(processes) as pool:
+        return sum(pool.map(_worker_entry, jobs))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Distributed email/URL extraction: one coordinator, workers on any number of hosts")
+    sub = parser.add_subparsers(dest='mode', required=True)
+    c = sub.add_parser('coordinator', help='Enumerate a shared folder and lease batches of files to workers')
+    c.add_argument('folder', help='Folder to scan (as mounted on the coordinator)')
+    c.add_argument('-o', '--output', default='emails_found.txt', help='Output file for emails')
+    c.add_argument('-u', '--url_output', default='urls_found.txt', help='Output file for URLs')
+    c.add_argument('--host', default='127.0.0.1', help='Address to listen on (use 0.0.0.0 for remote workers)')
+    c.add_argument('--port', type=int, default=DEFAULT_PORT, help='Port to listen on')
+    c.add_argument('--checkpoint', default=CHECKPOINT_FILE, help='JSONL of finished files; a restarted coordinator skips them')
+    c.add_argument('--batch', type=int, default=20, help='Files per lease')
+    c.add_argument('--lease-timeout', type=float, default=300, help='Seconds without progress before a lease is handed out again')
+    c.add_argument('--token', default=None, help='Shared secret workers must send')
+    c.add_argument('-l', '--log', default='coordinator.log', help='Log file')
+    w = sub.add_parser('worker', help='Lease files from a coordinator and run the extractor on them')
+    w.add_argument('coordinator', help='Coordinator URL, e.g. http://scanhost:8765')
+    w.add_argument('--root', default=None, help="Where the shared folder is mounted on this host (default: the coordinator's path)")
+    w.add_argument('-d', '--domains', default='disposable_domains.txt', help='Disposable domains file')
+    w.add_argument('-b', '--blocked_domains', default='blocked_domains.txt', help='Blocked URL domains text file')
+    w.add_argument('-p', '--processes', type=int, default=1, help='Worker processes on this host')
+    w.add_argument('--token', default=None, help='Shared secret expected by the coordinator')
+    w.add_argument('-l', '--log', default='worker.log', help='Log file')
+    args = parser.parse_args()
+    logging.basicConfig(filename=args.log, level=logging.INFO, format='%(asctime)s [%(levelname)s] %(message)s')
+    if args.mode == 'coordinator':
+        run_coordinator(args.folder, args.output, args.url_output, args.host, args.port, args.checkpoint,
+                        args.batch, args.lease_timeout, args.token)
+    else:
+        n = run_workers(args.coordinator, args.domains, args.blocked_domains, args.root, args.processes, args.token)
+        print(f"Worker finished after {n} files")
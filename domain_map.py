@@ -0,0 +1,74 @@
+import csv
+import json
+from array import array
+
+
+# URL -> root domain / subdomain mapping. Each URL string is stored once and the groups hold its integer id in
+# an array (4 bytes per posting) instead of a set of strings per group. Groups and their URLs keep first-seen order.
+class DomainMap:
+    def __init__(self, keep_postings=True, keep_urls=True):
+        # Without postings only each group's first URL is kept, which is all the URL export needs. Without
+        # keep_urls, URLs that start no group are not stored at all and dedup is left to the caller.
+        self.keep_postings = keep_postings and keep_urls
+        self.keep_urls = keep_urls
+        self.ids = {}
+        self.urls = []
+        self.roots = {}
+        self.subdomains = {}
+
+    def __contains__(self, url):
+        return url in self.ids
+
+    def __len__(self):
+        return len(self.urls)
+
+    def add(self, url, root, subdomain):
+        # False for a URL seen before; its root and subdomain never change, so its postings already exist
+        if url in self.ids:
+            return False
+        if not self.keep_urls and (not root or root in self.roots) and (not subdomain or subdomain in self.subdomains):
+            return True
+        uid = len(self.urls)
+        if self.keep_urls:
+            self.ids[url] = uid
+        self.urls.append(url)
+        for groups, key in ((self.roots, root), (self.subdomains, subdomain)):
+            if not key:
+                continue
+            postings = groups.get(key)
+            if postings is None:
+                groups[key] = array('I', (uid,))
+            elif self.keep_postings:
+                postings.append(uid)
+        return True
+
+    def groups(self, mode):
+        # (key, url ids) per group; in "all" mode every URL is its own group
+        if mode == "root":
+            return iter(self.roots.items())
+        if mode == "subdomain":
+            return iter(self.subdomains.items())
+        if mode == "all":
+            return ((url, (uid,)) for uid, url in enumerate(self.urls))
+        return iter(())
+
+    def export_urls(self, mode):
+        return (self.urls[postings[0]] for _, postings in self.groups(mode))
+
+    def write_json(self, f, mode):
+        # Streams the same text json.dump(mapping, f, indent=2) wrote for {key: [urls]}
+        f.write('{')
+        first = True
+        for key, postings in self.groups(mode):
+            f.write(('\n  ' if first else ',\n  ') + json.dumps(key) + ': [')
+            for i, uid in enumerate(postings):
+                f.write(('\n    ' if i == 0 else ',\n    ') + json.dumps(self.urls[uid]))
+            f.write('\n  ]' if len(postings) else ']')
+            first = False
+        f.write('}' if first else '\n}')
+
+    def write_csv(self, f, mode):
+        writer = csv.writer(f)
+        writer.writerow(['Domain/Subdomain', 'URLs'])
+        for key, postings in self.groups(mode):
+            writer.writerow([key, "; ".join(self.urls[uid] for uid in postings)])
@@ -1,21 +1,47 @@
 import os
 import re
 import csv
+import codecs
 import json
 import tempfile
 import shutil
 import multiprocessing
 import threading
 from tqdm import tqdm
-from concurrent.futures import ProcessPoolExecutor, as_completed
 import chardet
 import pdfplumber
-import pytesseract
+import ocr
 from PIL import Image
-import docx
+import xml_stream
+import pdf_fast
+import normalize
+import provenance
 import striprtf
+from sandbox import SandboxPool, check_archive_size, OK, MAX_ARCHIVE_BYTES
+from fingerprint import DuplicateGroups
+from watcher import Watcher
 
 CHECKPOINT_FILE = 'processed_files.json'
+# Finished parts (archive members, text ranges, PDF page blocks) of files that are not finished yet
+JOURNAL_FILE = 'processed_units.jsonl'
+TEXT_EXTS = ('.txt', '.csv', '.log', '.ini', '.json', '.xml', '.html', '.htm', '.md', '.yaml', '.yml')
+HANDLER_EXTS = {
+    'text': TEXT_EXTS,
+    'pdf': ('.pdf',),
+    'image': ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif'),
+    'docx': ('.docx',),
+    'rtf': ('.rtf',),
+    'archive': ('.zip', '.tar', '.gz', '.tgz', '.rar'),
+}
+# Text files above SPLIT_BYTES are scanned as ranges of about RANGE_BYTES by several workers at once
+SPLIT_BYTES = 256 * 1024 * 1024
+RANGE_BYTES = 32 * 1024 * 1024
+# Split files are too big for chardet on the whole content; their encoding is detected from the head
+ENCODING_SAMPLE = 1024 * 1024
+CUT_WINDOW = 64 * 1024
+CUT_BYTES = b'\n \t\r'
+# Longer PDFs are read in blocks of this many pages, each a task of its own
+PDF_PAGE_BLOCK = 50
 
 def load_blocklist(filepath):
     patterns = []
@@ -36,9 +62,13 @@ def load_disposable_domains(filepath):
         return [line.strip().lower() for line in f if line.strip()]
 
 def extract_emails(text, forbidden_words, disposable_domains):
+    # email -> position of its first match in text
     email_regex = re.compile(r'(?<![\w.-])([a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+)(?![\w.-])')
-    results = set()
-    for email in email_regex.findall(text):
+    results = {}
+    for match in email_regex.finditer(text):
+        email = match.group(1)
+        if email in results:
+            continue
         local, _, domain = email.lower().partition('@')
         if any(word in local for word in forbidden_words):
             continue
@@ -46,11 +76,12 @@ def extract_emails(text, forbidden_words, disposable_domains):
             continue
         if re.search(r'@\d+$', email) or re.search(r'\.(jpg|png|gif|bmp|tiff|jpeg)$', email, re.I):
             continue
-        results.add(email)
+        results[email] = match.start(1)
     return results
 
 def extract_urls(text, block_patterns):
-    url_candidates = []
+    # url -> position of its first match in text
+    url_candidates = {}
     for match in re.finditer(r'https?://', text):
         start = match.start()
         end = start
@@ -60,35 +91,100 @@ def extract_urls(text, block_patterns):
         url = url.rstrip('.,;\'"!?)]}')
         if len(url) < 10 or '.' not in url:
             continue
-        try:
-            domain = re.search(r'https?://([^/]+)', url).group(1).lower()
-            if is_blocked(domain, block_patterns):
-                continue
-        except Exception:
+        domain = normalize.url_host(url)
+        if not domain:
             continue
-        url_candidates.append(url)
-    return set(url_candidates)
+        # Patterns may be written against the host as it appears (www, port) or its canonical form
+        if is_blocked(normalize.url_netloc(url), block_patterns) or is_blocked(domain, block_patterns):
+            continue
+        url_candidates.setdefault(url, start)
+    return url_candidates
 
 def read_text_file(path):
+    # Returns the text and the encoding that maps it back to the file's bytes, or None when bytes were dropped
     try:
         with open(path, 'rb') as f:
             raw = f.read()
             enc = chardet.detect(raw)['encoding'] or 'utf-8'
-            return raw.decode(enc, errors='ignore')
+            try:
+                # Undecodable bytes become lone surrogates, which encode back to exactly the bytes they came from
+                return raw.decode(enc, errors='surrogateescape'), enc
+            except UnicodeDecodeError:
+                return raw.decode(enc, errors='ignore'), None
     except Exception:
-        return ''
+        return '', None
 
 def read_pdf_file(path):
+    try:
+        return '\n'.join(pdf_fast.page_strings(path))
+    except Exception:
+        # pdfium is missing, or refused a damaged file that pdfminer may still read
+        pass
     try:
         with pdfplumber.open(path) as pdf:
             return '\n'.join(page.extract_text() or '' for page in pdf.pages)
     except Exception:
         return ''
 
+def text_encoding(path):
+    with open(path, 'rb') as f:
+        return chardet.detect(f.read(ENCODING_SAMPLE))['encoding'] or 'utf-8'
+
+def splittable(encoding):
+    # A whitespace byte is a whole character only in ASCII-compatible encodings
+    return not encoding.lower().replace('-', '').startswith(('utf16', 'utf32'))
+
+def find_cut(f, pos, size):
+    # First position after pos that follows a whitespace byte. Neither an email nor a URL contains one, so
+    # no match crosses the cut and the ranges need no overlap; results equal scanning the file whole.
+    f.seek(pos)
+    while pos < size:
+        window = f.read(CUT_WINDOW)
+        if not window:
+            break
+        hits = [i for i in (window.find(b) for b in CUT_BYTES) if i != -1]
+        if hits:
+            return pos + min(hits) + 1
+        pos += len(window)
+    return size
+
+def text_ranges(path, size):
+    ranges = []
+    start = 0
+    with open(path, 'rb') as f:
+        while start < size:
+            end = find_cut(f, start + RANGE_BYTES, size) if start + RANGE_BYTES < size else size
+            ranges.append((start, end))
+            start = end
+    return ranges
+
+def read_text_range(path, start, end, encoding):
+    # Decoded like read_text_file, so positions in the text can be mapped back to bytes
+    with open(path, 'rb') as f:
+        f.seek(start)
+        raw = f.read(end - start)
+    try:
+        return raw.decode(encoding, errors='surrogateescape'), encoding
+    except UnicodeDecodeError:
+        return raw.decode(encoding, errors='ignore'), None
+
+def read_pdf_pages(path, first, last):
+    return '\n'.join(pdf_fast.page_strings(path, pages=range(first, last)))
+
+def pdf_page_blocks(path):
+    try:
+        pages = pdf_fast.page_count(path)
+    except Exception:
+        # pdfium is missing or cannot open the file; the whole-file reader has its own fallback
+        return []
+    if pages <= PDF_PAGE_BLOCK:
+        return []
+    return [(first, min(first + PDF_PAGE_BLOCK, pages)) for first in range(0, pages, PDF_PAGE_BLOCK)]
+
 def ocr_image(img_path):
     try:
         img = Image.open(img_path)
-        return pytesseract.image_to_string(img)
+        return ocr.image_to_string(img)
     except Exception:
         return ''
 
@@ -97,8 +193,7 @@ def read_image_file(path):
 
 def read_docx_file(path):
     try:
-        doc = docx.Document(path)
-        return '\n'.join([p.text for p in doc.paragraphs])
+        return '\n'.join(xml_stream.ooxml_strings(path))
     except Exception:
         return ''
 
@@ -109,43 +204,135 @@ def read_rtf_file(path):
     except Exception:
         return ''
 
-def extract_archive(path, temp_dir):
+def extract_gzip(path, dest, limit=MAX_ARCHIVE_BYTES):
+    # gzip declares no trustworthy size up front, so the bomb limit is enforced while decompressing
+    import gzip
+    written = 0
+    with gzip.open(path, 'rb') as src, open(dest, 'wb') as out:
+        while True:
+            block = src.read(1024 * 1024)
+            if not block:
+                return dest
+            written += len(block)
+            if limit and written > limit:
+                raise ValueError(f"archive {path} expands to more than {limit} bytes, refusing to extract")
+            out.write(block)
+
+def extract_archive(path, temp_dir, skip=()):
+    # Returns (member name, extracted path); members in skip were finished by an earlier run and stay packed
+    import zipfile
+    import tarfile
     extracted_files = []
     try:
-        if path.lower().endswith('.zip'):
-            import zipfile
+        # A directory per archive, so same-named members of different archives do not overwrite each other
+        if zipfile.is_zipfile(path):
             with zipfile.ZipFile(path, 'r') as z:
-                z.extractall(temp_dir)
-                extracted_files.extend([os.path.join(temp_dir, f) for f in z.namelist()])
-        # Add TAR, GZ, RAR extraction as needed
+                check_archive_size(z, path)
+                dest = tempfile.mkdtemp(dir=temp_dir)
+                for name in z.namelist():
+                    if name.endswith('/') or name in skip:
+                        continue
+                    extracted_files.append((name, z.extract(name, dest)))
+        elif tarfile.is_tarfile(path):
+            # .tar, .tar.gz, .tgz, .tar.bz2 and .tar.xz
+            with tarfile.open(path, 'r:*') as t:
+                check_archive_size(t, path)
+                dest = tempfile.mkdtemp(dir=temp_dir)
+                # Members that would land outside dest are refused where tarfile supports it
+                safe = {'filter': 'data'} if hasattr(tarfile, 'data_filter') else {}
+                for member in t.getmembers():
+                    if not member.isfile() or member.name in skip:
+                        continue
+                    t.extract(member, dest, **safe)
+                    extracted_files.append((member.name, os.path.join(dest, member.name.lstrip('/'))))
+        elif path.lower().endswith('.gz'):
+            # A single compressed file; its one member is named after the archive without .gz
+            name = os.path.basename(path)[:-3] or 'member'
+            if name not in skip:
+                extracted_files.append((name, extract_gzip(path, os.path.join(tempfile.mkdtemp(dir=temp_dir), name))))
+        # RAR needs an external unpacker and is not extracted
     except Exception:
         pass
     return extracted_files
 
-def process_file(path, forbidden_words, disposable_domains, block_patterns, temp_dir):
+def handler_name(path):
     ext = os.path.splitext(path)[1].lower()
+    for name, exts in HANDLER_EXTS.items():
+        if ext in exts:
+            return name
+    return 'other'
+
+def process_file(path, forbidden_words, disposable_domains, block_patterns, temp_dir, skip=()):
+    handler = handler_name(path)
     text = ''
+    # Only a text file's own encoding turns a position in its text into a byte offset in the file
+    encoding = None
     extracted_files = []
-    if ext in ('.txt', '.csv', '.log', '.ini', '.json', '.xml', '.html', '.htm', '.md', '.yaml', '.yml'):
-        text = read_text_file(path)
-    elif ext in ('.pdf',):
+    if handler == 'text':
+        text, encoding = read_text_file(path)
+    elif handler == 'pdf':
         text = read_pdf_file(path)
-    elif ext in ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif'):
+    elif handler == 'image':
         text = read_image_file(path)
-    elif ext in ('.docx',):
+    elif handler == 'docx':
         text = read_docx_file(path)
-    elif ext in ('.rtf',):
+    elif handler == 'rtf':
         text = read_rtf_file(path)
-    elif ext in ('.zip', '.tar', '.gz', '.rar'):
-        extracted_files = extract_archive(path, temp_dir)
+    elif handler == 'archive':
+        extracted_files = extract_archive(path, temp_dir, skip)
     # Add more file handlers here as needed
 
-    emails, urls = set(), set()
+    emails, urls = {}, {}
     if text:
         emails = extract_emails(text, forbidden_words, disposable_domains)
         urls = extract_urls(text, block_patterns)
+    if encoding:
+        emails, urls = byte_offsets(text, 0, encoding, emails, urls)
+    else:
+        emails, urls = dict.fromkeys(emails, provenance.NO_OFFSET), dict.fromkeys(urls, provenance.NO_OFFSET)
     return emails, urls, extracted_files, path
 
+def scan_text(text, path, forbidden_words, disposable_domains, block_patterns):
+    emails, urls = {}, {}
+    if text:
+        emails = extract_emails(text, forbidden_words, disposable_domains)
+        urls = extract_urls(text, block_patterns)
+    return emails, urls, [], path
+
+def byte_offsets(text, start, encoding, *found):
+    # Character positions in a range's text -> byte positions in the file, encoding each stretch between hits once.
+    # Exact, since undecodable bytes are kept in the text as surrogates and encode back to themselves.
+    encoder = codecs.getincrementalencoder(encoding)(errors='surrogateescape')
+    if start:
+        # A BOM is only stripped at the start of the file
+        encoder.encode('')
+    positions = {}
+    done, size = 0, start
+    for pos in sorted({pos for hits in found for pos in hits.values()}):
+        size += len(encoder.encode(text[done:pos]))
+        positions[pos] = size
+        done = pos
+    return [{entity: positions[pos] for entity, pos in hits.items()} for hits in found]
+
+def process_range(path, start, end, encoding, forbidden_words, disposable_domains, block_patterns):
+    # Hits of a split file are located by their byte position in the file
+    text, encoding = read_text_range(path, start, end, encoding)
+    emails, urls, extracted_files, _ = scan_text(text, path, forbidden_words, disposable_domains, block_patterns)
+    if encoding:
+        emails, urls = byte_offsets(text, start, encoding, emails, urls)
+    else:
+        emails, urls = dict.fromkeys(emails, provenance.NO_OFFSET), dict.fromkeys(urls, provenance.NO_OFFSET)
+    return emails, urls, extracted_files, path
+
+def process_pages(path, first, last, forbidden_words, disposable_domains, block_patterns):
+    try:
+        text = read_pdf_pages(path, first, last)
+    except Exception:
+        text = ''
+    emails, urls, extracted_files, _ = scan_text(text, path, forbidden_words, disposable_domains, block_patterns)
+    # A position within a block of pages is not a position in the document's text
+    return dict.fromkeys(emails, provenance.NO_OFFSET), dict.fromkeys(urls, provenance.NO_OFFSET), extracted_files, path
+
 def get_all_files(folder):
     for root, _, files in os.walk(folder):
         for f in files:
@@ -161,7 +348,76 @@ def load_checkpoint():
             return set(json.load(f))
     return set()
 
-def writer(queue, email_out, url_out, csv_out):
+def file_stamp(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns]
+
+
+# Append-only log of finished units. Entries are tied to the size and mtime of the top-level file they belong
+# to, so a file that changed since is redone whole; entries of files that did finish are dropped on load.
+class Journal:
+    def __init__(self, path, processed):
+        self.path = path
+        self.entries = self.load(processed)
+        self.out = open(path, 'a', encoding='utf-8')
+
+    def load(self, processed):
+        entries = {}
+        if not os.path.exists(self.path):
+            return entries
+        stamps = {}
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    e = json.loads(line)
+                except ValueError:
+                    # The last line may have been cut short by the crash
+                    continue
+                root = e['root']
+                if root in processed:
+                    continue
+                if root not in stamps:
+                    try:
+                        stamps[root] = file_stamp(root)
+                    except OSError:
+                        stamps[root] = None
+                if stamps[root] != e['stamp']:
+                    continue
+                entry = entries.setdefault(e['file'], {'root': root, 'stamp': e['stamp'], 'units': set()})
+                entry['units'].add(e['unit'])
+        # Rewritten without the stale entries, so the log only grows with the current run's work
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for name, entry in entries.items():
+                for unit in entry['units']:
+                    f.write(json.dumps({'root': entry['root'], 'stamp': entry['stamp'], 'file': name, 'unit': unit}) + '\n')
+        os.replace(tmp, self.path)
+        return entries
+
+    def units(self, name, root, stamp):
+        entry = self.entries.get(name)
+        if entry is None or entry['root'] != root or entry['stamp'] != stamp:
+            return set()
+        return entry['units']
+
+    def record(self, name, root, stamp, unit, status=None):
+        # status is set for a unit that was quarantined rather than scanned; it is finished all the same
+        entry = {'root': root, 'stamp': stamp, 'file': name, 'unit': unit}
+        if status:
+            entry['status'] = status
+        self.out.write(json.dumps(entry) + '\n')
+        self.out.flush()
+        entry = self.entries.get(name)
+        if entry is None or entry['stamp'] != stamp:
+            entry = self.entries[name] = {'root': root, 'stamp': stamp, 'units': set()}
+        entry['units'].add(unit)
+
+    def close(self):
+        self.out.close()
+
+
+def writer(queue, email_out, url_out, csv_out, provenance_file=None):
+    sources = provenance.Provenance(provenance_file) if provenance_file else None
     seen_emails = set()
     seen_domains = set()
     with open(email_out, 'a', encoding='utf-8') as ef, \
@@ -173,7 +429,13 @@ def writer(queue, email_out, url_out, csv_out):
             if item == 'DONE':
                 break
             emails, urls, src_file = item
-            for e in emails:
+            if sources is not None:
+                handler = handler_name(src_file)
+                for e, offset in emails.items():
+                    sources.add(normalize.email_key(e), provenance.EMAIL, src_file, handler, offset)
+                for u, offset in urls.items():
+                    sources.add(u, provenance.URL, src_file, handler, offset)
+            for e in map(normalize.email_key, emails):
                 if e in seen_emails:
                     continue
                 seen_emails.add(e)
@@ -181,11 +443,9 @@ def writer(queue, email_out, url_out, csv_out):
                 if csv_writer:
                     csv_writer.writerow([e, src_file])
             for u in urls:
-                try:
-                    domain = re.search(r'https?://([^/]+)', u).group(1).lower()
-                except Exception:
-                    continue
-                if domain in seen_domains:
+                # One URL per site: www, letter case, ports and IDN spellings all map to the same host
+                domain = normalize.url_host(u)
+                if not domain or domain in seen_domains:
                     continue
                 seen_domains.add(domain)
                 uf.write(u + '\n')
@@ -195,46 +455,219 @@ def writer(queue, email_out, url_out, csv_out):
             uf.flush()
             if csv_writer:
                 cf.flush()
+            if sources is not None:
+                sources.flush()
+    if sources is not None:
+        sources.close()
+
+_worker_args = ()
 
-def main(folder, email_out, url_out, csv_out, blocklist_file, disposable_file, forbidden_words, num_processes=4):
+def process_path(path, skip=()):
+    # Filter state is inherited by the forked workers; pickling ~3000 compiled patterns per file cost more than the file
+    return process_file(path, *_worker_args, skip=skip)
+
+def process_range_path(path, start, end, encoding):
+    forbidden_words, disposable_domains, block_patterns, _ = _worker_args
+    return process_range(path, start, end, encoding, forbidden_words, disposable_domains, block_patterns)
+
+def process_pages_path(path, first, last):
+    forbidden_words, disposable_domains, block_patterns, _ = _worker_args
+    return process_pages(path, first, last, forbidden_words, disposable_domains, block_patterns)
+
+def main(folder, email_out, url_out, csv_out, blocklist_file, disposable_file, forbidden_words, num_processes=4,
+         timeout=None, max_memory_mb=None, quarantine_file=None, watch=False, debounce=2.0, ocr_cache=None,
+         ocr_cache_bytes=ocr.OCR_CACHE_BYTES, provenance_file=None):
     block_patterns = load_blocklist(blocklist_file)
     disposable_domains = load_disposable_domains(disposable_file)
 
     processed_files = load_checkpoint()
+    journal = Journal(JOURNAL_FILE, processed_files)
     all_files = [f for f in get_all_files(folder) if f not in processed_files]
     temp_dir = tempfile.mkdtemp()
+    global _worker_args
+    _worker_args = (forbidden_words, disposable_domains, block_patterns, temp_dir)
+    # Workers fork after this and each opens its own connection to the shared cache
+    if ocr_cache:
+        ocr.activate(ocr.OcrCache(ocr_cache, ocr_cache_bytes))
     manager = multiprocessing.Manager()
     queue = manager.Queue()
 
-    writer_thread = threading.Thread(target=writer, args=(queue, email_out, url_out, csv_out))
+    writer_thread = threading.Thread(target=writer, args=(queue, email_out, url_out, csv_out, provenance_file))
     writer_thread.start()
+    # Started before the first pass so files landing during it are not missed
+    own_files = [email_out, url_out, csv_out, quarantine_file, CHECKPOINT_FILE, JOURNAL_FILE, ocr_cache, provenance_file]
+    file_watcher = Watcher(folder, debounce, ignore=[f for f in own_files if f]) if watch else None
 
     try:
         with tqdm(total=len(all_files), desc="Scanning files", unit="file") as pbar, \
-             ProcessPoolExecutor(max_workers=num_processes) as executor:
+             SandboxPool(num_processes, timeout, max_memory_mb, quarantine_file) as pool:
+
+            # Identical copies are parsed once; the result is written for every path holding the payload. Files
+            # that share their size are hashed in the background while the others are already being scanned.
+            groups = DuplicateGroups(all_files)
+            copies = groups.copies
+            # A file is done once all of its units are: text ranges, PDF page blocks or archive members.
+            # info maps a path to (journal name, top-level file, its stamp); members are named archive!member.
+            info = {}
+            parents = {}
+            open_units = {}
+            tasks = {}
 
-            futures = {executor.submit(process_file, f, forbidden_words, disposable_domains, block_patterns, temp_dir): f for f in all_files}
-            for future in as_completed(futures):
+            def task(path, unit, func, *args):
+                key = path if unit is None else f"{path}#{unit}"
+                tasks[key] = (path, unit)
+                pool.submit(key, func, *args)
+
+            def split_units(path):
                 try:
-                    emails, urls, extracted_files, src_file = future.result()
-                    queue.put((emails, urls, src_file))
-                    processed_files.add(src_file)
+                    size = os.path.getsize(path)
+                except OSError:
+                    return None
+                lower = path.lower()
+                if size > SPLIT_BYTES and lower.endswith(TEXT_EXTS):
+                    encoding = text_encoding(path)
+                    if splittable(encoding):
+                        return [(f"range:{start}-{end}", process_range_path, (path, start, end, encoding))
+                                for start, end in text_ranges(path, size)]
+                if lower.endswith('.pdf'):
+                    blocks = pdf_page_blocks(path)
+                    if blocks:
+                        return [(f"pages:{first}-{last}", process_pages_path, (path, first, last)) for first, last in blocks]
+                return None
+
+            def submit(path):
+                if path not in info:
+                    try:
+                        info[path] = (path, path, file_stamp(path))
+                    except OSError:
+                        info[path] = (path, path, None)
+                done = journal.units(*info[path])
+                units = split_units(path)
+                if units is None:
+                    skip = sorted(u[len('member:'):] for u in done if u.startswith('member:'))
+                    task(path, None, process_path, path, skip)
+                    return
+                left = [u for u in units if u[0] not in done]
+                pbar.total += len(left) - 1
+                if not left:
+                    finish(path)
+                    return
+                open_units[path] = len(left)
+                for unit, func, args in left:
+                    task(path, unit, func, *args)
+
+            def expand(archive, members):
+                members = [(name, p) for name, p in members if os.path.isfile(p)]
+                if not members:
+                    finish(archive)
+                    return
+                name, root, stamp = info[archive]
+                open_units[archive] = len(members)
+                for member, p in members:
+                    parents[p] = (archive, member)
+                    info[p] = (f"{name}!{member}", root, stamp)
+                    all_files.append(p)
+                    pbar.total += 1
+                    submit(p)
+
+            def report_names(path):
+                # Every name the result is written under: all copies of a file, and a member of each copy of
+                # its archive as archive!member rather than its temp path
+                if path in copies:
+                    return copies[path]
+                if path in parents:
+                    archive, member = parents[path]
+                    return [f"{name}!{member}" for name in report_names(archive)]
+                return [path]
+
+            def feed():
+                for f in groups.ready():
+                    submit(f)
+
+            def unit_done(path):
+                open_units[path] -= 1
+                if not open_units[path]:
+                    del open_units[path]
+                    finish(path)
+
+            def finish(path, status=None):
+                open_units.pop(path, None)
+                parent = parents.pop(path, None)
+                info.pop(path, None)
+                if parent is None:
+                    for copy in copies.get(path, [path]):
+                        processed_files.add(copy)
                     save_checkpoint(processed_files)
-                    for efp in extracted_files:
-                        if os.path.isfile(efp):
-                            all_files.append(efp)
-                            pbar.total += 1
-                except Exception as e:
-                    print(f"[ERROR]: {e}")
+                    pbar.update(len(copies.get(path, [path])) - 1)
+                    return
+                archive, member = parent
+                journal.record(*info[archive], f"member:{member}", status)
+                unit_done(archive)
+
+            def drain():
+                for key, status, result in pool.as_completed():
+                    path, unit = tasks.pop(key)
+                    try:
+                        if status != OK:
+                            # Timeouts, memory breaches and crashes are already quarantined by the pool. The unit
+                            # still counts as finished, so its file or archive closes out and no later run retries it.
+                            print(f"[ERROR] {key}: {status}")
+                            if unit:
+                                journal.record(*info[path], unit, status)
+                                unit_done(path)
+                            else:
+                                finish(path, status)
+                            continue
+                        emails, urls, extracted_files, _ = result
+                        for name in report_names(path):
+                            queue.put((emails, urls, name))
+                        if unit:
+                            journal.record(*info[path], unit)
+                            unit_done(path)
+                        elif extracted_files:
+                            expand(path, extracted_files)
+                        else:
+                            finish(path)
+                    except Exception as e:
+                        print(f"[ERROR]: {e}")
+                    finally:
+                        pbar.update(1)
+                        feed()
+
+            try:
+                feed()
+                drain()
+                while not groups.done:
+                    # Every settled file is done and the rest is still being hashed
+                    groups.wait()
+                    feed()
+                    drain()
+            finally:
+                groups.close()
+            if file_watcher:
+                # Workers, the writer and its dedup sets stay up; each batch of new files goes through the same pool
+                print(f"\nWatching {folder} for new or changed files ({file_watcher.mode}); press Ctrl+C to stop")
+                try:
+                    for batch in file_watcher.batches():
+                        for f in batch:
+                            submit(f)
+                        pbar.total += len(batch)
+                        drain()
+                except KeyboardInterrupt:
+                    print("Stopped watching.")
                 finally:
-                    pbar.update(1)
+                    file_watcher.close()
+            quarantined = pool.quarantined
         queue.put('DONE')
         writer_thread.join()
 
         print("\nSummary:")
         print(f"Total files processed: {len(processed_files)}")
+        if quarantined:
+            print(f"Quarantined files: {len(quarantined)}" + (f" (see {quarantine_file})" if quarantine_file else ""))
         print(f"Results written instantly. Check '{email_out}' and '{url_out}'.")
     finally:
+        journal.close()
         shutil.rmtree(temp_dir, ignore_errors=True)
 
 if __name__ == '__main__':
@@ -248,6 +681,17 @@ if __name__ == '__main__':
     parser.add_argument('-d', '--disposable', default='disposable_domains.txt', help='Disposable domains file')
     parser.add_argument('-f', '--forbidden', nargs='*', default=['user', 'test', 'demo', 'example', 'sample', 'dummy', 'temp', 'trial', 'no-reply', 'noreply'], help='Forbidden words in emails')
     parser.add_argument('-p', '--processes', type=int, default=4, help='Number of processes to use')
+    parser.add_argument('-t', '--timeout', type=float, default=None, help='Per-file wall-time limit in seconds (worker is recycled on breach)')
+    parser.add_argument('-m', '--max-memory', type=int, default=None, help='Per-worker memory cap in MB (worker is recycled on breach)')
+    parser.add_argument('-q', '--quarantine', default='quarantine.jsonl', help='File listing files that hit a limit or crashed a worker')
+    parser.add_argument('-w', '--watch', action='store_true', help='Keep running and extract from new or changed files as they land')
+    parser.add_argument('--debounce', type=float, default=2.0, help='Seconds a file must stay unchanged before it is picked up in watch mode')
+    parser.add_argument('--provenance', default=None, help='CSV listing every file each email/URL was found in, with handler and byte offset in the file')
+    parser.add_argument('--ocr-cache', default=None, help='SQLite file caching OCR text by image content, so repeated images are OCRed once')
+    parser.add_argument('--ocr-cache-mb', type=int, default=ocr.OCR_CACHE_BYTES // (1024 * 1024), help='Size limit of the OCR cache; least recently used entries are dropped')
     args = parser.parse_args()
 
-    main(args.folder, args.output, args.url_output, args.csv_output, args.blocklist, args.disposable, args.forbidden, num_processes=args.processes)
+    main(args.folder, args.output, args.url_output, args.csv_output, args.blocklist, args.disposable, args.forbidden,
+         num_processes=args.processes, timeout=args.timeout, max_memory_mb=args.max_memory, quarantine_file=args.quarantine,
+         watch=args.watch, debounce=args.debounce, ocr_cache=args.ocr_cache, ocr_cache_bytes=args.ocr_cache_mb * 1024 * 1024,
+         provenance_file=args.provenance)
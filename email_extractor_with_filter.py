@@ -1,29 +1,24 @@
 import os
-import re
 import argparse
 import logging
 import zipfile
 import tarfile
 import sqlite3
 import pdfplumber
-import pytesseract
 from PIL import Image
-import docx
-import openpyxl
 import xlrd
 import pandas as pd
-import filetype
 import chardet
 from striprtf.striprtf import rtf_to_text
-from odf import text, teletype
-from odf.opendocument import load as odf_load
 import extract_msg
 from tqdm import tqdm
-import string
-
-FORBIDDEN_WORDS = [
-    'user', 'users', 'test', 'example', 'demo', 'sample', 'dummy', 'temp', 'trial', 'no-reply', 'noreply'
-]
+from email_filter import get_email_filter
+import sniff
+import xml_stream
+import pdf_fast
+import ocr
+import normalize
+from mailbox_reader import MessageCollector, iter_mbox
 
 def setup_logger(logfile):
     logging.basicConfig(
@@ -42,28 +37,7 @@ def load_disposable_domains(filepath='disposable_domains.txt'):
     return disposable_domains
 
 def extract_emails_from_text(text, disposable_domains):
-    email_regex = r'\b[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}\b'
-    all_matches = set(re.findall(email_regex, text or ""))
-
-    file_exts = [
-        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp', '.ico',
-        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar'
-    ]
-    filtered = set()
-    for email in all_matches:
-        email_clean = email.strip().strip(string.punctuation)
-        local, _, domain = email_clean.lower().partition('@')
-        if any(domain.endswith(ext) for ext in file_exts):
-            continue
-        if re.search(r'@\d', email_clean):
-            continue
-        if any(word in local or word in domain for word in FORBIDDEN_WORDS):
-            continue
-        domain_only = domain.split(':')[0].split('/')[0]
-        if domain_only in disposable_domains:
-            continue
-        filtered.add(email_clean)
-    return filtered
+    return get_email_filter(disposable_domains).extract(text)
 
 def read_text_file(file_path, disposable_domains):
     with open(file_path, 'rb') as f:
@@ -103,27 +77,20 @@ def read_xls_file(file_path, disposable_domains):
         logging.error(f"XLS processing failed for {file_path}: {e}")
         return set()
 
-def read_xlsx_file(file_path, disposable_domains):
-    emails = set()
+def read_package_strings(file_path, strings, label, disposable_domains):
+    collector = MessageCollector(lambda t: extract_emails_from_text(t, disposable_domains))
     try:
-        wb = openpyxl.load_workbook(file_path, read_only=True)
-        for ws in wb.worksheets:
-            for row in ws.iter_rows(values_only=True):
-                for cell in row:
-                    if isinstance(cell, str):
-                        emails.update(extract_emails_from_text(cell, disposable_domains))
+        for value in strings(file_path):
+            collector.add_text(value)
     except Exception as e:
-        logging.error(f"XLSX processing failed for {file_path}: {e}")
-    return emails
+        logging.error(f"{label} processing failed for {file_path}: {e}")
+    return collector.result()[0]
+
+def read_xlsx_file(file_path, disposable_domains):
+    return read_package_strings(file_path, xml_stream.xlsx_strings, 'XLSX', disposable_domains)
 
 def read_docx_file(file_path, disposable_domains):
-    try:
-        doc = docx.Document(file_path)
-        text = '\n'.join([para.text for para in doc.paragraphs])
-        return extract_emails_from_text(text, disposable_domains)
-    except Exception as e:
-        logging.error(f"DOCX processing failed for {file_path}: {e}")
-        return set()
+    return read_package_strings(file_path, xml_stream.ooxml_strings, 'DOCX', disposable_domains)
 
 def read_doc_file(file_path, disposable_domains):
     try:
@@ -145,16 +112,9 @@ def read_rtf_file(file_path, disposable_domains):
         return set()
 
 def read_odt_file(file_path, disposable_domains):
-    try:
-        odt = odf_load(file_path)
-        texts = odt.getElementsByType(text.P)
-        all_text = '\n'.join([teletype.extractText(t) for t in texts])
-        return extract_emails_from_text(all_text, disposable_domains)
-    except Exception as e:
-        logging.error(f"ODT processing failed for {file_path}: {e}")
-        return set()
+    return read_package_strings(file_path, xml_stream.odf_strings, 'ODT', disposable_domains)
 
-def read_pdf_file(file_path, disposable_domains):
+def read_pdf_file_layout(file_path, disposable_domains):
     emails = set()
     try:
         with pdfplumber.open(file_path) as pdf:
@@ -164,14 +124,32 @@ def read_pdf_file(file_path, disposable_domains):
                     emails.update(extract_emails_from_text(text, disposable_domains))
                 else:
                     img = page.to_image(resolution=300)
-                    text = pytesseract.image_to_string(img.original)
+                    text = ocr.image_to_string(img.original)
                     emails.update(extract_emails_from_text(text, disposable_domains))
     except Exception as e:
         logging.error(f"PDF processing failed for {file_path}: {e}")
     return emails
+
+def read_pdf_file(file_path, disposable_domains):
+    # Raw text runs and link URIs through pdfium; pdfplumber's layout analysis only when pdfium is unavailable
+    try:
+        pdf_fast.page_count(file_path)
+    except ImportError:
+        return read_pdf_file_layout(file_path, disposable_domains)
+    except Exception as e:
+        logging.warning(f"pdfium could not open {file_path} ({e}), falling back to pdfplumber")
+        return read_pdf_file_layout(file_path, disposable_domains)
+    collector = MessageCollector(lambda t: extract_emails_from_text(t, disposable_domains))
+    try:
+        for value in pdf_fast.page_strings(file_path, ocr=ocr.image_to_string):
+            collector.add_text(value)
+    except Exception as e:
+        logging.error(f"PDF processing failed for {file_path}: {e}")
+    return collector.result()[0]
+
 def read_image_file(file_path, disposable_domains):
     try:
-        text = pytesseract.image_to_string(Image.open(file_path))
+        text = ocr.image_to_string(Image.open(file_path))
         return extract_emails_from_text(text, disposable_domains)
     except Exception as e:
         logging.error(f"OCR failed for {file_path}: {e}")
@@ -209,18 +187,7 @@ def read_sql_file(file_path, disposable_domains):
     return read_text_file(file_path, disposable_domains)
 
 def read_pptx_file(file_path, disposable_domains):
-    try:
-        from pptx import Presentation
-        emails = set()
-        prs = Presentation(file_path)
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    emails.update(extract_emails_from_text(shape.text, disposable_domains))
-        return emails
-    except Exception as e:
-        logging.error(f"PPTX processing failed for {file_path}: {e}")
-        return set()
+    return read_package_strings(file_path, xml_stream.ooxml_strings, 'PPTX', disposable_domains)
 
 def read_ppt_file(file_path, disposable_domains):
     try:
@@ -261,6 +228,16 @@ def read_eml_file(file_path, disposable_domains):
         logging.error(f"EML processing failed for {file_path}: {e}")
         return set()
 
+def read_mbox_file(file_path, disposable_domains):
+    try:
+        collector = MessageCollector(lambda t: extract_emails_from_text(t, disposable_domains))
+        for raw in iter_mbox(file_path):
+            collector.add_message(raw)
+        return collector.result()[0]
+    except Exception as e:
+        logging.error(f"MBOX processing failed for {file_path}: {e}")
+        return set()
+
 def read_mdb_file(file_path, disposable_domains):
     logging.warning(f"MDB/ACCDB handler stub for {file_path}. Install pyodbc/msaccessdb for full support.")
     return set()
@@ -294,11 +271,22 @@ def is_compatible_file(file_path):
         '.pdf',
         '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif',
         '.sqlite', '.sqlite3', '.db', '.sql', '.mdb', '.accdb',
-        '.eml', '.msg',
+        '.eml', '.msg', '.mbox',
         '.zip', '.tar', '.gz', '.rar'
     ]
     return ext in compatible_exts
 
+SNIFFED_KINDS = (sniff.TEXT, sniff.RTF, sniff.PDF, sniff.IMAGE, sniff.SQLITE, sniff.MBOX, sniff.ZIP, sniff.GZIP, sniff.TAR)
+
+def is_scannable(file_path):
+    # Files with an unknown extension (none, .dat, .bin, ...) are kept when their content has a handler
+    if is_compatible_file(file_path):
+        return True
+    try:
+        return os.path.isfile(file_path) and sniff.kind_of(file_path) in SNIFFED_KINDS
+    except OSError:
+        return False
+
 def process_file(file_path, temp_dir, disposable_domains):
     ext = os.path.splitext(file_path)[1].lower()
     handlers = {
@@ -344,20 +332,33 @@ def process_file(file_path, temp_dir, disposable_domains):
         '.accdb': lambda f: read_mdb_file(f, disposable_domains),
         '.eml': lambda f: read_eml_file(f, disposable_domains),
         '.msg': lambda f: read_msg_file(f, disposable_domains),
+        '.mbox': lambda f: read_mbox_file(f, disposable_domains),
         '.zip': lambda f: read_archive(f, temp_dir, disposable_domains),
         '.tar': lambda f: read_archive(f, temp_dir, disposable_domains),
         '.gz': lambda f: read_archive(f, temp_dir, disposable_domains),
         '.rar': lambda f: read_archive(f, temp_dir, disposable_domains),
     }
-    if ext in handlers:
+    kind, trusted = sniff.route(file_path, cached=not file_path.startswith(temp_dir))
+    if trusted and ext in handlers:
         return handlers[ext](file_path)
-    kind = filetype.guess(file_path)
-    if kind and kind.mime.startswith('image'):
-        return read_image_file(file_path, disposable_domains)
-    try:
-        return read_text_file(file_path, disposable_domains)
-    except Exception:
-        return set()
+    content_handlers = {
+        sniff.TEXT: handlers['.txt'],
+        sniff.RTF: handlers['.rtf'],
+        sniff.PDF: handlers['.pdf'],
+        sniff.IMAGE: handlers['.png'],
+        sniff.SQLITE: handlers['.db'],
+        sniff.MBOX: handlers['.mbox'],
+        sniff.ZIP: handlers['.zip'],
+        sniff.GZIP: handlers['.gz'],
+        sniff.TAR: handlers['.tar'],
+    }
+    if kind in content_handlers:
+        try:
+            return content_handlers[kind](file_path)
+        except Exception:
+            return set()
+    logging.info(f"Skipping {file_path}: {kind} content has no handler")
+    return set()
 
 def scan_folder(folder, output_file, log_file, disposable_domains):
     setup_logger(log_file)
@@ -372,7 +373,7 @@ def scan_folder(folder, output_file, log_file, disposable_domains):
             path = os.path.join(root, file)
             file_list.append(path)
     total_files = len(file_list)
-    compatible_files = [f for f in file_list if is_compatible_file(f)]
+    compatible_files = [f for f in file_list if is_scannable(f)]
     total_compatible = len(compatible_files)
 
     print(f"Total files found: {total_files}")
@@ -384,34 +385,18 @@ def scan_folder(folder, output_file, log_file, disposable_domains):
         return
 
     found_files = 0
-    all_possible_emails = set()
-    forbidden_filtered = set()
-    disposable_filtered = set()
+    email_filter = get_email_filter(disposable_domains)
+    email_filter.reset_stats()
     exported_emails = set()
 
-    def classify_email(email):
-        local, _, domain = email.lower().partition('@')
-        if any(word in local or word in domain for word in FORBIDDEN_WORDS):
-            return 'forbidden'
-        domain_only = domain.split(':')[0].split('/')[0]
-        if domain_only in disposable_domains:
-            return 'disposable'
-        return 'valid'
-
     with open(output_file, 'a', buffering=1) as f_out, tqdm(total=total_compatible, desc="Extracting emails", ncols=80) as pbar:
         for idx, path in enumerate(compatible_files, 1):
             print(f"Processing file {idx}/{total_compatible}: {path}")
             logging.info(f"Processing file {idx}/{total_compatible}: {path}")
             try:
                 emails = process_file(path, temp_dir, disposable_domains)
-                for email in emails:
-                    all_possible_emails.add(email)
-                    category = classify_email(email)
-                    if category == 'forbidden':
-                        forbidden_filtered.add(email)
-                    elif category == 'disposable':
-                        disposable_filtered.add(email)
-                    elif email not in exported_emails:
+                for email in map(normalize.email_key, emails):
+                    if email not in exported_emails:
                         f_out.write(email + '\n')
                         f_out.flush()
                         exported_emails.add(email)
@@ -427,10 +412,13 @@ def scan_folder(folder, output_file, log_file, disposable_domains):
     import shutil
     shutil.rmtree(temp_dir, ignore_errors=True)
 
+    rejected = email_filter.rejected
+    all_possible_emails = exported_emails.union(*rejected.values())
     print("\n--- Extraction Summary ---")
     print(f"Total unique emails found (before filtering): {len(all_possible_emails)}")
-    print(f"Removed due to forbidden words: {len(forbidden_filtered)}")
-    print(f"Removed due to disposable domains: {len(disposable_filtered)}")
+    print(f"Removed due to forbidden words: {len(rejected.get('forbidden', ()))}")
+    print(f"Removed due to disposable domains: {len(rejected.get('disposable', ()))}")
+    print(f"Removed as file names or numeric domains: {len(rejected.get('file-ext', ())) + len(rejected.get('numeric', ()))}")
     print(f"Valid emails exported: {len(exported_emails)} (see {output_file})")
     print(f"Files with emails found: {found_files} / {total_compatible}")
 
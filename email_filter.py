@@ -0,0 +1,198 @@
+import re
+import string
+from itertools import repeat
+from operator import itemgetter
+import metrics
+import normalize
+
+FORBIDDEN_WORDS = [
+    'user', 'users', 'test', 'example', 'demo', 'sample', 'dummy', 'temp', 'trial', 'no-reply', 'noreply'
+]
+
+FILE_EXTS = [
+    '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp', '.ico',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar'
+]
+
+EMAIL_REGEX = re.compile(r'\b[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}\b')
+URL_START_REGEX = re.compile(r'https?://')
+URL_CUT_REGEX = re.compile(r'[\s"\'<>{}$$$$$$]')
+NUMERIC_DOMAIN_REGEX = re.compile(r'@\d')
+
+VALID = 'valid'
+FILE_EXT = 'file-ext'
+NUMERIC = 'numeric'
+FORBIDDEN = 'forbidden'
+DISPOSABLE = 'disposable'
+BLOCKED = 'blocked'
+
+# Below this many candidates the per-email rules are cheaper than building the joined buffer
+BATCH_MIN_SIZE = 64
+
+
+class EmailFilter:
+    def __init__(self, disposable_domains, forbidden_words=FORBIDDEN_WORDS, file_exts=FILE_EXTS):
+        self.disposable_domains = disposable_domains if isinstance(disposable_domains, (set, frozenset)) else set(disposable_domains)
+        self.file_exts = tuple(file_exts)
+        # Candidates are lowercased before matching, so the words are too, once, for both the scalar and batch rules
+        self.forbidden_words = [w.lower() for w in forbidden_words]
+        self.forbidden_regex = re.compile('|'.join(re.escape(w) for w in self.forbidden_words)) if forbidden_words else None
+        # Forbidden words spanning the '@' or a line break would break the per-line mapping in classify_batch
+        self.batch_safe = not any('@' in w or '\n' in w for w in forbidden_words)
+        self.rejected = {}
+
+    def classify_one(self, email):
+        local, _, domain = email.lower().partition('@')
+        if domain.endswith(self.file_exts):
+            return FILE_EXT
+        if NUMERIC_DOMAIN_REGEX.search(email):
+            return NUMERIC
+        if self.forbidden_regex and (self.forbidden_regex.search(local) or self.forbidden_regex.search(domain)):
+            return FORBIDDEN
+        if domain.split(':')[0].split('/')[0] in self.disposable_domains:
+            return DISPOSABLE
+        return VALID
+
+    def classify_domain(self, domain):
+        # Every rule except forbidden words in the local part depends on the domain alone
+        if domain.endswith(self.file_exts):
+            return FILE_EXT
+        if NUMERIC_DOMAIN_REGEX.search('@' + domain):
+            return NUMERIC
+        if self.forbidden_regex and self.forbidden_regex.search(domain):
+            return FORBIDDEN
+        if domain.split(':')[0].split('/')[0] in self.disposable_domains:
+            return DISPOSABLE
+        return VALID
+
+    def classify_batch(self, candidates):
+        candidates = list(candidates)
+        if len(candidates) < BATCH_MIN_SIZE:
+            return [self.classify_one(c) for c in candidates]
+        lower = '\n'.join(candidates).lower()
+        lines = lower.split('\n')
+        if not self.batch_safe or len(lines) != len(candidates):
+            return [self.classify_one(c) for c in candidates]
+        domains = list(map(itemgetter(2), map(str.partition, lines, repeat('@'))))
+        domain_verdicts = {d: self.classify_domain(d) for d in set(domains)}
+        verdicts = list(map(domain_verdicts.__getitem__, domains))
+        # Lines holding a forbidden word anywhere are settled by the scalar rules
+        flagged = set()
+        for word in self.forbidden_words:
+            pos = lower.find(word)
+            while pos != -1:
+                flagged.add(pos)
+                pos = lower.find(word, pos + 1)
+        line = prev = 0
+        for pos in sorted(flagged):
+            line += lower.count('\n', prev, pos)
+            prev = pos
+            if verdicts[line] not in (FILE_EXT, NUMERIC):
+                verdicts[line] = self.classify_one(candidates[line])
+        return verdicts
+
+    def classify(self, emails):
+        emails = list(emails)
+        return dict(zip(emails, self.classify_batch(emails)))
+
+    def extract(self, text):
+        with metrics.stage('extract'):
+            candidates = {m.strip().strip(string.punctuation) for m in EMAIL_REGEX.findall(text or "")}
+        with metrics.stage('filter'):
+            verdicts = self.classify(candidates)
+        filtered = set()
+        for email, verdict in verdicts.items():
+            if verdict == VALID:
+                filtered.add(email)
+            else:
+                self.rejected.setdefault(verdict, set()).add(email)
+        return filtered
+
+    def reset_stats(self):
+        self.rejected = {}
+
+
+class UrlFilter:
+    def __init__(self, blocked_domains):
+        self.blocked_domains = blocked_domains
+        self.block_substrings = set()
+        for domain in blocked_domains:
+            d = domain.lower().strip().lstrip('*.')
+            if not d or d.startswith('#'):
+                continue
+            self.block_substrings.add(d)
+        self.block_lengths = sorted({len(d) for d in self.block_substrings})
+        self.rejected = {}
+
+    def is_blocked(self, domain):
+        domain = normalize.host_key(domain)
+        # Probe every substring of the host whose length matches some blocklist entry
+        n = len(domain)
+        for size in self.block_lengths:
+            if size > n:
+                break
+            for i in range(n - size + 1):
+                if domain[i:i + size] in self.block_substrings:
+                    return True
+        return False
+
+    def candidates(self, text):
+        return (url for _, url in url_candidates(text))
+
+    def classify_one(self, url):
+        domain = normalize.url_host(url)
+        if not domain or self.is_blocked(domain):
+            return BLOCKED
+        return VALID
+
+    def extract(self, text):
+        with metrics.stage('extract'):
+            candidates = set(self.candidates(text or ""))
+        filtered = set()
+        with metrics.stage('filter'):
+            for url in candidates:
+                if self.classify_one(url) == VALID:
+                    filtered.add(url)
+                else:
+                    self.rejected.setdefault(BLOCKED, set()).add(url)
+        return filtered
+
+    def reset_stats(self):
+        self.rejected = {}
+
+
+def url_candidates(text):
+    # (start, url) for every URL candidate in text
+    starts = [m.start() for m in URL_START_REGEX.finditer(text)]
+    for i, start in enumerate(starts):
+        end = starts[i + 1] if i + 1 < len(starts) else len(text)
+        url = URL_CUT_REGEX.split(text[start:end], 1)[0]
+        yield start, url.rstrip('.,;:)}]>\'"')
+
+def first_offsets(text):
+    # Email or URL candidate -> position of its first match in text, from the same scans extract() runs
+    offsets = {}
+    for m in EMAIL_REGEX.finditer(text):
+        email = m.group().strip().strip(string.punctuation)
+        if email not in offsets:
+            offsets[email] = m.start() + m.group().find(email)
+    for start, url in url_candidates(text):
+        offsets.setdefault(url, start)
+    return offsets
+
+
+_filters = {}
+
+def _cached(cls, key):
+    # Keyed by identity: the scripts load each list once and pass the same set everywhere
+    entry = _filters.get((cls, id(key)))
+    if entry is None or entry[0] is not key:
+        entry = (key, cls(key))
+        _filters[(cls, id(key))] = entry
+    return entry[1]
+
+def get_email_filter(disposable_domains):
+    return _cached(EmailFilter, disposable_domains)
+
+def get_url_filter(blocked_domains):
+    return _cached(UrlFilter, blocked_domains)
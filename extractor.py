@@ -1,30 +1,40 @@
 import os
 import re
+import mmap
+import stat
+import codecs
+import shutil
+import tempfile
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import argparse
 import logging
 import zipfile
 import tarfile
 import sqlite3
 import pdfplumber
-import pytesseract
 from PIL import Image
-import docx
-import openpyxl
 import xlrd
 import pandas as pd
-import filetype
 import chardet
 from striprtf.striprtf import rtf_to_text
-from odf import text, teletype
-from odf.opendocument import load as odf_load
 import extract_msg
 from tqdm import tqdm
-import string
-from urllib.parse import urlparse
-
-FORBIDDEN_WORDS = [
-    'user', 'users', 'test', 'example', 'demo', 'sample', 'dummy', 'temp', 'trial', 'no-reply', 'noreply'
-]
+from email_filter import get_email_filter, get_url_filter, first_offsets
+import metrics
+import sniff
+import mailbox_reader
+import fingerprint
+import watcher
+import prefetch
+import xml_stream
+import pdf_fast
+import ocr
+import normalize
+import provenance
+import planner
+from sandbox import SandboxPool, check_archive_size, OK
 
 def setup_logger(logfile):
     logging.basicConfig(
@@ -52,89 +62,148 @@ def load_blocked_domains(filepath='blocked_domains.txt'):
     return blocked_domains
 
 def extract_emails_from_text(text, disposable_domains):
-    email_regex = r'\b[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z]{2,}\b'
-    all_matches = set(re.findall(email_regex, text or ""))
-
-    file_exts = [
-        '.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.svg', '.webp', '.ico',
-        '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.zip', '.rar'
-    ]
-    filtered = set()
-    for email in all_matches:
-        email_clean = email.strip().strip(string.punctuation)
-        local, _, domain = email_clean.lower().partition('@')
-        if any(domain.endswith(ext) for ext in file_exts):
-            continue
-        if re.search(r'@\d', email_clean):
-            continue
-        if any(word in local or word in domain for word in FORBIDDEN_WORDS):
-            continue
-        domain_only = domain.split(':')[0].split('/')[0]
-        if domain_only in disposable_domains:
-            continue
-        filtered.add(email_clean)
-    return filtered
+    return get_email_filter(disposable_domains).extract(text)
 
 def extract_urls_from_text(text, blocked_domains):
-    # Find all start indices for http(s)://
-    starts = [m.start() for m in re.finditer(r'https?://', text)]
-    candidates = []
-    for i, start in enumerate(starts):
-        end = starts[i + 1] if i + 1 < len(starts) else len(text)
-        url = text[start:end]
-        # Cut off at first whitespace or control character
-        url = re.split(r'[\s"\'<>{}$$$$$$]', url)[0]
-        # Remove trailing punctuation
-        url = url.rstrip('.,;:)}]>\'"')
-        candidates.append(url)
-
-    # Prepare blocklist substrings (as before)
-    block_substrings = set()
-    for domain in blocked_domains:
-        d = domain.lower().strip()
-        d = d.lstrip('*.')
-        if not d or d.startswith('#'):
-            continue
-        block_substrings.add(d)
-
-    def is_blocked(domain):
-        domain = domain.lower().lstrip('www.')
-        for block in block_substrings:
-            if block in domain:
-                return True
+    return get_url_filter(blocked_domains).extract(text)
+
+# Plain-text files at least this large are scanned through mmap instead of being decoded whole
+MMAP_MIN_BYTES = 1024 * 1024
+UTF8_SAMPLE_BYTES = 64 * 1024
+WHITESPACE = re.compile(rb'\s')
+LAST_WHITESPACE = re.compile(rb'.*\s')
+
+def looks_utf8(file_path):
+    sample = prefetch.read_head(file_path, UTF8_SAMPLE_BYTES)
+    try:
+        # Incremental so a multi-byte character cut off at the end of the sample is not an error
+        codecs.getincrementaldecoder('utf-8')().decode(sample, final=False)
+        return True
+    except UnicodeDecodeError:
         return False
 
-    filtered = set()
-    for url in candidates:
-        try:
-            parsed = urlparse(url)
-            domain = parsed.netloc.lower().lstrip('www.')
-            if not domain or is_blocked(domain):
-                continue
-            filtered.add(url)
-        except Exception:
-            continue
-    return filtered
+def token_spans(buf, needle):
+    # Emails and URLs never contain ASCII whitespace, so every match lies inside one of these tokens.
+    # find/rfind run at memchr speed on the mapped buffer; only the tokens themselves are copied.
+    lo = 0
+    pos = buf.find(needle)
+    while pos != -1:
+        line_start = max(lo, buf.rfind(b'\n', lo, pos) + 1)
+        m = LAST_WHITESPACE.match(buf, line_start, pos)
+        start = m.end() if m else line_start
+        m = WHITESPACE.search(buf, pos)
+        end = m.start() if m else len(buf)
+        yield start, buf[start:end]
+        lo = end
+        pos = buf.find(needle, end)
+
+def tokens_containing(buf, needle):
+    for _, token in token_spans(buf, needle):
+        yield token
+
+@contextlib.contextmanager
+def map_file(file_path):
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        yield mm
+
+def read_text_file_mmap(file_path, disposable_domains):
+    # Returns None when the bytes past the sampled head are not UTF-8 after all, so the caller decodes the whole file
+    with metrics.stage('scan'):
+        data = prefetch.buffered(file_path)
+        with (contextlib.nullcontext(data) if data is not None else map_file(file_path)) as buf:
+            if buf.find(b'\x00') != -1:
+                # A UTF-16 section: its NUL bytes split every address apart in the byte scan
+                return None
+            try:
+                email_text = '\n'.join(t.decode('utf-8') for t in tokens_containing(buf, b'@'))
+                url_text = '\n'.join(t.decode('utf-8') for t in tokens_containing(buf, b'http'))
+            except UnicodeDecodeError:
+                # e.g. a Latin-1 tail, which the full decode reads with LATIN1_FALLBACK
+                return None
+    # Only URL-bearing tokens are returned as text, which is all URL extraction looks at
+    return extract_emails_from_text(email_text, disposable_domains), url_text
+
+# Decode error handler for text files that mix encodings, typically a Latin-1 section in a UTF-8 file. The bytes the
+# detected encoding rejects are read as Latin-1 instead of being dropped, which would turn josé@ into jos@.
+LATIN1_FALLBACK = 'latin1_fallback'
+codecs.register_error(LATIN1_FALLBACK, lambda error: (error.object[error.start:error.end].decode('latin-1'), error.end))
+
+# Extensions process_file sends straight to read_text_file
+PLAIN_TEXT_EXTS = (
+    '.txt', '.log', '.ini', '.inf', '.html', '.htm', '.asp', '.aspx', '.php', '.js', '.json', '.xml', '.yaml', '.yml', '.md', '.sql'
+)
+# Handlers that read the file's own bytes as text, so their matches can be traced back to a byte offset in it.
+# The CSV reader reformats cells, but their values stay verbatim in the file.
+OFFSET_EXTS = PLAIN_TEXT_EXTS + ('.csv', '.eml', '.mbox')
+
+def has_source_offsets(file_path):
+    if not os.path.isfile(file_path) or not os.path.getsize(file_path):
+        return False
+    kind, trusted = sniff.route(file_path)
+    if trusted:
+        return os.path.splitext(file_path)[1].lower() in OFFSET_EXTS
+    return kind in (sniff.TEXT, sniff.MBOX)
+
+def source_offsets(file_path):
+    # Email or URL -> byte offset of its first match in the file. Matches that only exist after decoding
+    # (quoted-printable or base64 mail parts, attachments) are not in the file's bytes and get no offset.
+    utf16 = sniff.utf16_encoding(prefetch.read_head(file_path, sniff.SNIFF_BYTES))
+    if utf16:
+        return utf16_offsets(file_path, utf16)
+    offsets = {}
+    data = prefetch.buffered(file_path)
+    with (contextlib.nullcontext(data) if data is not None else map_file(file_path)) as buf:
+        for needle in (b'@', b'http'):
+            for start, token in token_spans(buf, needle):
+                # Undecodable bytes become lone surrogates, so the token encodes back to exactly its own bytes
+                text = token.decode('utf-8', errors='surrogateescape')
+                for entity, pos in first_offsets(text).items():
+                    offset = start + len(text[:pos].encode('utf-8', errors='surrogateescape'))
+                    if offset < offsets.get(entity, offset + 1):
+                        offsets[entity] = offset
+    return offsets
+
+def utf16_offsets(file_path, encoding):
+    try:
+        text = prefetch.read_bytes(file_path).decode(encoding)
+    except UnicodeDecodeError:
+        return {}
+    # Each stretch between hits is encoded once to turn character positions into byte positions
+    encoder = codecs.getincrementalencoder(encoding)()
+    located = first_offsets(text)
+    positions = {}
+    done = size = 0
+    for pos in sorted(set(located.values())):
+        size += len(encoder.encode(text[done:pos]))
+        positions[pos] = size
+        done = pos
+    return {entity: positions[pos] for entity, pos in located.items()}
 
 def read_text_file(file_path, disposable_domains):
-    with open(file_path, 'rb') as f:
-        raw = f.read()
-    enc = chardet.detect(raw)['encoding'] or 'utf-8'
-    try:
-        text = raw.decode(enc, errors='ignore')
-    except Exception:
-        text = raw.decode('utf-8', errors='ignore')
+    # ASCII-range UTF-16 is valid UTF-8 too, but its NUL bytes split every address apart in the byte scan
+    utf16 = sniff.utf16_encoding(prefetch.read_head(file_path, sniff.SNIFF_BYTES))
+    if not utf16 and os.path.getsize(file_path) >= MMAP_MIN_BYTES and looks_utf8(file_path):
+        found = read_text_file_mmap(file_path, disposable_domains)
+        if found is not None:
+            return found
+    with metrics.stage('read'):
+        raw = prefetch.read_bytes(file_path)
+    with metrics.stage('decode'):
+        enc = utf16 or chardet.detect(raw)['encoding'] or 'utf-8'
+        try:
+            text = raw.decode(enc, errors=LATIN1_FALLBACK)
+        except Exception:
+            text = raw.decode('utf-8', errors=LATIN1_FALLBACK)
     return extract_emails_from_text(text, disposable_domains), text
 
 def read_csv_file(file_path, disposable_domains):
     try:
         try:
-            df = pd.read_csv(file_path, dtype=str, encoding='utf-8')
+            df = pd.read_csv(prefetch.source(file_path), dtype=str, encoding='utf-8')
         except UnicodeDecodeError:
-            with open(file_path, 'rb') as f:
-                raw = f.read()
+            raw = prefetch.read_bytes(file_path)
             enc = chardet.detect(raw)['encoding'] or 'utf-8'
-            df = pd.read_csv(file_path, dtype=str, encoding=enc)
+            df = pd.read_csv(prefetch.source(file_path), dtype=str, encoding=enc)
         text = df.to_string()
         return extract_emails_from_text(text, disposable_domains), text
     except Exception as e:
@@ -157,29 +226,22 @@ def read_xls_file(file_path, disposable_domains):
         logging.error(f"XLS processing failed for {file_path}: {e}")
         return set(), ""
 
-def read_xlsx_file(file_path, disposable_domains):
-    emails = set()
-    text = ""
+def read_package_strings(file_path, strings, label, disposable_domains):
+    # Strings come straight from the package XML; one regex pass per batch instead of one per cell or paragraph
+    collector = mailbox_reader.MessageCollector(lambda t: extract_emails_from_text(t, disposable_domains))
     try:
-        wb = openpyxl.load_workbook(file_path, read_only=True)
-        for ws in wb.worksheets:
-            for row in ws.iter_rows(values_only=True):
-                for cell in row:
-                    if isinstance(cell, str):
-                        emails.update(extract_emails_from_text(cell, disposable_domains))
-                        text += cell + "\n"
+        for value in strings(prefetch.source(file_path)):
+            collector.add_text(value)
     except Exception as e:
-        logging.error(f"XLSX processing failed for {file_path}: {e}")
-    return emails, text
+        logging.error(f"{label} processing failed for {file_path}: {e}")
+    return collector.result()
+
+def read_xlsx_file(file_path, disposable_domains):
+    return read_package_strings(file_path, xml_stream.xlsx_strings, 'XLSX', disposable_domains)
 
 def read_docx_file(file_path, disposable_domains):
-    try:
-        doc = docx.Document(file_path)
-        text = '\n'.join([para.text for para in doc.paragraphs])
-        return extract_emails_from_text(text, disposable_domains), text
-    except Exception as e:
-        logging.error(f"DOCX processing failed for {file_path}: {e}")
-        return set(), ""
+    # Body, tables, headers, footers, notes, comments and hyperlink targets
+    return read_package_strings(file_path, xml_stream.ooxml_strings, 'DOCX', disposable_domains)
 
 def read_doc_file(file_path, disposable_domains):
     try:
@@ -192,8 +254,7 @@ def read_doc_file(file_path, disposable_domains):
 
 def read_rtf_file(file_path, disposable_domains):
     try:
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            rtf = f.read()
+        rtf = prefetch.read_text(file_path)
         text = rtf_to_text(rtf)
         return extract_emails_from_text(text, disposable_domains), text
     except Exception as e:
@@ -201,37 +262,108 @@ def read_rtf_file(file_path, disposable_domains):
         return set(), ""
 
 def read_odt_file(file_path, disposable_domains):
-    try:
-        odt = odf_load(file_path)
-        texts = odt.getElementsByType(text.P)
-        all_text = '\n'.join([teletype.extractText(t) for t in texts])
-        return extract_emails_from_text(all_text, disposable_domains), all_text
-    except Exception as e:
-        logging.error(f"ODT processing failed for {file_path}: {e}")
-        return set(), ""
+    return read_package_strings(file_path, xml_stream.odf_strings, 'ODT', disposable_domains)
 
-def read_pdf_file(file_path, disposable_domains):
+def read_pdf_file_layout(file_path, disposable_domains):
     emails = set()
     text = ""
     try:
-        with pdfplumber.open(file_path) as pdf:
+        with pdfplumber.open(prefetch.source(file_path)) as pdf:
             for page in pdf.pages:
                 t = page.extract_text()
                 if t:
                     emails.update(extract_emails_from_text(t, disposable_domains))
                     text += t + "\n"
                 else:
-                    img = page.to_image(resolution=300)
-                    t = pytesseract.image_to_string(img.original)
+                    with metrics.stage('ocr'):
+                        img = page.to_image(resolution=300)
+                        t = ocr.image_to_string(img.original)
                     emails.update(extract_emails_from_text(t, disposable_domains))
                     text += t + "\n"
     except Exception as e:
         logging.error(f"PDF processing failed for {file_path}: {e}")
     return emails, text
 
+def ocr_pdf_pages(file_path, indices):
+    # Rendered in memory and OCRed as one batch, so a list-file tesseract run covers several pages
+    with metrics.stage('ocr'):
+        return ocr.images_to_strings(pdf_fast.render_pages(file_path, indices))
+
+# Scanned pages are OCRed across processes once a document has this many, at least PDF_OCR_CHUNK pages per task
+PDF_OCR_PARALLEL = 4
+PDF_OCR_CHUNK = 2
+# Images per tesseract run when tesserocr is missing: scanned pages of one PDF, or upcoming image files
+OCR_BATCH = 16
+_pdf_args = None
+
+def _ocr_pdf_pages(indices):
+    metrics.take_stages()
+    values = ocr_pdf_pages(_pdf_args, indices)
+    return values, metrics.take_stages()
+
+def read_pdf_file(file_path, disposable_domains, processes=None):
+    global _pdf_args
+    try:
+        pdf_fast.page_count(file_path)
+    except ImportError:
+        return read_pdf_file_layout(file_path, disposable_domains)
+    except Exception as e:
+        # pdfium refuses some damaged files that pdfminer still reads
+        logging.warning(f"pdfium could not open {file_path} ({e}), falling back to pdfplumber")
+        return read_pdf_file_layout(file_path, disposable_domains)
+    collector = mailbox_reader.MessageCollector(lambda t: extract_emails_from_text(t, disposable_domains))
+    try:
+        # The text layer is cheap to read, so only the scanned pages are worth spreading out
+        scanned = []
+        for value in pdf_fast.page_strings(file_path, scanned=scanned):
+            collector.add_text(value)
+        processes = processes or os.cpu_count() or 1
+        if (processes <= 1 or len(scanned) < PDF_OCR_PARALLEL or multiprocessing.current_process().daemon
+                or 'fork' not in multiprocessing.get_all_start_methods()):
+            for chunk in [scanned[i:i + OCR_BATCH] for i in range(0, len(scanned), OCR_BATCH)]:
+                for value in ocr_pdf_pages(file_path, chunk):
+                    collector.add_text(value)
+        else:
+            # Spread over every process, but with as many pages per tesseract run as that leaves
+            size = min(OCR_BATCH, max(PDF_OCR_CHUNK, -(-len(scanned) // processes)))
+            chunks = [scanned[i:i + size] for i in range(0, len(scanned), size)]
+            _pdf_args = file_path
+            with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('fork')) as executor:
+                for values, stages in executor.map(_ocr_pdf_pages, chunks):
+                    metrics.merge_stages(stages)
+                    for value in values:
+                        collector.add_text(value)
+    except Exception as e:
+        logging.error(f"PDF processing failed for {file_path}: {e}")
+    return collector.result()
+
+IMAGE_EXTS = ('.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif')
+# Texts of image files OCRed ahead of the scan by ocr_images_ahead, taken by read_image_file
+_ocr_ahead = {}
+
+def ocr_images_ahead(paths):
+    # Without tesserocr every image file would start its own tesseract; one list-file run covers several
+    images = []
+    names = []
+    for path in paths:
+        try:
+            images.append(Image.open(prefetch.source(path)))
+            names.append(path)
+        except Exception:
+            pass
+    try:
+        with metrics.stage('ocr'):
+            _ocr_ahead.update(zip(names, ocr.images_to_strings(images)))
+    except Exception as e:
+        # Each file is tried again on its own and reports its own error
+        logging.warning(f"Batched OCR of {len(names)} images failed: {e}")
+
 def read_image_file(file_path, disposable_domains):
     try:
-        text = pytesseract.image_to_string(Image.open(file_path))
+        text = _ocr_ahead.pop(file_path, None)
+        if text is None:
+            with metrics.stage('ocr'):
+                text = ocr.image_to_string(Image.open(prefetch.source(file_path)))
         return extract_emails_from_text(text, disposable_domains), text
     except Exception as e:
         logging.error(f"OCR failed for {file_path}: {e}")
@@ -271,20 +403,7 @@ def read_sql_file(file_path, disposable_domains):
     return read_text_file(file_path, disposable_domains)
 
 def read_pptx_file(file_path, disposable_domains):
-    try:
-        from pptx import Presentation
-        emails = set()
-        text = ""
-        prs = Presentation(file_path)
-        for slide in prs.slides:
-            for shape in slide.shapes:
-                if hasattr(shape, "text"):
-                    emails.update(extract_emails_from_text(shape.text, disposable_domains))
-                    text += shape.text + "\n"
-        return emails, text
-    except Exception as e:
-        logging.error(f"PPTX processing failed for {file_path}: {e}")
-        return set(), ""
+    return read_package_strings(file_path, xml_stream.ooxml_strings, 'PPTX', disposable_domains)
 
 def read_ppt_file(file_path, disposable_domains):
     try:
@@ -303,29 +422,104 @@ def read_msg_file(file_path, disposable_domains):
         attachments = ""
         for att in msg.attachments:
             attachments += att.longFilename + " "
-        text = body + subj + attachments
+        # Sender and recipients are usually the densest source of addresses in a message
+        addresses = ' '.join(filter(None, [msg.sender, msg.to, msg.cc, msg.bcc]))
+        text = addresses + "\n" + body + subj + attachments
         return extract_emails_from_text(text, disposable_domains), text
     except Exception as e:
         logging.error(f"MSG processing failed for {file_path}: {e}")
         return set(), ""
 
-def read_eml_file(file_path, disposable_domains):
+def read_messages(raw_messages, temp_dir, disposable_domains):
+    collector = mailbox_reader.MessageCollector(lambda t: extract_emails_from_text(t, disposable_domains))
+    attachment_dir = tempfile.mkdtemp(dir=temp_dir)
+
+    def on_attachment(filename, part):
+        # Attachments are only decoded when some handler can make use of them
+        if is_compatible_file(filename):
+            fd, path = tempfile.mkstemp(suffix=os.path.splitext(filename)[1].lower(), dir=attachment_dir)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(part.get_payload(decode=True) or b'')
+            try:
+                collector.add_result(*process_file(path, temp_dir, disposable_domains))
+            finally:
+                os.remove(path)
+        elif part.get_content_maintype() == 'text':
+            collector.add_text(mailbox_reader.decode_part(part))
+
     try:
-        import email
-        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-            msg = email.message_from_file(f)
-        body = ""
-        if msg.is_multipart():
-            for part in msg.walk():
-                if part.get_content_type() == 'text/plain':
-                    body += part.get_payload(decode=True).decode('utf-8', errors='ignore')
-        else:
-            body = msg.get_payload(decode=True).decode('utf-8', errors='ignore')
-        return extract_emails_from_text(body, disposable_domains), body
+        for raw in raw_messages:
+            collector.add_message(raw, on_attachment)
+        return collector.result()
+    finally:
+        shutil.rmtree(attachment_dir, ignore_errors=True)
+
+def read_eml_file(file_path, temp_dir, disposable_domains):
+    try:
+        return read_messages(mailbox_reader.read_message_files([file_path]), temp_dir, disposable_domains)
     except Exception as e:
         logging.error(f"EML processing failed for {file_path}: {e}")
         return set(), ""
 
+def read_mbox_file(file_path, temp_dir, disposable_domains):
+    try:
+        return read_messages(mailbox_reader.iter_mbox(file_path), temp_dir, disposable_domains)
+    except Exception as e:
+        logging.error(f"MBOX processing failed for {file_path}: {e}")
+        return set(), ""
+
+def read_pst_file(file_path, disposable_domains):
+    try:
+        collector = mailbox_reader.MessageCollector(lambda t: extract_emails_from_text(t, disposable_domains))
+        for header_block, body in mailbox_reader.iter_pst(file_path):
+            collector.add_text(' '.join(mailbox_reader.header_addresses(header_block)))
+            collector.add_text(body)
+        return collector.result()
+    except ImportError:
+        logging.warning(f"PST/OST handler needs libpff-python (pypff) for {file_path}.")
+        return set(), ""
+    except Exception as e:
+        logging.error(f"PST processing failed for {file_path}: {e}")
+        return set(), ""
+
+# Message files handed to each Maildir worker at a time
+MAILDIR_CHUNK = 200
+_maildir_args = None
+
+def _read_maildir_chunk(paths):
+    temp_dir, disposable_domains = _maildir_args
+    email_filter = get_email_filter(disposable_domains)
+    email_filter.reset_stats()
+    metrics.take_stages()
+    emails, text = read_messages(mailbox_reader.read_message_files(paths), temp_dir, disposable_domains)
+    return emails, text, email_filter.rejected, metrics.take_stages()
+
+def read_maildir(path, temp_dir, disposable_domains, processes=None):
+    global _maildir_args
+    try:
+        messages = list(mailbox_reader.maildir_messages(path))
+        processes = processes or os.cpu_count() or 1
+        # Sandbox workers are daemonic and cannot start a pool of their own
+        if (processes <= 1 or len(messages) <= MAILDIR_CHUNK or multiprocessing.current_process().daemon
+                or 'fork' not in multiprocessing.get_all_start_methods()):
+            return read_messages(mailbox_reader.read_message_files(messages), temp_dir, disposable_domains)
+        _maildir_args = (temp_dir, disposable_domains)
+        email_filter = get_email_filter(disposable_domains)
+        emails = set()
+        texts = []
+        chunks = [messages[i:i + MAILDIR_CHUNK] for i in range(0, len(messages), MAILDIR_CHUNK)]
+        with ProcessPoolExecutor(max_workers=processes, mp_context=multiprocessing.get_context('fork')) as executor:
+            for e, t, rejected, stages in executor.map(_read_maildir_chunk, chunks):
+                metrics.merge_stages(stages)
+                emails.update(e)
+                texts.append(t)
+                for reason, items in rejected.items():
+                    email_filter.rejected.setdefault(reason, set()).update(items)
+        return emails, '\n'.join(texts)
+    except Exception as e:
+        logging.error(f"Maildir processing failed for {path}: {e}")
+        return set(), ""
+
 def read_mdb_file(file_path, disposable_domains):
     logging.warning(f"MDB/ACCDB handler stub for {file_path}. Install pyodbc/msaccessdb for full support.")
     return set(), ""
@@ -333,16 +527,20 @@ def read_mdb_file(file_path, disposable_domains):
 def read_archive(file_path, temp_dir, disposable_domains):
     emails = set()
     text = ""
+    # Each archive gets its own directory so nested archives never rescan their parent's members
+    archive_dir = tempfile.mkdtemp(dir=temp_dir)
     try:
         if zipfile.is_zipfile(file_path):
             with zipfile.ZipFile(file_path, 'r') as archive:
-                archive.extractall(temp_dir)
+                check_archive_size(archive, file_path)
+                archive.extractall(archive_dir)
         elif tarfile.is_tarfile(file_path):
             with tarfile.open(file_path, 'r:*') as archive:
-                archive.extractall(temp_dir)
+                check_archive_size(archive, file_path)
+                archive.extractall(archive_dir)
         else:
             return emails, text
-        for root, _, files in os.walk(temp_dir):
+        for root, _, files in os.walk(archive_dir):
             for file in files:
                 full_path = os.path.join(root, file)
                 e, t = process_file(full_path, temp_dir, disposable_domains)
@@ -350,6 +548,8 @@ def read_archive(file_path, temp_dir, disposable_domains):
                 text += t + "\n"
     except Exception as e:
         logging.error(f"Archive extraction failed for {file_path}: {e}")
+    finally:
+        shutil.rmtree(archive_dir, ignore_errors=True)
     return emails, text
 
 def is_compatible_file(file_path):
@@ -362,13 +562,44 @@ def is_compatible_file(file_path):
         '.pdf',
         '.jpg', '.jpeg', '.png', '.bmp', '.tiff', '.gif',
         '.sqlite', '.sqlite3', '.db', '.sql', '.mdb', '.accdb',
-        '.eml', '.msg',
+        '.eml', '.msg', '.mbox', '.pst', '.ost',
         '.zip', '.tar', '.gz', '.rar'
     ]
-    return ext in compatible_exts
+    if os.path.isdir(file_path):
+        return mailbox_reader.is_maildir(file_path)
+    return ext in compatible_exts or mailbox_reader.in_maildir(file_path)
+
+# Content kinds process_file can route a file to whatever its extension says
+SNIFFED_KINDS = (sniff.TEXT, sniff.RTF, sniff.PDF, sniff.IMAGE, sniff.SQLITE, sniff.MBOX, sniff.PST, sniff.ZIP,
+                 sniff.GZIP, sniff.TAR)
+
+def is_scannable(file_path):
+    # Files with an unknown extension (none, .dat, .bin, ...) are kept when their content has a handler
+    if is_compatible_file(file_path):
+        return True
+    try:
+        return os.path.isfile(file_path) and sniff.kind_of(file_path) in SNIFFED_KINDS
+    except OSError:
+        return False
+
+def is_plannable(file_path):
+    # Stat only, for --plan: files with an unknown extension are kept when non-empty and left to process_file to
+    # sniff if they are sampled, so the plan never reads the head of every file
+    if is_compatible_file(file_path):
+        return True
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return False
+    return stat.S_ISREG(st.st_mode) and st.st_size > 0
 
 def process_file(file_path, temp_dir, disposable_domains):
+    if os.path.isdir(file_path):
+        return read_maildir(file_path, temp_dir, disposable_domains)
     ext = os.path.splitext(file_path)[1].lower()
+    if mailbox_reader.in_maildir(file_path):
+        # A single message delivered into a Maildir that is already being watched
+        return read_eml_file(file_path, temp_dir, disposable_domains)
     handlers = {
         '.txt': lambda f: read_text_file(f, disposable_domains),
         '.log': lambda f: read_text_file(f, disposable_domains),
@@ -410,122 +641,315 @@ def process_file(file_path, temp_dir, disposable_domains):
         '.sql': lambda f: read_sql_file(f, disposable_domains),
         '.mdb': lambda f: read_mdb_file(f, disposable_domains),
         '.accdb': lambda f: read_mdb_file(f, disposable_domains),
-        '.eml': lambda f: read_eml_file(f, disposable_domains),
+        '.eml': lambda f: read_eml_file(f, temp_dir, disposable_domains),
         '.msg': lambda f: read_msg_file(f, disposable_domains),
+        '.mbox': lambda f: read_mbox_file(f, temp_dir, disposable_domains),
+        '.pst': lambda f: read_pst_file(f, disposable_domains),
+        '.ost': lambda f: read_pst_file(f, disposable_domains),
         '.zip': lambda f: read_archive(f, temp_dir, disposable_domains),
         '.tar': lambda f: read_archive(f, temp_dir, disposable_domains),
         '.gz': lambda f: read_archive(f, temp_dir, disposable_domains),
         '.rar': lambda f: read_archive(f, temp_dir, disposable_domains),
     }
-    if ext in handlers:
+    with metrics.stage('sniff'):
+        # Archive members live in throwaway directories, so their verdicts are not worth caching
+        kind, trusted = sniff.route(file_path, cached=not file_path.startswith(temp_dir))
+    if trusted and ext in handlers:
         return handlers[ext](file_path)
-    kind = filetype.guess(file_path)
-    if kind and kind.mime.startswith('image'):
-        return read_image_file(file_path, disposable_domains)
-    try:
-        return read_text_file(file_path, disposable_domains)
-    except Exception:
-        return set(), ""
+    content_handlers = {
+        sniff.TEXT: handlers['.txt'],
+        sniff.RTF: handlers['.rtf'],
+        sniff.PDF: handlers['.pdf'],
+        sniff.IMAGE: handlers['.png'],
+        sniff.SQLITE: handlers['.db'],
+        sniff.MBOX: handlers['.mbox'],
+        sniff.PST: handlers['.pst'],
+        sniff.ZIP: handlers['.zip'],
+        sniff.GZIP: handlers['.gz'],
+        sniff.TAR: handlers['.tar'],
+    }
+    if kind in content_handlers:
+        if ext in handlers:
+            logging.info(f"{file_path} has {kind} content, not routing it by its extension")
+        try:
+            return content_handlers[kind](file_path)
+        except Exception:
+            return set(), ""
+    logging.info(f"Skipping {file_path}: {kind} content has no handler")
+    return set(), ""
 
-def scan_folder(folder, output_file, url_output_file, log_file, disposable_domains, blocked_domains):
-    setup_logger(log_file)
-    all_emails = set()
-    all_urls = set()
-    temp_dir = os.path.join(folder, "_temp_extract")
-    os.makedirs(temp_dir, exist_ok=True)
+_sandbox_args = None
+
+def _sandboxed_process_file(file_path):
+    # Runs in a forked SandboxPool worker; filter stats and stage timings are shipped back so the summary stays complete
+    temp_dir, disposable_domains = _sandbox_args
+    email_filter = get_email_filter(disposable_domains)
+    email_filter.reset_stats()
+    metrics.take_stages()
+    emails, text = process_file(file_path, temp_dir, disposable_domains)
+    return emails, text, email_filter.rejected, metrics.take_stages()
+
+def handler_name(file_path):
+    if os.path.isdir(file_path):
+        return 'maildir'
+    return os.path.splitext(file_path)[1].lower().lstrip('.') or 'other'
+
+def list_files(folder):
     file_list = []
-    for root, _, files in os.walk(folder):
+    for root, dirs, files in os.walk(folder):
+        if mailbox_reader.is_maildir(root) and '_temp_extract' not in root:
+            # A Maildir is scanned as one mailbox; its message files carry no extension
+            file_list.append(root)
+            dirs[:] = [d for d in dirs if d not in ('cur', 'new', 'tmp')]
         for file in files:
             if '_temp_extract' in root:
                 continue
             path = os.path.join(root, file)
             file_list.append(path)
+    return file_list
+
+def plan_folder(folder, log_file, disposable_domains, blocked_domains, fraction, seed=0, report_file=None):
+    # Dry run: every file is only stat'ed, a sample per handler is extracted and nothing is written but the report
+    setup_logger(log_file)
+    compatible_files = [f for f in list_files(folder) if is_plannable(f)]
+    print(f"Files to plan for (unknown extensions are sniffed only if sampled): {len(compatible_files)}")
+    # Outside the scanned tree, which may be a read-only share
+    temp_dir = tempfile.mkdtemp()
+
+    def measure(path):
+        emails, text_content = process_file(path, temp_dir, disposable_domains)
+        urls = extract_urls_from_text(text_content, blocked_domains)
+        return set(map(normalize.email_key, emails)), set(map(normalize.url_key, urls))
+
+    try:
+        report = planner.plan(compatible_files, handler_name, measure, fraction, seed)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    print("\n--- Scan plan ---")
+    for line in planner.summary_lines(report):
+        print(line)
+    if report_file:
+        planner.write_json(report, report_file)
+        print(f"Plan written to {report_file}")
+    return report
+
+def scan_folder(folder, output_file, url_output_file, log_file, disposable_domains, blocked_domains,
+                metrics_file=None, prometheus_file=None, profile_slowest=0,
+                timeout=None, max_memory_mb=None, quarantine_file=None, meta_cache=None,
+                dedup=True, near_duplicates=False, watch=False, debounce=2.0, prefetch_bytes=prefetch.PREFETCH_BYTES,
+                ocr_cache=None, ocr_cache_bytes=ocr.OCR_CACHE_BYTES, strip_tracking=False,
+                provenance_file=None):
+    global _sandbox_args
+    setup_logger(log_file)
+    meta = sniff.activate(sniff.MetadataCache(meta_cache))
+    # Activated before any worker is forked, so sandboxed handlers and PDF OCR processes share it
+    ocr_results = ocr.activate(ocr.OcrCache(ocr_cache, ocr_cache_bytes)) if ocr_cache else None
+    run_metrics = metrics.activate(metrics.RunMetrics(profile_slowest)) if (metrics_file or prometheus_file or profile_slowest) else None
+    all_emails = set()
+    all_urls = set()
+    temp_dir = os.path.join(folder, "_temp_extract")
+    os.makedirs(temp_dir, exist_ok=True)
+    file_list = list_files(folder)
     total_files = len(file_list)
-    compatible_files = [f for f in file_list if is_compatible_file(f)]
+    compatible_files = [f for f in file_list if is_scannable(f)]
     total_compatible = len(compatible_files)
 
     print(f"Total files found: {total_files}")
     print(f"Compatible files for extraction: {total_compatible}")
 
-    if total_compatible == 0:
+    if total_compatible == 0 and not watch:
         print("No compatible files found for extraction. Exiting.")
         logging.error("No compatible files found for extraction. Exiting.")
         return
 
-    found_files = 0
-    all_possible_emails = set()
-    forbidden_filtered = set()
-    disposable_filtered = set()
+    email_filter = get_email_filter(disposable_domains)
+    email_filter.reset_stats()
     exported_emails = set()
-    all_possible_urls = set()
-    blocked_urls = set()
+    url_filter = get_url_filter(blocked_domains)
+    url_filter.reset_stats()
+    # Canonical URL keys: one line per address however its scheme, host or port happened to be spelled
     exported_urls = set()
+    sources = provenance.Provenance(provenance_file) if provenance_file else None
+
+    pool = None
+    if timeout or max_memory_mb:
+        _sandbox_args = (temp_dir, disposable_domains)
+        pool = SandboxPool(1, timeout, max_memory_mb, quarantine_file)
+
+    index = fingerprint.FingerprintIndex(compatible_files, near=near_duplicates) if dedup else None
+    # Reader threads fetch upcoming files while the current one is parsed; sandboxed handlers read in their own process
+    prefetcher = prefetch.activate(prefetch.Prefetcher(compatible_files, prefetch_bytes)) if prefetch_bytes and not pool else None
+
+    def extract_chunk(chunk_text):
+        return extract_emails_from_text(chunk_text, disposable_domains), mailbox_reader.url_lines(chunk_text)
+
+    def chunked(path):
+        return (index and index.near and path.lower().endswith(PLAIN_TEXT_EXTS)
+                and sniff.kind_of(path) == sniff.TEXT and looks_utf8(path))
+
+    def locate(path):
+        # Byte offset of each match in the file itself, found in a second pass over its bytes. Text extracted from
+        # documents, images or archives has no such position, so those hits are exported with an unknown offset.
+        if sources is None or not has_source_offsets(path):
+            return {}
+        return source_offsets(path)
+
+    def run_handler(path):
+        if chunked(path):
+            return index.chunked(path, extract_chunk)
+        if not pool:
+            return process_file(path, temp_dir, disposable_domains)
+        # Sniff in the parent so the verdict lands in the metadata cache the worker cannot update
+        if os.path.isfile(path):
+            sniff.kind_of(path)
+        status, value = pool.run(path, _sandboxed_process_file, path)
+        if status != OK:
+            raise RuntimeError(f"{status}: {value}" if value else status)
+        emails, text_content, rejected, stages = value
+        metrics.merge_stages(stages)
+        for reason, items in rejected.items():
+            email_filter.rejected.setdefault(reason, set()).update(items)
+        return emails, text_content
+
+    # Sandboxed handlers run in another process, and tesserocr already keeps one engine loaded
+    batch_images = not pool and ocr.engine() is None
+
+    def is_image(path):
+        return path.lower().endswith(IMAGE_EXTS) and os.path.isfile(path) and sniff.kind_of(path) == sniff.IMAGE
 
-    def classify_email(email):
-        local, _, domain = email.lower().partition('@')
-        if any(word in local or word in domain for word in FORBIDDEN_WORDS):
-            return 'forbidden'
-        domain_only = domain.split(':')[0].split('/')[0]
-        if domain_only in disposable_domains:
-            return 'disposable'
-        return 'valid'
+    found_files = 0
+    scanned_files = 0
 
-    with open(output_file, 'a', buffering=1) as f_out, \
-         open(url_output_file, 'a', buffering=1) as f_url_out, \
-         tqdm(total=total_compatible, desc="Extracting emails/urls", ncols=80) as pbar:
-        for idx, path in enumerate(compatible_files, 1):
-            print(f"Processing file {idx}/{total_compatible}: {path}")
-            logging.info(f"Processing file {idx}/{total_compatible}: {path}")
-            try:
-                emails, text_content = process_file(path, temp_dir, disposable_domains)
-                # Extract URLs from text_content
-                urls = extract_urls_from_text(text_content, blocked_domains)
+    def scan_file(path, label, f_out, f_url_out):
+        nonlocal found_files, scanned_files
+        print(f"Processing file {label}: {path}")
+        logging.info(f"Processing file {label}: {path}")
+        scanned_files += 1
+        try:
+            with (run_metrics.track_file(path, handler_name(path)) if run_metrics else contextlib.nullcontext({})) as record:
+                reused = index.lookup(path) if index else None
+                if reused is not None:
+                    emails, urls, located = reused
+                    logging.info(f"{path} is identical to {index.duplicate_of(path)}, reusing its results")
+                else:
+                    emails, text_content = run_handler(path)
+                    # Extract URLs from text_content
+                    urls = extract_urls_from_text(text_content, blocked_domains)
+                    located = locate(path)
+                    if index:
+                        index.store(path, (emails, urls, located))
+                record['entities'] = len(emails) + len(urls)
+            with metrics.stage('write'):
+                handler = handler_name(path)
                 for url in urls:
-                    all_possible_urls.add(url)
-                    parsed = urlparse(url)
-                    domain = parsed.netloc.lower()
-                    if domain.startswith('www.'):
-                        domain = domain[4:]
-                    if domain in blocked_domains:
-                        blocked_urls.add(url)
-                    elif url not in exported_urls:
+                    offset = located.get(url, provenance.NO_OFFSET)
+                    if strip_tracking:
+                        url = normalize.strip_tracking(url)
+                    key = normalize.url_key(url)
+                    if key not in exported_urls:
                         f_url_out.write(url + '\n')
                         f_url_out.flush()
-                        exported_urls.add(url)
-
-                for email in emails:
-                    all_possible_emails.add(email)
-                    category = classify_email(email)
-                    if category == 'forbidden':
-                        forbidden_filtered.add(email)
-                    elif category == 'disposable':
-                        disposable_filtered.add(email)
-                    elif email not in exported_emails:
+                        exported_urls.add(key)
+                    if sources is not None:
+                        sources.add(url, provenance.URL, path, handler, offset)
+
+                for found in emails:
+                    email = normalize.email_key(found)
+                    if email not in exported_emails:
                         f_out.write(email + '\n')
                         f_out.flush()
                         exported_emails.add(email)
-                if emails or urls:
-                    found_files += 1
-                    print(f"  Found emails: {emails}")
-                    print(f"  Found urls: {urls}")
-                    logging.info(f"Found in {path}: {emails} {urls}")
-            except Exception as e:
-                print(f"  Error processing {path}: {e}")
-                logging.error(f"Failed to process {path}: {e}")
-            pbar.update(1)
+                    if sources is not None:
+                        sources.add(email, provenance.EMAIL, path, handler, located.get(found, provenance.NO_OFFSET))
+            if emails or urls:
+                found_files += 1
+                print(f"  Found emails: {emails}")
+                print(f"  Found urls: {urls}")
+                logging.info(f"Found in {path}: {emails} {urls}")
+        except Exception as e:
+            print(f"  Error processing {path}: {e}")
+            logging.error(f"Failed to process {path}: {e}")
+        finally:
+            prefetch.release(path)
+            _ocr_ahead.pop(path, None)
+
+    # Started before the first pass so files landing during it are not missed
+    own_files = [output_file, url_output_file, log_file, meta_cache, quarantine_file, metrics_file, prometheus_file, ocr_cache,
+                 provenance_file]
+    file_watcher = watcher.Watcher(folder, debounce, ignore=[f for f in own_files if f]) if watch else None
+
+    with open(output_file, 'a', buffering=1) as f_out, \
+         open(url_output_file, 'a', buffering=1) as f_url_out:
+        with tqdm(total=total_compatible, desc="Extracting emails/urls", ncols=80) as pbar:
+            for idx, path in enumerate(compatible_files, 1):
+                if batch_images and path not in _ocr_ahead and is_image(path):
+                    ahead = [p for p in compatible_files[idx - 1:idx - 1 + OCR_BATCH * 4] if is_image(p)][:OCR_BATCH]
+                    if len(ahead) > 1:
+                        ocr_images_ahead(ahead)
+                scan_file(path, f"{idx}/{total_compatible}", f_out, f_url_out)
+                pbar.update(1)
+        if file_watcher:
+            # Filters, dedup sets and the fingerprint index stay warm between batches
+            print(f"Watching {folder} for new or changed files ({file_watcher.mode}); press Ctrl+C to stop")
+            try:
+                for batch in file_watcher.batches():
+                    for path in batch:
+                        if is_scannable(path):
+                            scan_file(path, "(new)", f_out, f_url_out)
+                    meta.save()
+                    if sources is not None:
+                        sources.flush()
+            except KeyboardInterrupt:
+                print("Stopped watching.")
+            finally:
+                file_watcher.close()
     logging.info(f"Extraction complete. Unique emails found: {len(exported_emails)}")
-    import shutil
+    if pool:
+        pool.close()
+    if prefetcher:
+        prefetcher.close()
+        prefetch.activate(None)
     shutil.rmtree(temp_dir, ignore_errors=True)
-
+    meta.save()
+    sniff.activate(None)
+    if sources is not None:
+        sources.close()
+        print(f"Provenance of {len(sources)} hits written to {provenance_file}")
+    if ocr_results:
+        ocr_results.close()
+        ocr.activate(None)
+
+    rejected = email_filter.rejected
+    all_possible_emails = exported_emails.union(*rejected.values())
     print("\n--- Extraction Summary ---")
     print(f"Total unique emails found (before filtering): {len(all_possible_emails)}")
-    print(f"Removed due to forbidden words: {len(forbidden_filtered)}")
-    print(f"Removed due to disposable domains: {len(disposable_filtered)}")
+    print(f"Removed due to forbidden words: {len(rejected.get('forbidden', ()))}")
+    print(f"Removed due to disposable domains: {len(rejected.get('disposable', ()))}")
+    print(f"Removed as file names or numeric domains: {len(rejected.get('file-ext', ())) + len(rejected.get('numeric', ()))}")
     print(f"Valid emails exported: {len(exported_emails)} (see {output_file})")
-    print(f"Total unique urls found: {len(all_possible_urls)}")
+    blocked_urls = url_filter.rejected.get('blocked', set())
+    print(f"Total unique urls found: {len(exported_urls | set(map(normalize.url_key, blocked_urls)))}")
     print(f"Removed due to blocked domains: {len(blocked_urls)}")
     print(f"Valid urls exported: {len(exported_urls)} (see {url_output_file})")
-    print(f"Files with emails/urls found: {found_files} / {total_compatible}")
+    print(f"Files with emails/urls found: {found_files} / {scanned_files}")
+    if index and index.reused:
+        print(f"Identical copies reused without re-parsing: {index.reused}")
+    if index and index.chunks_seen:
+        print(f"Text chunks reused (near-duplicates): {index.chunks_reused} / {index.chunks_seen}")
+    if pool and pool.quarantined:
+        print(f"Quarantined files (timeout/memory/crash): {len(pool.quarantined)}" + (f" (see {quarantine_file})" if quarantine_file else ""))
+
+    if run_metrics:
+        metrics.activate(None)
+        print("\n--- Timing by handler / stage ---")
+        for line in run_metrics.summary_lines():
+            print(line)
+        if metrics_file:
+            run_metrics.write_json(metrics_file)
+            print(f"Metrics report written to {metrics_file}")
+        if prometheus_file:
+            run_metrics.write_prometheus(prometheus_file)
+            print(f"Prometheus textfile written to {prometheus_file}")
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="Universal Email & URL Extractor (with Filtering and Summary)")
@@ -535,7 +959,35 @@ if __name__ == "__main__":
     parser.add_argument("-l", "--log", default="extractor.log", help="Log file")
     parser.add_argument("-d", "--domains", default="disposable_domains.txt", help="Disposable domains file")
     parser.add_argument("-b", "--blocked_domains", default="blocked_domains.txt", help="Blocked URL domains text file (one domain per line)")
+    parser.add_argument("-t", "--timeout", type=float, default=None, help="Per-file wall-time limit in seconds (runs handlers in a recycled worker)")
+    parser.add_argument("-m", "--max-memory", type=int, default=None, help="Per-file memory cap in MB (runs handlers in a recycled worker)")
+    parser.add_argument("-q", "--quarantine", default="quarantine.jsonl", help="File listing files that hit a limit or crashed the worker")
+    parser.add_argument("--meta-cache", default=None, help="JSON file caching per-file metadata (content type) across runs")
+    parser.add_argument("--no-dedup", action="store_true", help="Parse every copy of identical files instead of reusing the first result")
+    parser.add_argument("--near-dup", action="store_true", help="Also reuse results for repeated chunks of UTF-8 text files")
+    parser.add_argument("-w", "--watch", action="store_true", help="Keep running and extract from new or changed files as they land")
+    parser.add_argument("--debounce", type=float, default=2.0, help="Seconds a file must stay unchanged before it is picked up in watch mode")
+    parser.add_argument("--prefetch-mb", type=int, default=prefetch.PREFETCH_BYTES // (1024 * 1024), help="Memory for reading upcoming files ahead of the parser (0 disables)")
+    parser.add_argument("--provenance", default=None, help="CSV listing every file each email/URL was found in, with its handler and byte offset in the file")
+    parser.add_argument("--strip-tracking", action="store_true", help="Drop utm_* and click-id query parameters from exported URLs")
+    parser.add_argument("--ocr-cache", default=None, help="SQLite file caching OCR text by image content, so repeated images are OCRed once")
+    parser.add_argument("--ocr-cache-mb", type=int, default=ocr.OCR_CACHE_BYTES // (1024 * 1024), help="Size limit of the OCR cache; least recently used entries are dropped")
+    parser.add_argument("--metrics", default=None, help="Write a JSON timing report (per handler and pipeline stage)")
+    parser.add_argument("--prometheus", default=None, help="Write the timing report as a Prometheus textfile")
+    parser.add_argument("--profile-slowest", type=int, default=0, help="cProfile every file and keep profiles for the N slowest")
+    parser.add_argument("--plan", type=float, default=None, metavar="FRACTION", help="Dry run: extract from this fraction of the files of each type and project runtime, CPU hours and yield for the whole tree")
+    parser.add_argument("--plan-seed", type=int, default=0, help="Seed for picking the files --plan samples")
+    parser.add_argument("--plan-report", default=None, help="Write the --plan projection as JSON")
     args = parser.parse_args()
     disposable_domains = load_disposable_domains(args.domains)
     blocked_domains = load_blocked_domains(args.blocked_domains)
-    scan_folder(args.folder, args.output, args.url_output, args.log, disposable_domains, blocked_domains)
+    if args.plan is not None:
+        plan_folder(args.folder, args.log, disposable_domains, blocked_domains, args.plan, args.plan_seed, args.plan_report)
+        raise SystemExit(0)
+    scan_folder(args.folder, args.output, args.url_output, args.log, disposable_domains, blocked_domains,
+                metrics_file=args.metrics, prometheus_file=args.prometheus, profile_slowest=args.profile_slowest,
+                timeout=args.timeout, max_memory_mb=args.max_memory, quarantine_file=args.quarantine,
+                meta_cache=args.meta_cache, dedup=not args.no_dedup, near_duplicates=args.near_dup,
+                watch=args.watch, debounce=args.debounce, prefetch_bytes=args.prefetch_mb * 1024 * 1024,
+                ocr_cache=args.ocr_cache, ocr_cache_bytes=args.ocr_cache_mb * 1024 * 1024,
+                strip_tracking=args.strip_tracking, provenance_file=args.provenance)
@@ -0,0 +1,228 @@
+import os
+import zlib
+import queue
+import hashlib
+import threading
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import sniff
+import prefetch
+
+HASH_BLOCK = 1024 * 1024
+# Threads hashing the files that share their size with another; reads and sha256 both release the GIL
+HASH_THREADS = 4
+# Entries FingerprintIndex keeps before dropping the least recently used; a dropped entry only costs a re-parse
+RESULT_INDEX_ITEMS = 100000
+CHUNK_INDEX_ITEMS = 1000000
+# A line whose crc32 has these low bits clear ends a chunk (~64 lines on average), so chunk
+# boundaries follow content: an inserted or edited line only changes the chunks around it
+CHUNK_MASK = 0x3f
+_NO_HIT = (frozenset(), ())
+
+
+def file_digest(file_path):
+    data = prefetch.buffered(file_path)
+    if data is not None:
+        return hashlib.sha256(data).hexdigest()
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def cached_digest(file_path):
+    # Stored next to the sniffed kind, so unchanged files are never hashed twice across runs
+    cache = sniff.active()
+    if cache is None:
+        return file_digest(file_path)
+    entry = cache.get(file_path)
+    if 'sha256' not in entry:
+        entry['sha256'] = file_digest(file_path)
+        cache.dirty = True
+    return entry['sha256']
+
+def shared_sizes(paths):
+    # Only files whose size matches another file can be identical, so only those get hashed
+    sizes = Counter()
+    for path in paths:
+        if os.path.isfile(path):
+            sizes[os.path.getsize(path)] += 1
+    return {size for size, n in sizes.items() if n > 1}
+
+def iter_chunks(file_path):
+    lines = []
+    with open(file_path, 'rb') as f:
+        for line in f:
+            lines.append(line)
+            if zlib.crc32(line) & CHUNK_MASK == 0:
+                yield b''.join(lines)
+                lines = []
+    if lines:
+        yield b''.join(lines)
+
+
+# Groups paths by payload without holding up the scan. Files whose size no other file has are ready at once;
+# the others are hashed on a thread pool and a size becomes ready when all of its files are hashed. Callers
+# poll ready() between results, so dispatch, progress and stop checks never wait for the hashing.
+class DuplicateGroups:
+    def __init__(self, paths, threads=HASH_THREADS):
+        # First path of each payload -> every path holding it, filled in as groups are handed out
+        self.copies = {}
+        self.skipped = 0
+        self.settled = queue.Queue()
+        self.backlog = []
+        self.finished = False
+        self.lock = threading.Lock()
+        paths = list(paths)
+        sizes = {}
+        buckets = {}
+        for path in paths:
+            try:
+                sizes[path] = os.path.getsize(path) if os.path.isfile(path) else None
+            except OSError:
+                sizes[path] = None
+            buckets.setdefault(sizes[path], []).append(path)
+        self.buckets = {size: bucket for size, bucket in buckets.items() if size is not None and len(bucket) > 1}
+        self.left = {size: len(bucket) for size, bucket in self.buckets.items()}
+        self.digests = {}
+        for path in paths:
+            if sizes[path] not in self.buckets:
+                self.settled.put((path, [path]))
+        self.executor = None
+        if not self.buckets:
+            self.settled.put(None)
+            return
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='fingerprint')
+        for size, bucket in list(self.buckets.items()):
+            for path in bucket:
+                future = self.executor.submit(cached_digest, path)
+                future.add_done_callback(lambda f, path=path, size=size: self.hashed(path, size, f))
+
+    def hashed(self, path, size, future):
+        # Any failure leaves the file ungrouped; the bucket must still be counted down or it never settles
+        try:
+            digest = None if future.cancelled() else future.result()
+        except Exception:
+            digest = None
+        # Groups are queued under the lock so the end marker can never overtake a bucket finished concurrently
+        with self.lock:
+            self.digests[path] = digest
+            self.left[size] -= 1
+            if self.left[size]:
+                return
+            del self.left[size]
+            first = {}
+            groups = {}
+            for p in self.buckets.pop(size):
+                d = self.digests.pop(p)
+                if d is None or d not in first:
+                    if d is not None:
+                        first[d] = p
+                    groups[p] = [p]
+                else:
+                    groups[first[d]].append(p)
+            for item in groups.items():
+                self.settled.put(item)
+            if not self.buckets:
+                self.settled.put(None)
+
+    def take(self, item):
+        if item is None:
+            self.finished = True
+            return
+        first, group = item
+        self.copies[first] = group
+        self.skipped += len(group) - 1
+        self.backlog.append(first)
+
+    def ready(self):
+        # First paths of the groups settled since the last call; never blocks
+        while True:
+            try:
+                self.take(self.settled.get_nowait())
+            except queue.Empty:
+                break
+        firsts, self.backlog = self.backlog, []
+        return firsts
+
+    def wait(self, timeout=None):
+        # Blocks until another group is settled, everything is, or the timeout passes
+        if self.done or self.backlog:
+            return
+        try:
+            self.take(self.settled.get(timeout=timeout))
+        except queue.Empty:
+            pass
+
+    @property
+    def done(self):
+        return self.finished and not self.backlog
+
+    def batches(self, stopped=None):
+        while not self.done and not (stopped and stopped()):
+            self.wait(0.5)
+            batch = self.ready()
+            if batch:
+                yield batch
+
+    def close(self):
+        if self.executor:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class FingerprintIndex:
+    def __init__(self, paths, near=False):
+        self.sizes = shared_sizes(paths)
+        self.near = near
+        self.results = OrderedDict()
+        self.chunks = OrderedDict()
+        self.provenance = {}
+        self.reused = 0
+        self.chunks_seen = 0
+        self.chunks_reused = 0
+
+    def lookup(self, file_path):
+        # Returns the stored result of an identical file seen earlier in the scan, or None
+        if not os.path.isfile(file_path) or os.path.getsize(file_path) not in self.sizes:
+            return None
+        digest = cached_digest(file_path)
+        hit = self.results.get(digest)
+        self.provenance[file_path] = (digest, hit[0] if hit else file_path)
+        if hit is None:
+            return None
+        self.results.move_to_end(digest)
+        self.reused += 1
+        return hit[1]
+
+    def store(self, file_path, result):
+        digest = self.provenance.pop(file_path, (None,))[0]
+        if digest is not None and digest not in self.results:
+            self.results[digest] = (file_path, result)
+            if len(self.results) > RESULT_INDEX_ITEMS:
+                self.results.popitem(last=False)
+
+    def duplicate_of(self, file_path):
+        digest, first = self.provenance.pop(file_path, (None, file_path))
+        return first if first != file_path else None
+
+    def chunked(self, file_path, extract):
+        # Near-duplicate mode for UTF-8 text: extract(text) -> (emails, url_lines) runs only on chunks
+        # not seen before. Matches never span a line break and chunks end on one, so the union is exact.
+        emails = set()
+        lines = []
+        for chunk in iter_chunks(file_path):
+            key = hashlib.blake2b(chunk, digest_size=16).digest()
+            self.chunks_seen += 1
+            hit = self.chunks.get(key)
+            if hit is None:
+                found, url_lines = extract(chunk.decode('utf-8', errors='ignore'))
+                hit = (frozenset(found), tuple(url_lines)) if found or url_lines else _NO_HIT
+                self.chunks[key] = hit
+                if len(self.chunks) > CHUNK_INDEX_ITEMS:
+                    self.chunks.popitem(last=False)
+            else:
+                self.chunks.move_to_end(key)
+                self.chunks_reused += 1
+            emails.update(hit[0])
+            lines.extend(hit[1])
+        return emails, '\n'.join(lines)
@@ -0,0 +1,169 @@
+import os
+import re
+from email.parser import BytesParser
+from email.policy import compat32
+from email.utils import getaddresses
+
+ADDRESS_HEADERS = {b'from', b'to', b'cc', b'bcc', b'reply-to', b'sender', b'return-path', b'delivered-to'}
+HEADER_END = re.compile(rb'\r?\n\r?\n')
+# A From_ line is "From <sender> <asctime>"; plain text starting with "From " rarely ends in a year
+MBOX_FROM_LINE = re.compile(rb'^From \S+.*\d{4}\s*$')
+MAILDIR_SUBDIRS = ('cur', 'new')
+BATCH_CHARS = 4 * 1024 * 1024
+
+_parser = BytesParser(policy=compat32)
+
+
+def iter_mbox(path):
+    # Yields one raw message at a time, so memory is bounded by the largest message, not the mailbox
+    lines = []
+    previous_blank = True
+    with open(path, 'rb') as f:
+        for line in f:
+            if previous_blank and line.startswith(b'From ') and MBOX_FROM_LINE.match(line):
+                if lines:
+                    yield b''.join(lines)
+                lines = []
+            else:
+                lines.append(line)
+            previous_blank = not line.strip()
+    if lines:
+        yield b''.join(lines)
+
+def is_mbox(head):
+    return bool(MBOX_FROM_LINE.match(head.split(b'\n', 1)[0]))
+
+def is_maildir(path):
+    return all(os.path.isdir(os.path.join(path, d)) for d in MAILDIR_SUBDIRS)
+
+def in_maildir(file_path):
+    folder = os.path.dirname(os.path.abspath(file_path))
+    return os.path.basename(folder) in MAILDIR_SUBDIRS and is_maildir(os.path.dirname(folder))
+
+def maildir_messages(path):
+    # tmp/ only holds deliveries still being written
+    for sub in MAILDIR_SUBDIRS:
+        folder = os.path.join(path, sub)
+        for name in sorted(os.listdir(folder)):
+            full_path = os.path.join(folder, name)
+            if os.path.isfile(full_path):
+                yield full_path
+
+def split_headers(raw):
+    m = HEADER_END.search(raw)
+    return (raw[:m.start()], raw[m.end():]) if m else (raw, b'')
+
+def header_addresses(header_block):
+    # Fast path: unfold and pick out the address headers without building a Message
+    values = []
+    current = None
+    for line in header_block.splitlines():
+        if line[:1] in (b' ', b'\t'):
+            if current is not None:
+                current.append(line.strip())
+            continue
+        current = None
+        name, sep, value = line.partition(b':')
+        if sep and name.strip().lower() in ADDRESS_HEADERS:
+            current = [value.strip()]
+            values.append(current)
+    fields = [b' '.join(v).decode('utf-8', errors='ignore') for v in values]
+    return [addr for _, addr in getaddresses(fields) if '@' in addr]
+
+def decode_part(part):
+    payload = part.get_payload(decode=True) or b''
+    charset = part.get_content_charset() or 'utf-8'
+    try:
+        return payload.decode(charset, errors='ignore')
+    except LookupError:
+        return payload.decode('utf-8', errors='ignore')
+
+def message_body(raw, on_attachment=None):
+    # text/plain is always decoded; HTML only when a message has no plain part, attachments only on demand
+    msg = _parser.parsebytes(raw)
+    plain = []
+    html = []
+    for part in msg.walk():
+        if part.is_multipart():
+            continue
+        filename = part.get_filename()
+        disposition = (part.get('Content-Disposition') or '').lower()
+        if filename or disposition.startswith('attachment'):
+            if on_attachment:
+                on_attachment(filename or 'attachment', part)
+            continue
+        ctype = part.get_content_type()
+        if ctype == 'text/plain':
+            plain.append(decode_part(part))
+        elif ctype == 'text/html':
+            html.append(part)
+    if not plain:
+        plain = [decode_part(part) for part in html]
+    return '\n'.join(plain)
+
+def iter_pst(path):
+    # Needs libpff-python; yields (header_block, body) per message, folder by folder
+    import pypff
+    pst = pypff.file()
+    pst.open(path)
+    try:
+        folders = [pst.get_root_folder()]
+        while folders:
+            folder = folders.pop()
+            folders.extend(folder.sub_folders)
+            for message in folder.sub_messages:
+                headers = (message.transport_headers or '').encode('utf-8', errors='ignore')
+                body = message.plain_text_body or message.html_body or b''
+                if isinstance(body, bytes):
+                    body = body.decode('utf-8', errors='ignore')
+                yield headers, body
+    finally:
+        pst.close()
+
+def read_message_files(paths):
+    for path in paths:
+        with open(path, 'rb') as f:
+            yield f.read()
+
+def url_lines(text):
+    # URLs never span a line break, so the URL-bearing lines are all URL extraction needs
+    return [line for line in text.splitlines() if 'http' in line]
+
+
+class MessageCollector:
+    def __init__(self, extract_emails, batch_chars=BATCH_CHARS):
+        self.extract_emails = extract_emails
+        self.batch_chars = batch_chars
+        self.emails = set()
+        self.lines = []
+        self.batch = []
+        self.size = 0
+
+    def add_text(self, text):
+        # Running the filter on a few large buffers is much cheaper than once per message
+        self.batch.append(text)
+        self.size += len(text)
+        if self.size >= self.batch_chars:
+            self.flush()
+
+    def add_result(self, emails, text):
+        self.emails.update(emails)
+        self.lines.extend(url_lines(text))
+
+    def add_message(self, raw, on_attachment=None):
+        header_block, _ = split_headers(raw)
+        self.add_text(' '.join(header_addresses(header_block)))
+        self.add_text(message_body(raw, on_attachment))
+
+    def flush(self):
+        if not self.batch:
+            return
+        text = '\n'.join(self.batch)
+        self.batch = []
+        self.size = 0
+        self.emails.update(self.extract_emails(text))
+        self.lines.extend(url_lines(text))
+
+    def result(self):
+        self.flush()
+        return self.emails, '\n'.join(self.lines)
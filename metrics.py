@@ -0,0 +1,177 @@
+import os
+import io
+import json
+import time
+import heapq
+import pstats
+import cProfile
+import contextlib
+
+_NULL = contextlib.nullcontext()
+_active = None
+
+
+class RunMetrics:
+    def __init__(self, profile_slowest=0):
+        self.handlers = {}
+        self.stages = {}
+        self.slowest = []
+        self.profile_slowest = profile_slowest
+        self.started = time.time()
+        self.wall_start = time.perf_counter()
+        self.cpu_start = time.process_time()
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield
+        finally:
+            s = self.stages.setdefault(name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0})
+            s['calls'] += 1
+            s['wall_s'] += time.perf_counter() - wall
+            s['cpu_s'] += time.process_time() - cpu
+
+    @contextlib.contextmanager
+    def track_file(self, path, handler):
+        # The caller fills record['entities'] with what the handler produced
+        record = {'entities': 0, 'error': False}
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            size = 0
+        profiler = cProfile.Profile() if self.profile_slowest else None
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        if profiler:
+            profiler.enable()
+        try:
+            yield record
+        except Exception:
+            record['error'] = True
+            raise
+        finally:
+            if profiler:
+                profiler.disable()
+            wall = time.perf_counter() - wall
+            cpu = time.process_time() - cpu
+            h = self.handlers.setdefault(handler, {
+                'files': 0, 'errors': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'bytes_in': 0, 'entities_out': 0, 'max_wall_s': 0.0
+            })
+            h['files'] += 1
+            h['errors'] += record['error']
+            h['wall_s'] += wall
+            h['cpu_s'] += cpu
+            h['bytes_in'] += size
+            h['entities_out'] += record['entities']
+            h['max_wall_s'] = max(h['max_wall_s'], wall)
+            self._keep_slowest(wall, path, handler, profiler)
+
+    def _keep_slowest(self, wall, path, handler, profiler):
+        limit = self.profile_slowest or 10
+        if len(self.slowest) >= limit and wall <= self.slowest[0][0]:
+            return
+        profile = None
+        if profiler:
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(25)
+            profile = out.getvalue()
+        entry = (wall, path, handler, profile)
+        if len(self.slowest) < limit:
+            heapq.heappush(self.slowest, entry)
+        else:
+            heapq.heapreplace(self.slowest, entry)
+
+    def report(self):
+        return {
+            'started': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+            'wall_s': time.perf_counter() - self.wall_start,
+            'cpu_s': time.process_time() - self.cpu_start,
+            'handlers': self.handlers,
+            'stages': self.stages,
+            'slowest_files': [
+                {'path': path, 'handler': handler, 'wall_s': wall, 'profile': profile}
+                for wall, path, handler, profile in sorted(self.slowest, reverse=True)
+            ],
+        }
+
+    def write_json(self, path):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.report(), f, indent=2)
+
+    def write_prometheus(self, path):
+        lines = []
+
+        def emit(name, help_text, kind, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ','.join(f'{k}="{label_value(v)}"' for k, v in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        h = self.handlers
+        emit('extractor_handler_files_total', 'Files processed per handler', 'counter',
+             [({'handler': k}, v['files']) for k, v in h.items()])
+        emit('extractor_handler_errors_total', 'Files whose handler raised', 'counter',
+             [({'handler': k}, v['errors']) for k, v in h.items()])
+        emit('extractor_handler_wall_seconds_total', 'Wall time spent per handler', 'counter',
+             [({'handler': k}, f"{v['wall_s']:.6f}") for k, v in h.items()])
+        emit('extractor_handler_cpu_seconds_total', 'CPU time spent per handler', 'counter',
+             [({'handler': k}, f"{v['cpu_s']:.6f}") for k, v in h.items()])
+        emit('extractor_handler_bytes_total', 'Input bytes per handler', 'counter',
+             [({'handler': k}, v['bytes_in']) for k, v in h.items()])
+        emit('extractor_handler_entities_total', 'Emails and URLs produced per handler', 'counter',
+             [({'handler': k}, v['entities_out']) for k, v in h.items()])
+        emit('extractor_stage_wall_seconds_total', 'Wall time per pipeline stage', 'counter',
+             [({'stage': k}, f"{v['wall_s']:.6f}") for k, v in self.stages.items()])
+        emit('extractor_stage_cpu_seconds_total', 'CPU time per pipeline stage', 'counter',
+             [({'stage': k}, f"{v['cpu_s']:.6f}") for k, v in self.stages.items()])
+        emit('extractor_run_wall_seconds', 'Wall time of the whole run', 'gauge',
+             [({}, f"{time.perf_counter() - self.wall_start:.6f}")])
+        # Write then rename so the node_exporter textfile collector never reads a partial file
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp, path)
+
+    def summary_lines(self):
+        lines = []
+        for handler, v in sorted(self.handlers.items(), key=lambda kv: -kv[1]['wall_s']):
+            lines.append(f"  {handler:<10} files={v['files']:<6} wall={v['wall_s']:.2f}s cpu={v['cpu_s']:.2f}s "
+                         f"in={v['bytes_in'] / 1e6:.1f}MB out={v['entities_out']}")
+        for name, v in sorted(self.stages.items(), key=lambda kv: -kv[1]['wall_s']):
+            lines.append(f"  stage {name:<8} calls={v['calls']:<8} wall={v['wall_s']:.2f}s cpu={v['cpu_s']:.2f}s")
+        return lines
+
+
+def label_value(value):
+    # Handler labels come from file extensions, which may hold any character
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def take_stages():
+    # Stage timings recorded since the last call. Forked workers call it before a task to drop what they
+    # inherited and after it to ship their own timings back with the result.
+    if not _active:
+        return {}
+    stages, _active.stages = _active.stages, {}
+    return stages
+
+def merge_stages(stages):
+    if not _active:
+        return
+    for name, v in stages.items():
+        s = _active.stages.setdefault(name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0})
+        for key in ('calls', 'wall_s', 'cpu_s'):
+            s[key] += v[key]
+
+def activate(run_metrics):
+    global _active
+    _active = run_metrics
+    return run_metrics
+
+def active():
+    return _active
+
+def stage(name):
+    return _active.stage(name) if _active else _NULL
@@ -0,0 +1,110 @@
+import re
+from functools import lru_cache
+
+# Hosts repeat far more than URLs do, so host-level work is memoized and per-URL work is string slicing
+HOST_CACHE_SIZE = 64 * 1024
+DEFAULT_PORTS = {'http': '80', 'https': '443', 'ftp': '21'}
+# Query parameters that only identify a campaign or a click, never the page itself
+TRACKING_PREFIXES = ('utm_',)
+TRACKING_PARAMS = frozenset({
+    'fbclid', 'gclid', 'dclid', 'gbraid', 'wbraid', 'msclkid', 'yclid', 'igshid', 'mc_cid', 'mc_eid',
+    '_ga', '_gl', '_hsenc', '_hsmi', 'mkt_tok', 'ref_src', 'spm',
+})
+URL_PARTS = re.compile(r'([a-zA-Z][a-zA-Z0-9+.-]*)://([^/?#\\]*)(.*)', re.S)
+
+
+def to_ascii(host):
+    # The idna package implements IDNA 2008 (what browsers resolve); the codec is the stdlib's IDNA 2003
+    try:
+        import idna
+    except ImportError:
+        return host.encode('idna').decode('ascii')
+    return idna.encode(host, uts46=True).decode('ascii')
+
+@lru_cache(maxsize=HOST_CACHE_SIZE)
+def ascii_host(host):
+    # Lowercased, without the root dot, internationalized labels in punycode; invalid names are only lowercased
+    host = host.strip().rstrip('.').lower()
+    if host.isascii():
+        return host
+    try:
+        return to_ascii(host)
+    except (UnicodeError, ValueError):
+        return host
+
+@lru_cache(maxsize=HOST_CACHE_SIZE)
+def host_key(host):
+    # What dedup and blocklists compare: www.example.com and example.com are the same site
+    host = ascii_host(host)
+    if host.startswith('www.') and '.' in host[4:]:
+        return host[4:]
+    return host
+
+@lru_cache(maxsize=HOST_CACHE_SIZE)
+def split_netloc(netloc, scheme=''):
+    # (host, port) without userinfo; the scheme's default port is dropped
+    hostport = netloc.rpartition('@')[2]
+    if hostport.startswith('['):
+        host, _, rest = hostport.partition(']')
+        host += ']'
+        port = rest[1:] if rest.startswith(':') else ''
+    else:
+        host, _, port = hostport.partition(':')
+    if port == DEFAULT_PORTS.get(scheme.lower()):
+        port = ''
+    return ascii_host(host), port
+
+def url_host(url):
+    # Canonical host of an absolute URL, '' when there is none
+    m = URL_PARTS.match(url)
+    if not m:
+        return ''
+    return host_key(split_netloc(m.group(2), m.group(1))[0])
+
+def url_netloc(url):
+    # The authority exactly as written, only lowercased: www, userinfo and port included
+    m = URL_PARTS.match(url)
+    return m.group(2).lower() if m else ''
+
+def base_url(url):
+    # scheme://host[:port] in canonical form; www is kept, since it is part of the address being reported
+    m = URL_PARTS.match(url)
+    if not m:
+        return url
+    scheme = m.group(1).lower()
+    host, port = split_netloc(m.group(2), scheme)
+    return f"{scheme}://{host}:{port}" if port else f"{scheme}://{host}"
+
+def is_tracking(param):
+    name = param.split('=', 1)[0].lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+def strip_tracking(url):
+    if '?' not in url:
+        return url
+    head, _, query = url.partition('?')
+    query, hash_sign, fragment = query.partition('#')
+    kept = [p for p in query.split('&') if p and not is_tracking(p)]
+    return head + ('?' + '&'.join(kept) if kept else '') + hash_sign + fragment
+
+def url_key(url, drop_tracking=False):
+    # Dedup key: scheme and host canonical, path and query untouched (they are case-sensitive)
+    if drop_tracking:
+        url = strip_tracking(url)
+    m = URL_PARTS.match(url)
+    if not m:
+        return url
+    scheme = m.group(1).lower()
+    host, port = split_netloc(m.group(2), scheme)
+    host = host_key(host)
+    rest = m.group(3)
+    if rest == '/':
+        rest = ''
+    return f"{scheme}://{host}:{port}{rest}" if port else f"{scheme}://{host}{rest}"
+
+def email_key(email):
+    # The local part is left as written; only the domain is case-insensitive
+    local, sep, domain = email.rpartition('@')
+    if not sep:
+        return email
+    return f"{local}@{ascii_host(domain)}"
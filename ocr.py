@@ -0,0 +1,178 @@
+import os
+import time
+import sqlite3
+import hashlib
+import tempfile
+import subprocess
+import threading
+
+OCR_LANG = 'eng'
+# tesseract ends the text of every image in a list-file run with a form feed
+PAGE_BREAK = '\f'
+OCR_CACHE_BYTES = 256 * 1024 * 1024
+# Eviction trims the cache to this share of its limit, so it does not run again on the very next insert
+OCR_CACHE_KEEP = 0.9
+
+_local = threading.local()
+_no_engine = False
+
+
+def engine():
+    # One tesserocr API per thread and process, so the language model is loaded once rather than once
+    # per image. None when tesserocr is not installed.
+    global _no_engine
+    if _no_engine:
+        return None
+    api = getattr(_local, 'api', None)
+    if api is None or _local.pid != os.getpid():
+        try:
+            from tesserocr import PyTessBaseAPI
+        except ImportError:
+            _no_engine = True
+            return None
+        api = PyTessBaseAPI(lang=OCR_LANG)
+        _local.api = api
+        _local.pid = os.getpid()
+    return api
+
+def image_key(image):
+    # Exact hash of the decoded pixels plus what changes the output, so a logo stored as PNG in one document
+    # and re-rendered in another hits the same entry as long as the pixels match
+    h = hashlib.sha256(f'{OCR_LANG}|{image.mode}|{image.size[0]}x{image.size[1]}|'.encode())
+    h.update(image.tobytes())
+    return h.hexdigest()
+
+
+# Text of already OCRed images in SQLite, shared by every worker process; least recently used entries go first
+class OcrCache:
+    def __init__(self, path, max_bytes=OCR_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.added = 0
+        self.conn = None
+        self.pid = None
+        self.lock = threading.Lock()
+
+    def connect(self):
+        # A connection must not cross a fork, so each process opens its own
+        if self.conn is None or self.pid != os.getpid():
+            self.conn = sqlite3.connect(self.path, timeout=60, check_same_thread=False, isolation_level=None)
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('CREATE TABLE IF NOT EXISTS ocr (key TEXT PRIMARY KEY, text TEXT, size INTEGER, used REAL)')
+            self.conn.execute('CREATE INDEX IF NOT EXISTS ocr_used ON ocr (used)')
+            self.pid = os.getpid()
+            self.added = 0
+        return self.conn
+
+    def get(self, key):
+        with self.lock:
+            conn = self.connect()
+            row = conn.execute('SELECT text FROM ocr WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                conn.execute('UPDATE ocr SET used = ? WHERE key = ?', (time.time(), key))
+            return row[0] if row else None
+
+    def put(self, key, text):
+        size = len(key) + len(text.encode('utf-8'))
+        with self.lock:
+            conn = self.connect()
+            conn.execute('INSERT OR REPLACE INTO ocr VALUES (?, ?, ?, ?)', (key, text, size, time.time()))
+            self.added += size
+            # Summing the table on every insert would cost more than the lookups save
+            if self.added * 16 >= self.max_bytes:
+                self.added = 0
+                self.evict(conn)
+
+    def evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM ocr').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        excess = total - self.max_bytes * OCR_CACHE_KEEP
+        doomed = []
+        for key, size in conn.execute('SELECT key, size FROM ocr ORDER BY used'):
+            doomed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany('DELETE FROM ocr WHERE key = ?', doomed)
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None and self.pid == os.getpid():
+                self.conn.close()
+            self.conn = None
+
+
+_cache = None
+
+def activate(cache):
+    global _cache
+    _cache = cache
+    return cache
+
+def active():
+    return _cache
+
+def recognize(image):
+    # In memory through tesserocr when installed, otherwise one tesseract process per image via pytesseract
+    api = engine()
+    if api is None:
+        import pytesseract
+        return pytesseract.image_to_string(image, lang=OCR_LANG)
+    api.SetImage(image)
+    return api.GetUTF8Text()
+
+def run_list_file(images):
+    # Without tesserocr, a single tesseract run reads every image named in a list file
+    import pytesseract
+    with tempfile.TemporaryDirectory() as tmp:
+        names = []
+        for i, image in enumerate(images):
+            name = os.path.join(tmp, f'{i}.png')
+            image.save(name)
+            names.append(name)
+        listing = os.path.join(tmp, 'images.txt')
+        with open(listing, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(names) + '\n')
+        try:
+            out = subprocess.run([pytesseract.pytesseract.tesseract_cmd, listing, 'stdout', '-l', OCR_LANG],
+                                 capture_output=True, check=True).stdout
+        except FileNotFoundError:
+            raise pytesseract.TesseractNotFoundError()
+        except subprocess.CalledProcessError:
+            # One unreadable image fails the whole run; the caller retries the images one by one
+            return None
+    pages = out.decode('utf-8', errors='ignore').split(PAGE_BREAK)
+    return pages[:-1] if len(pages) == len(images) + 1 else None
+
+def recognize_all(images):
+    if len(images) > 1 and engine() is None:
+        pages = run_list_file(images)
+        if pages is not None:
+            return pages
+    return [recognize(image) for image in images]
+
+def image_to_string(image):
+    return images_to_strings([image])[0]
+
+def images_to_strings(images):
+    # Repeated images (logos, signatures, letterheads) cost a hash and a lookup; only the rest reach Tesseract
+    images = list(images)
+    if _cache is None:
+        return recognize_all(images)
+    keys = [image_key(image) for image in images]
+    found = {}
+    missing = {}
+    for i, key in enumerate(keys):
+        if key in found or key in missing:
+            continue
+        text = _cache.get(key)
+        if text is None:
+            missing[key] = images[i]
+        else:
+            found[key] = text
+    if missing:
+        for key, text in zip(missing, recognize_all(list(missing.values()))):
+            found[key] = text
+            _cache.put(key, text)
+    return [found[key] for key in keys]
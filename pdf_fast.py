@@ -0,0 +1,71 @@
+import ctypes
+
+# Scanned pages are rendered at this resolution for OCR, the same as pdfplumber's to_image(resolution=300)
+OCR_DPI = 300
+
+
+def page_count(file_path):
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
+
+def page_links(pdf, page):
+    # URI actions of link annotations; these URLs are usually not in the text layer at all
+    import pypdfium2.raw as pdfium_c
+    position = ctypes.c_int(0)
+    link = pdfium_c.FPDF_LINK()
+    while pdfium_c.FPDFLink_Enumerate(page.raw, ctypes.byref(position), ctypes.byref(link)):
+        action = pdfium_c.FPDFLink_GetAction(link)
+        if not action or pdfium_c.FPDFAction_GetType(action) != pdfium_c.PDFACTION_URI:
+            continue
+        size = pdfium_c.FPDFAction_GetURIPath(pdf.raw, action, None, 0)
+        if size <= 1:
+            continue
+        buf = ctypes.create_string_buffer(size)
+        pdfium_c.FPDFAction_GetURIPath(pdf.raw, action, buf, size)
+        yield buf.value.decode('utf-8', errors='ignore')
+
+def page_strings(file_path, ocr=None, scanned=None, pages=None):
+    # Raw text runs of every page (or of the `pages` indices) straight from pdfium, no layout analysis, followed
+    # by each page's link URIs. Pages without a text layer go to ocr(image), or are only listed in `scanned`.
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        for index in (range(len(pdf)) if pages is None else pages):
+            page = pdf[index]
+            try:
+                textpage = page.get_textpage()
+                try:
+                    text = textpage.get_text_range()
+                finally:
+                    textpage.close()
+                if text.strip():
+                    yield text
+                elif scanned is not None:
+                    scanned.append(index)
+                elif ocr:
+                    yield ocr(render(page))
+                yield from page_links(pdf, page)
+            finally:
+                page.close()
+    finally:
+        pdf.close()
+
+def render(page):
+    return page.render(scale=OCR_DPI / 72).to_pil()
+
+def render_pages(file_path, indices):
+    import pypdfium2 as pdfium
+    pdf = pdfium.PdfDocument(file_path)
+    try:
+        for index in indices:
+            page = pdf[index]
+            try:
+                yield render(page)
+            finally:
+                page.close()
+    finally:
+        pdf.close()
@@ -0,0 +1,168 @@
+import os
+import json
+import math
+import time
+import random
+
+# Files measured per handler type however small the sample fraction, so rare types still get a rate
+MIN_SAMPLE = 3
+# I/O-bound samples suggest more processes than cores; never more than this many per core
+MAX_PER_CORE = 4
+
+
+def tree_size(path):
+    # A Maildir is scanned as one unit; its size is that of its messages
+    if not os.path.isdir(path):
+        return os.stat(path).st_size
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.stat(os.path.join(root, name)).st_size
+            except OSError:
+                pass
+    return total
+
+def inventory(paths, handler_of):
+    # handler -> [(path, size)], from stat data only; nothing is opened
+    groups = {}
+    for path in paths:
+        try:
+            size = tree_size(path)
+        except OSError:
+            continue
+        groups.setdefault(handler_of(path), []).append((path, size))
+    return groups
+
+def pick_sample(files, fraction, rng):
+    count = min(len(files), max(MIN_SAMPLE, math.ceil(len(files) * fraction)))
+    return rng.sample(files, count)
+
+def cpu_time():
+    # Reaped children included, so handlers that fan out to OCR or Maildir processes are charged for them
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+def unseen_estimate(seen_in, sampled_share):
+    # Good-Turing: entities found in exactly one sampled file stand for the ones the unsampled files add
+    distinct = len(seen_in)
+    if not sampled_share:
+        return distinct
+    singletons = sum(1 for count in seen_in.values() if count == 1)
+    return round(distinct + singletons * (1 / sampled_share - 1))
+
+def recommend_processes(wall_s, cpu_s, files, cores):
+    # A worker keeps a core busy cpu/wall of the time, so cores / (cpu/wall) workers saturate them
+    if not wall_s or not files:
+        return 1
+    busy = min(1.0, max(cpu_s / wall_s, 1 / MAX_PER_CORE))
+    return max(1, min(files, cores * MAX_PER_CORE, math.ceil(cores / busy)))
+
+def projected_wall(processes, wall_s, cpu_s, longest_s, cores):
+    # Bounded by the work split over the processes, by the cores, and by the single slowest file
+    return max(wall_s / processes, cpu_s / min(processes, cores), longest_s)
+
+def plan(paths, handler_of, measure, fraction, seed=0, cores=None):
+    # measure(path) -> (emails, urls) runs the real handler on one file; everything else is projected from it
+    cores = cores or os.cpu_count() or 1
+    rng = random.Random(seed)
+    groups = inventory(paths, handler_of)
+    seen = {'emails': {}, 'urls': {}}
+    handlers = {}
+    total_bytes = sampled_bytes = 0
+    for handler, files in sorted(groups.items()):
+        s = {'files': len(files), 'bytes': sum(size for _, size in files), 'sampled_files': 0, 'sampled_bytes': 0,
+             'wall_s': 0.0, 'cpu_s': 0.0, 'emails': 0, 'urls': 0, 'errors': 0, 'max_wall_s': 0.0}
+        for path, size in pick_sample(files, fraction, rng):
+            wall = time.perf_counter()
+            cpu = cpu_time()
+            try:
+                found = measure(path)
+            except Exception:
+                s['errors'] += 1
+                found = (set(), set())
+            wall = time.perf_counter() - wall
+            s['sampled_files'] += 1
+            s['sampled_bytes'] += size
+            s['wall_s'] += wall
+            s['cpu_s'] += cpu_time() - cpu
+            s['max_wall_s'] = max(s['max_wall_s'], wall)
+            for kind, entities in zip(('emails', 'urls'), found):
+                s[kind] += len(entities)
+                for entity in entities:
+                    seen[kind][entity] = seen[kind].get(entity, 0) + 1
+        # Rates are per byte; a type whose sample is all empty files is scaled by file count instead
+        scale = s['bytes'] / s['sampled_bytes'] if s['sampled_bytes'] else s['files'] / max(s['sampled_files'], 1)
+        # The biggest file of the type at the type's rate, never less than the slowest file measured: the floor
+        # on any parallel run
+        largest = max(size for _, size in files)
+        longest = s['wall_s'] * largest / s['sampled_bytes'] if s['sampled_bytes'] else 0.0
+        s.update({
+            'mb_per_s': s['sampled_bytes'] / 1e6 / s['wall_s'] if s['wall_s'] else None,
+            'emails_per_mb': s['emails'] / (s['sampled_bytes'] / 1e6) if s['sampled_bytes'] else None,
+            'projected_wall_s': s['wall_s'] * scale,
+            'projected_cpu_s': s['cpu_s'] * scale,
+            'projected_email_hits': round(s['emails'] * scale),
+            'projected_url_hits': round(s['urls'] * scale),
+            'longest_file_s': min(s['wall_s'] * scale, max(s['max_wall_s'], longest)),
+        })
+        handlers[handler] = s
+        total_bytes += s['bytes']
+        sampled_bytes += s['sampled_bytes']
+
+    files = sum(s['files'] for s in handlers.values())
+    wall_s = sum(s['projected_wall_s'] for s in handlers.values())
+    cpu_s = sum(s['projected_cpu_s'] for s in handlers.values())
+    longest_s = max((s['longest_file_s'] for s in handlers.values()), default=0.0)
+    sampled_share = sampled_bytes / total_bytes if total_bytes else 0.0
+    saturating = recommend_processes(wall_s, cpu_s, files, cores)
+    counts = sorted(p for p in {1, cores, saturating} | {2 ** i for i in range(1, 8)} if p <= max(saturating, min(cores, files)))
+    walls = {p: projected_wall(p, wall_s, cpu_s, longest_s, cores) for p in counts}
+    # Fewest processes within 5% of the best projection; past that, more workers only cost memory
+    recommended = min(p for p, wall in walls.items() if wall <= min(walls.values()) * 1.05)
+    return {
+        'fraction': fraction,
+        'seed': seed,
+        'cores': cores,
+        'files': files,
+        'bytes': total_bytes,
+        'sampled_files': sum(s['sampled_files'] for s in handlers.values()),
+        'sampled_bytes': sampled_bytes,
+        'serial_wall_s': wall_s,
+        'cpu_hours': cpu_s / 3600,
+        'longest_file_s': longest_s,
+        'expected_unique_emails': min(unseen_estimate(seen['emails'], sampled_share),
+                                      sum(s['projected_email_hits'] for s in handlers.values())),
+        'expected_unique_urls': min(unseen_estimate(seen['urls'], sampled_share),
+                                    sum(s['projected_url_hits'] for s in handlers.values())),
+        'recommended_processes': recommended,
+        'wall_s_by_processes': walls,
+        'handlers': handlers,
+    }
+
+def duration(seconds):
+    if seconds < 120:
+        return f"{seconds:.1f}s"
+    if seconds < 7200:
+        return f"{seconds / 60:.1f}min"
+    return f"{seconds / 3600:.1f}h"
+
+def summary_lines(report):
+    lines = [f"Files: {report['files']} ({report['bytes'] / 1e9:.2f} GB), sampled {report['sampled_files']} "
+             f"({report['sampled_bytes'] / 1e6:.1f} MB, fraction {report['fraction']})"]
+    for handler, s in sorted(report['handlers'].items(), key=lambda kv: -kv[1]['projected_wall_s']):
+        rate = f"{s['mb_per_s']:.2f}MB/s" if s['mb_per_s'] is not None else "-"
+        density = f"{s['emails_per_mb']:.1f}" if s['emails_per_mb'] is not None else "-"
+        lines.append(f"  {handler:<10} files={s['files']:<8} in={s['bytes'] / 1e6:.1f}MB rate={rate} "
+                     f"emails/MB={density} wall={duration(s['projected_wall_s'])} errors={s['errors']}/{s['sampled_files']}")
+    lines.append(f"Projected serial runtime: {duration(report['serial_wall_s'])}, CPU hours: {report['cpu_hours']:.2f}")
+    lines.append(f"Slowest single file: ~{duration(report['longest_file_s'])}")
+    lines.append(f"Expected unique emails: ~{report['expected_unique_emails']}, unique URLs: ~{report['expected_unique_urls']}")
+    for processes, wall in report['wall_s_by_processes'].items():
+        mark = "  <- recommended" if processes == report['recommended_processes'] else ""
+        lines.append(f"  {processes:>4} processes: {duration(wall)}{mark}")
+    return lines
+
+def write_json(report, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
@@ -0,0 +1,153 @@
+import io
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+PREFETCH_WORKERS = 4
+# Total bytes held for files the scanner has not reached yet; readers stop getting work past this
+PREFETCH_BYTES = 64 * 1024 * 1024
+# Larger files are not held in memory: only their head is kept (enough for sniffing and the UTF-8 check)
+PREFETCH_FILE_BYTES = 8 * 1024 * 1024
+HEAD_BYTES = 64 * 1024
+MAX_AHEAD = 256
+
+
+def read_ahead(path, limit):
+    # Returns (data, complete); data is None when the file could not be read
+    try:
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > limit:
+                head = f.read(HEAD_BYTES)
+                if hasattr(os, 'posix_fadvise'):
+                    os.posix_fadvise(f.fileno(), 0, limit, os.POSIX_FADV_WILLNEED)
+                return head, False
+            return f.read(), True
+    except OSError:
+        return None, False
+
+
+class Prefetcher:
+    def __init__(self, paths, max_bytes=PREFETCH_BYTES, workers=PREFETCH_WORKERS, max_file_bytes=PREFETCH_FILE_BYTES):
+        self.paths = list(paths)
+        self.position = 0
+        self.max_bytes = max_bytes
+        self.max_file_bytes = min(max_file_bytes, max_bytes)
+        self.futures = {}
+        self.sizes = {}
+        self.buffered = 0
+        self.closed = False
+        self.pid = os.getpid()
+        # Re-entrant: a read that is already finished runs its callback inside fill()
+        self.lock = threading.RLock()
+        self.executor = ThreadPoolExecutor(workers, thread_name_prefix='prefetch')
+        self.fill()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def fill(self):
+        with self.lock:
+            while (not self.closed and self.position < len(self.paths) and len(self.futures) < MAX_AHEAD
+                   and self.buffered + self.max_file_bytes <= self.max_bytes):
+                path = self.paths[self.position]
+                self.position += 1
+                if path in self.futures:
+                    continue
+                # The size is unknown until the file is opened, so reserve the cap and settle it afterwards
+                self.sizes[path] = self.max_file_bytes
+                self.buffered += self.max_file_bytes
+                future = self.executor.submit(read_ahead, path, self.max_file_bytes)
+                self.futures[path] = future
+                future.add_done_callback(lambda f, path=path: self.settle(path, f))
+
+    def extend(self, paths):
+        # For callers that learn the order of upcoming files while the scan is running
+        with self.lock:
+            self.paths.extend(paths)
+        self.fill()
+
+    def settle(self, path, future):
+        with self.lock:
+            if path not in self.sizes or future.cancelled():
+                return
+            data = future.result()[0]
+            size = len(data) if data else 0
+            self.buffered += size - self.sizes[path]
+            self.sizes[path] = size
+        self.fill()
+
+    def get(self, path):
+        # Waits for a read that is still in flight; None when the path was never queued
+        with self.lock:
+            future = self.futures.get(path)
+        if future is None or future.cancelled():
+            return None
+        return future.result()
+
+    def release(self, path):
+        with self.lock:
+            future = self.futures.pop(path, None)
+            self.buffered -= self.sizes.pop(path, 0)
+        if future is not None:
+            future.cancel()
+            self.fill()
+
+    def close(self):
+        with self.lock:
+            self.closed = True
+            self.futures.clear()
+            self.sizes.clear()
+            self.buffered = 0
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_prefetcher = None
+
+def activate(prefetcher):
+    global _prefetcher
+    _prefetcher = prefetcher
+    return prefetcher
+
+def active():
+    # Forked workers inherit the object but not its reader threads
+    if _prefetcher is not None and _prefetcher.pid == os.getpid():
+        return _prefetcher
+    return None
+
+def buffered(path):
+    # Whole contents if they were read ahead, else None
+    prefetcher = active()
+    hit = prefetcher.get(path) if prefetcher else None
+    return hit[0] if hit and hit[1] else None
+
+def read_bytes(path):
+    data = buffered(path)
+    if data is None:
+        with open(path, 'rb') as f:
+            data = f.read()
+    return data
+
+def read_text(path):
+    # Same result as open(path, 'r', encoding='utf-8', errors='ignore').read(), newline translation included
+    return io.TextIOWrapper(io.BytesIO(read_bytes(path)), encoding='utf-8', errors='ignore').read()
+
+def read_head(path, size):
+    prefetcher = active()
+    hit = prefetcher.get(path) if prefetcher else None
+    if hit and hit[0] is not None and (hit[1] or len(hit[0]) >= size):
+        return hit[0][:size]
+    with open(path, 'rb') as f:
+        return f.read(size)
+
+def source(path):
+    # For parsers that take either a path or a file object
+    data = buffered(path)
+    return io.BytesIO(data) if data is not None else path
+
+def release(path):
+    prefetcher = active()
+    if prefetcher:
+        prefetcher.release(path)
@@ -0,0 +1,90 @@
+import csv
+from array import array
+
+EMAIL = 0
+URL = 1
+KINDS = ('email', 'url')
+# Held for a hit whose byte offset in its file is not known, and exported as UNKNOWN_OFFSET
+NO_OFFSET = -1
+UNKNOWN_OFFSET = 'unknown'
+# Hits held in memory before they are appended to the CSV
+FLUSH_HITS = 100000
+HEADER = ['entity', 'kind', 'file', 'handler', 'offset']
+
+
+# Where every entity was found: one row per (entity, file) hit. Entities, paths and handler names are interned
+# in tables and each hit is four integers in parallel arrays, 18 bytes, instead of a tuple of strings. Hits are
+# appended to the CSV every flush_hits hits and on flush(), so memory stays bounded and the file grows with the scan.
+class Provenance:
+    __slots__ = ('path', 'flush_hits', 'out', 'writer', 'written', 'entities', 'entity_ids', 'entity_kinds', 'paths',
+                 'path_ids', 'handlers', 'handler_ids', 'hit_entities', 'hit_files', 'hit_handlers', 'hit_offsets')
+
+    def __init__(self, path=None, flush_hits=FLUSH_HITS):
+        self.path = path
+        self.flush_hits = flush_hits
+        self.out = None
+        self.writer = None
+        self.written = 0
+        self.entities = []
+        self.entity_ids = {}
+        self.entity_kinds = array('B')
+        self.paths = []
+        self.path_ids = {}
+        self.handlers = []
+        self.handler_ids = {}
+        self.hit_entities = array('I')
+        self.hit_files = array('I')
+        self.hit_handlers = array('H')
+        self.hit_offsets = array('q')
+
+    def __len__(self):
+        return self.written + len(self.hit_entities)
+
+    def intern(self, table, ids, value):
+        vid = ids.get(value)
+        if vid is None:
+            vid = ids[value] = len(table)
+            table.append(value)
+        return vid
+
+    def add(self, entity, kind, file_path, handler, offset=NO_OFFSET):
+        eid = self.entity_ids.get(entity)
+        if eid is None:
+            eid = self.intern(self.entities, self.entity_ids, entity)
+            self.entity_kinds.append(kind)
+        self.hit_entities.append(eid)
+        self.hit_files.append(self.intern(self.paths, self.path_ids, file_path))
+        self.hit_handlers.append(self.intern(self.handlers, self.handler_ids, handler))
+        self.hit_offsets.append(offset)
+        if len(self.hit_entities) >= self.flush_hits:
+            self.flush()
+
+    def rows(self):
+        # Resolved one hit at a time, so exporting never builds the full table of strings
+        for eid, fid, hid, offset in zip(self.hit_entities, self.hit_files, self.hit_handlers, self.hit_offsets):
+            yield (self.entities[eid], KINDS[self.entity_kinds[eid]], self.paths[fid], self.handlers[hid],
+                   UNKNOWN_OFFSET if offset == NO_OFFSET else offset)
+
+    def flush(self):
+        if not self.path or not len(self.hit_entities):
+            return
+        if self.out is None:
+            # Appended like the email and URL outputs, so a resumed run keeps the rows written before it
+            self.out = open(self.path, 'a', encoding='utf-8', newline='')
+            self.writer = csv.writer(self.out)
+            if self.out.tell() == 0:
+                self.writer.writerow(HEADER)
+        self.writer.writerows(self.rows())
+        self.out.flush()
+        self.written += len(self.hit_entities)
+        # Entity strings are only needed until their hits are written; paths and handler names stay interned
+        for hits in (self.hit_entities, self.hit_files, self.hit_handlers, self.hit_offsets, self.entity_kinds):
+            del hits[:]
+        self.entities.clear()
+        self.entity_ids.clear()
+
+    def close(self):
+        self.flush()
+        if self.out is not None:
+            self.out.close()
+            self.out = None
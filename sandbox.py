@@ -0,0 +1,182 @@
+import json
+import time
+import resource
+import tarfile
+import zipfile
+import logging
+import traceback
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import wait
+
+# Declared uncompressed size above which an archive is treated as a decompression bomb
+MAX_ARCHIVE_BYTES = 4 * 1024 ** 3
+
+OK = 'ok'
+ERROR = 'error'
+TIMEOUT = 'timeout'
+MEMORY = 'memory'
+CRASHED = 'crashed'
+
+
+def archive_uncompressed_size(archive):
+    if isinstance(archive, zipfile.ZipFile):
+        return sum(info.file_size for info in archive.infolist())
+    if isinstance(archive, tarfile.TarFile):
+        return sum(member.size for member in archive.getmembers() if member.isfile())
+    return 0
+
+def check_archive_size(archive, file_path, limit=MAX_ARCHIVE_BYTES):
+    size = archive_uncompressed_size(archive)
+    if limit and size > limit:
+        raise ValueError(f"archive {file_path} expands to {size} bytes (limit {limit}), refusing to extract")
+
+def _current_vm_bytes():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[0]) * resource.getpagesize()
+    except (OSError, ValueError):
+        return 0
+
+def _worker_main(conn, memory_mb):
+    if memory_mb:
+        # The cap is headroom on top of what the forked worker already maps
+        limit = _current_vm_bytes() + memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            return
+        if task is None:
+            return
+        func, args = task
+        try:
+            conn.send((OK, func(*args)))
+        except MemoryError:
+            try:
+                conn.send((MEMORY, 'memory limit exceeded'))
+            finally:
+                return
+        except Exception as e:
+            conn.send((ERROR, f"{e.__class__.__name__}: {e}\n{traceback.format_exc(limit=3)}"))
+
+
+class _Worker:
+    def __init__(self, ctx, memory_mb):
+        self.conn, child_conn = ctx.Pipe()
+        self.process = ctx.Process(target=_worker_main, args=(child_conn, memory_mb), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.task = None
+        self.deadline = None
+        self.started = None
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class SandboxPool:
+    def __init__(self, workers=1, timeout=None, memory_mb=None, quarantine_file=None):
+        methods = multiprocessing.get_all_start_methods()
+        # fork lets tasks refer to functions of a script run as __main__ and to state set up before the pool
+        self.ctx = multiprocessing.get_context('fork' if 'fork' in methods else None)
+        self.size = max(1, workers)
+        self.timeout = timeout
+        self.memory_mb = memory_mb
+        self.quarantine_file = quarantine_file
+        self.quarantined = []
+        self.pending = deque()
+        self.workers = []
+
+    def submit(self, key, func, *args):
+        self.pending.append((key, func, args))
+
+    def _spawn(self):
+        worker = _Worker(self.ctx, self.memory_mb)
+        self.workers.append(worker)
+        return worker
+
+    def _dispatch(self):
+        while self.pending:
+            idle = [w for w in self.workers if w.task is None]
+            if not idle:
+                if len(self.workers) >= self.size:
+                    return
+                idle = [self._spawn()]
+            worker = idle[0]
+            key, func, args = self.pending.popleft()
+            worker.task = key
+            worker.started = time.monotonic()
+            worker.deadline = worker.started + self.timeout if self.timeout else None
+            worker.conn.send((func, args))
+
+    def _recycle(self, worker):
+        worker.kill()
+        self.workers.remove(worker)
+
+    def quarantine(self, key, reason, seconds):
+        entry = {'path': key, 'reason': reason, 'seconds': round(seconds, 3), 'time': time.strftime('%Y-%m-%dT%H:%M:%S')}
+        self.quarantined.append(entry)
+        logging.error(f"Quarantined {key}: {reason} after {seconds:.1f}s")
+        if self.quarantine_file:
+            with open(self.quarantine_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry) + '\n')
+
+    def as_completed(self):
+        # Tasks submitted while iterating are picked up too, so archive members can be queued on the fly
+        while True:
+            self._dispatch()
+            busy = [w for w in self.workers if w.task is not None]
+            if not busy:
+                return
+            deadlines = [w.deadline for w in busy if w.deadline]
+            wait_for = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+            ready = wait([w.conn for w in busy], timeout=wait_for)
+            now = time.monotonic()
+            for worker in busy:
+                key, elapsed = worker.task, now - worker.started
+                if worker.conn in ready:
+                    try:
+                        status, value = worker.conn.recv()
+                    except (EOFError, OSError):
+                        worker.process.join(timeout=1)
+                        status, value = CRASHED, f"worker exited with code {worker.process.exitcode}"
+                    worker.task = None
+                    if status in (OK, ERROR):
+                        yield key, status, value
+                        continue
+                    self._recycle(worker)
+                    self.quarantine(key, status if status == MEMORY else f"{status}: {value}", elapsed)
+                    yield key, status, value
+                elif worker.deadline and now >= worker.deadline:
+                    worker.task = None
+                    self._recycle(worker)
+                    self.quarantine(key, TIMEOUT, elapsed)
+                    yield key, TIMEOUT, None
+
+    def run(self, key, func, *args):
+        self.submit(key, func, *args)
+        for _, status, value in self.as_completed():
+            return status, value
+
+    def close(self):
+        for worker in self.workers:
+            try:
+                worker.conn.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+        for worker in self.workers:
+            worker.process.join(timeout=1)
+            if worker.process.is_alive():
+                worker.process.kill()
+            worker.conn.close()
+        self.workers = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,181 @@
+import os
+import json
+from mailbox_reader import is_mbox
+from prefetch import read_head
+
+# Only this much of each file is read to decide what it really is
+SNIFF_BYTES = 8192
+
+TEXT = 'text'
+BINARY = 'binary'
+EMPTY = 'empty'
+SQLITE = 'sqlite'
+PDF = 'pdf'
+IMAGE = 'image'
+ZIP = 'zip'
+GZIP = 'gzip'
+TAR = 'tar'
+RAR = 'rar'
+SEVENZIP = '7z'
+OLE = 'ole'
+RTF = 'rtf'
+MDB = 'mdb'
+MBOX = 'mbox'
+PST = 'pst'
+
+MAGIC = [
+    (0, b'SQLite format 3\x00', SQLITE),
+    (0, b'%PDF-', PDF),
+    (0, b'PK\x03\x04', ZIP),
+    (0, b'PK\x05\x06', ZIP),
+    (0, b'\x1f\x8b', GZIP),
+    (257, b'ustar', TAR),
+    (0, b'Rar!\x1a\x07', RAR),
+    (0, b"7z\xbc\xaf'\x1c", SEVENZIP),
+    (0, b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', OLE),
+    (4, b'Standard Jet DB', MDB),
+    (4, b'Standard ACE DB', MDB),
+    (0, b'{\\rtf', RTF),
+    (0, b'!BDN', PST),
+    (0, b'\x89PNG\r\n\x1a\n', IMAGE),
+    (0, b'\xff\xd8\xff', IMAGE),
+    (0, b'GIF87a', IMAGE),
+    (0, b'GIF89a', IMAGE),
+    (0, b'II*\x00', IMAGE),
+    (0, b'MM\x00*', IMAGE),
+]
+
+TEXT_BOMS = (b'\xef\xbb\xbf', b'\xff\xfe', b'\xfe\xff')
+# Bytes below 0x20 that still show up in ordinary text files
+TEXT_CONTROLS = set(b'\t\n\r\f\b\x1b')
+MAX_CONTROL_RATIO = 0.1
+# UTF-16 without a BOM: ASCII-range text leaves at least this share of one byte lane zero
+UTF16_ZERO_RATIO = 0.7
+
+# Text handlers already find addresses in an mbox saved as .txt; only mislabeled binaries get rerouted to it
+_TEXT = (TEXT, MBOX)
+_OOXML = (ZIP,)
+_ARCHIVE = (ZIP, GZIP, TAR, RAR)
+# Kinds each extension's own handler can parse; anything else is routed by content instead
+EXTENSION_KINDS = {
+    '.txt': _TEXT, '.log': _TEXT, '.ini': _TEXT, '.inf': _TEXT, '.html': _TEXT, '.htm': _TEXT,
+    '.asp': _TEXT, '.aspx': _TEXT, '.php': _TEXT, '.js': _TEXT, '.json': _TEXT, '.xml': _TEXT,
+    '.yaml': _TEXT, '.yml': _TEXT, '.md': _TEXT, '.csv': _TEXT, '.sql': _TEXT, '.eml': _TEXT,
+    '.mbox': (MBOX, TEXT, EMPTY), '.pst': (PST,), '.ost': (PST,),
+    '.xls': (OLE,), '.doc': (OLE,), '.ppt': (OLE,), '.msg': (OLE,),
+    '.xlsx': _OOXML, '.xlsm': _OOXML, '.docx': _OOXML, '.docm': _OOXML, '.pptx': _OOXML,
+    '.odt': _OOXML, '.ods': _OOXML,
+    '.rtf': (RTF, TEXT),
+    '.pdf': (PDF,),
+    '.jpg': (IMAGE,), '.jpeg': (IMAGE,), '.png': (IMAGE,), '.bmp': (IMAGE,), '.tiff': (IMAGE,), '.gif': (IMAGE,),
+    '.sqlite': (SQLITE,), '.sqlite3': (SQLITE,), '.db': (SQLITE,),
+    '.mdb': (MDB,), '.accdb': (MDB,),
+    # Pre-POSIX tar files carry no magic at all
+    '.zip': _ARCHIVE, '.tar': _ARCHIVE + (BINARY,), '.gz': _ARCHIVE, '.rar': _ARCHIVE,
+}
+
+ARCHIVE_KINDS = {ZIP, GZIP, TAR, RAR}
+
+
+def utf16_encoding(head):
+    # 'utf-16-le' or 'utf-16-be' for BOM-less UTF-16 text, None for anything else
+    pairs = len(head) // 2
+    if pairs < 4:
+        return None
+    even = head[0:2 * pairs:2].count(0)
+    odd = head[1:2 * pairs:2].count(0)
+    if odd >= pairs * UTF16_ZERO_RATIO and odd > even:
+        encoding = 'utf-16-le'
+    elif even >= pairs * UTF16_ZERO_RATIO and even > odd:
+        encoding = 'utf-16-be'
+    else:
+        return None
+    text = head[:2 * pairs].decode(encoding, errors='replace')
+    controls = sum(1 for c in text if (ord(c) < 0x20 and ord(c) not in TEXT_CONTROLS) or c == '\ufffd')
+    return encoding if controls <= len(text) * MAX_CONTROL_RATIO else None
+
+def sniff_bytes(head):
+    if not head:
+        return EMPTY
+    for offset, magic, kind in MAGIC:
+        if head.startswith(magic, offset):
+            return kind
+    if head[:2] == b'BM' and head[6:10] == b'\x00\x00\x00\x00':
+        return IMAGE
+    if head[:4] == b'RIFF' and head[8:12] == b'WEBP':
+        return IMAGE
+    if head.startswith(TEXT_BOMS):
+        return TEXT
+    if b'\x00' in head:
+        return TEXT if utf16_encoding(head) else BINARY
+    # Some PDF writers put junk before the header; only trust that when the rest does not look like text
+    controls = sum(1 for b in head if b < 0x20 and b not in TEXT_CONTROLS)
+    if controls > len(head) * MAX_CONTROL_RATIO:
+        return PDF if head.find(b'%PDF-', 0, 1024) != -1 else BINARY
+    return MBOX if is_mbox(head) else TEXT
+
+def sniff_file(file_path):
+    return sniff_bytes(read_head(file_path, SNIFF_BYTES))
+
+
+# Per-file facts keyed by absolute path; an entry is dropped as soon as size or mtime change
+class MetadataCache:
+    def __init__(self, path=None):
+        self.path = path
+        self.entries = {}
+        self.dirty = False
+        if path and os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except (OSError, ValueError):
+                self.entries = {}
+
+    def get(self, file_path):
+        st = os.stat(file_path)
+        key = os.path.abspath(file_path)
+        entry = self.entries.get(key)
+        if entry is None or entry.get('size') != st.st_size or entry.get('mtime_ns') != st.st_mtime_ns:
+            entry = {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+            self.entries[key] = entry
+            self.dirty = True
+        return entry
+
+    def update(self, file_path, **fields):
+        self.get(file_path).update(fields)
+        self.dirty = True
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp, self.path)
+        self.dirty = False
+
+
+_cache = None
+
+def activate(cache):
+    global _cache
+    _cache = cache
+    return cache
+
+def active():
+    return _cache
+
+def kind_of(file_path, cached=True):
+    if _cache is None or not cached:
+        return sniff_file(file_path)
+    entry = _cache.get(file_path)
+    if 'kind' not in entry:
+        entry['kind'] = sniff_file(file_path)
+        _cache.dirty = True
+    return entry['kind']
+
+def route(file_path, cached=True):
+    # Returns the sniffed kind and whether the extension's own handler can parse it
+    kind = kind_of(file_path, cached)
+    expected = EXTENSION_KINDS.get(os.path.splitext(file_path)[1].lower())
+    return kind, bool(expected) and kind in expected
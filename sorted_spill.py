@@ -0,0 +1,89 @@
+import os
+import heapq
+import tempfile
+
+# Distinct items held in memory before they are written out as a sorted run
+SPILL_ITEMS = 1000000
+# Runs merged at once; past this many, the oldest are merged into one while the scan is still going
+MERGE_FANIN = 32
+
+
+def read_run(f):
+    for line in f:
+        yield line[:-1]
+
+def merge_into(path, runs, extra=()):
+    # k-way merge of sorted runs (and one sorted in-memory list), dropping repeats across runs
+    files = [open(run, 'r', encoding='utf-8', newline='\n') for run in runs]
+    try:
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8', newline='\n') as out:
+            last = None
+            for item in heapq.merge(*(read_run(f) for f in files), extra):
+                if item != last:
+                    out.write(item + '\n')
+                    last = item
+        os.replace(tmp, path)
+    finally:
+        for f in files:
+            f.close()
+
+
+# Sorted, deduplicated line output in bounded memory: items are kept in a set until SPILL_ITEMS, written as a
+# sorted run, and the runs are merged into the output file on close. Items must not contain newlines.
+class SortedSpillWriter:
+    def __init__(self, path, max_items=SPILL_ITEMS, tmp_dir=None):
+        self.path = path
+        self.max_items = max_items
+        self.tmp_dir = tmp_dir or os.path.dirname(os.path.abspath(path))
+        self.items = set()
+        self.runs = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def add(self, item):
+        # True unless the item is already in the current run; earlier runs are on disk and not checked
+        if item in self.items:
+            return False
+        self.items.add(item)
+        if len(self.items) >= self.max_items:
+            self.spill()
+        return True
+
+    def new_run(self):
+        fd, name = tempfile.mkstemp(prefix='spill-', suffix='.txt', dir=self.tmp_dir)
+        os.close(fd)
+        self.runs.append(name)
+        return name
+
+    def spill(self):
+        name = self.new_run()
+        with open(name, 'w', encoding='utf-8', newline='\n') as f:
+            for item in sorted(self.items):
+                f.write(item + '\n')
+        self.items = set()
+        if len(self.runs) >= MERGE_FANIN:
+            oldest, self.runs = self.runs, []
+            merge_into(self.new_run(), oldest)
+            self.discard(oldest)
+
+    def discard(self, runs):
+        for run in runs:
+            try:
+                os.remove(run)
+            except OSError:
+                pass
+
+    def close(self):
+        if self.runs is None:
+            return
+        try:
+            merge_into(self.path, self.runs, sorted(self.items))
+        finally:
+            self.discard(self.runs)
+            self.runs = None
+            self.items = set()
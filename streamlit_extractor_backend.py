@@ -1,34 +1,35 @@
 import os
 import re
-import csv
 import json
 import time
 import logging
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
 import tldextract
-import idna
-from urllib.parse import urlparse
 import requests
+import normalize
+from sorted_spill import SortedSpillWriter, SPILL_ITEMS
+from domain_map import DomainMap
+from fingerprint import DuplicateGroups
+import prefetch
 
 CHECKPOINT_FILE = 'checkpoint.json'
 
-def idna_email(email):
-    if '@' in email:
-        local, domain = email.rsplit('@', 1)
-        try:
-            domain_idna = idna.encode(domain).decode('ascii')
-            return f"{local}@{domain_idna}"
-        except Exception:
-            return email  # fallback: return as-is if IDNA fails
-    return email
+@lru_cache(maxsize=normalize.HOST_CACHE_SIZE)
+def host_parts(host):
+    # The public-suffix lookup runs once per host instead of once per URL
+    return tldextract.extract(host)
 
 def get_root_domain(url):
-    ext = tldextract.extract(url)
+    ext = host_parts(normalize.url_host(url))
     if not ext.domain or not ext.suffix:
         return None
     return f"{ext.domain}.{ext.suffix}"
 
 def get_subdomain(url):
-    ext = tldextract.extract(url)
+    ext = host_parts(normalize.url_host(url))
     if ext.subdomain:
         return f"{ext.subdomain}.{ext.domain}.{ext.suffix}"
     elif ext.domain and ext.suffix:
@@ -36,11 +37,6 @@ def get_subdomain(url):
     else:
         return None
 
-def get_clean_base_url(url):
-    parsed = urlparse(url)
-    netloc = parsed.netloc.encode('idna').decode('utf-8')  # IDN support
-    return f"{parsed.scheme}://{netloc}"
-
 def extract_urls(text, url_regex=None):
     urls = set()
     # Use custom regex if provided
@@ -84,8 +80,7 @@ def get_all_files(folder, include_ext=None, exclude_ext=None):
 
 def read_text_file(path):
     try:
-        with open(path, 'r', encoding='utf-8', errors='ignore') as f:
-            return f.read()
+        return prefetch.read_text(path)
     except Exception:
         return ''
 
@@ -96,6 +91,79 @@ def validate_url_status(url, timeout=5):
     except Exception:
         return False
 
+def process_path(path, email_regex=None, url_regex=None, validate_urls=False, stop_event=None):
+    # Runs inside pool workers; skip queued work once the user pressed stop
+    if stop_event is not None and stop_event.is_set():
+        return None
+    text = read_text_file(path)
+    emails = {normalize.email_key(e) for e in extract_emails(text, email_regex)}
+    base_urls = set()
+    rejected = []
+    for url in extract_urls(text, url_regex):
+        base_url = normalize.base_url(url)
+        if validate_urls and not validate_url_status(base_url):
+            rejected.append(base_url)
+            continue
+        base_urls.add(base_url)
+    return path, emails, base_urls, rejected
+
+def iter_results(groups, processes, ordered, stop_signal, **kwargs):
+    # groups is a fingerprint.DuplicateGroups; each payload's first path is scanned once it is settled
+    if processes <= 1:
+        # Upcoming files are read by background threads while the current one is scanned
+        with prefetch.activate(prefetch.Prefetcher([])) as prefetcher:
+            try:
+                for batch in groups.batches(lambda: stop_signal[0]):
+                    prefetcher.extend(batch)
+                    for path in batch:
+                        if stop_signal[0]:
+                            return
+                        yield process_path(path, **kwargs)
+                        prefetch.release(path)
+            finally:
+                prefetch.activate(None)
+        return
+    manager = multiprocessing.Manager()
+    stop_event = manager.Event()
+    window = processes * 4
+    pending = deque()
+    queued = deque()
+    try:
+        with ProcessPoolExecutor(max_workers=processes) as executor:
+            def refill():
+                queued.extend(groups.ready())
+                while len(pending) < window and queued:
+                    pending.append(executor.submit(process_path, queued.popleft(), stop_event=stop_event, **kwargs))
+
+            refill()
+            while pending or queued or not groups.done:
+                if stop_signal[0]:
+                    stop_event.set()
+                    for future in pending:
+                        future.cancel()
+                    return
+                if not pending:
+                    # Everything settled so far is done; the rest is still being hashed
+                    groups.wait(0.5)
+                    refill()
+                    continue
+                if ordered:
+                    # Results stay in submission order, but a slow head file must not hold up the stop button
+                    done, _ = wait([pending[0]], timeout=0.5)
+                    if done:
+                        pending.popleft()
+                else:
+                    done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        pending.remove(future)
+                refill()
+                for future in done:
+                    result = future.result()
+                    if result is not None:
+                        yield result
+    finally:
+        manager.shutdown()
+
 def load_checkpoint():
     if os.path.exists(CHECKPOINT_FILE):
         with open(CHECKPOINT_FILE, 'r', encoding='utf-8') as f:
@@ -126,14 +194,25 @@ def real_extractor(
     url_callback,
     stop_signal,
     url_regex=None,
-    email_regex=None
+    email_regex=None,
+    ordered=False,
+    spill_items=SPILL_ITEMS
 ):
     # Prepare sets for deduplication
     all_emails = set()
-    all_urls = set()
-    domain_to_urls = dict()
-    subdomain_to_urls = dict()
-    rootdomain_to_urls = dict()
+    # With spill_items (0 or None keeps everything in memory), sorted output is built from sorted runs on disk
+    # instead of sets held to the end
+    email_spill = url_spill = None
+    if spill_items:
+        email_spill = SortedSpillWriter(os.path.join(output_folder, email_file), spill_items)
+        if url_mode == "all":
+            url_spill = SortedSpillWriter(os.path.join(output_folder, url_file), spill_items)
+    # Every URL once, plus the root/subdomain groups the export and mapping file are built from. When spilling in
+    # the grouped modes without a mapping file, only each group's first URL is kept, and the callback is deduped
+    # against a bounded set of recent URLs: like emails, it may see a URL again.
+    lean_map = bool(spill_items) and url_mode != "all" and not (enable_mapping and map_file)
+    domain_map = DomainMap(keep_postings=bool(enable_mapping and map_file), keep_urls=not lean_map)
+    recent_urls = set() if lean_map else None
     processed_files = load_checkpoint() if checkpointing else set()
 
     # File extension normalization
@@ -145,82 +224,82 @@ def real_extractor(
     log_callback(f"Found {total_files} files to process.")
 
     t0 = time.time()
-    for i, path in enumerate(files):
-        if stop_signal[0]:
-            log_callback(f"Extraction stopped by user at file {i+1}.")
-            break
-        text = read_text_file(path)
-        emails = extract_emails(text, email_regex)
-        emails = {idna_email(e) for e in emails}
+    # Identical copies are parsed once; checkpointing still records every path holding the payload. Files that
+    # share their size are hashed in the background while the others are already being scanned.
+    groups = DuplicateGroups(files)
+    copies = groups.copies
+    results = iter_results(
+        groups, int(processes or 1), ordered, stop_signal,
+        email_regex=email_regex, url_regex=url_regex, validate_urls=validate_urls
+    )
+    i = -1
+    for i, (path, emails, valid_urls, rejected) in enumerate(results):
+        for base_url in rejected:
+            log_callback(f"URL failed validation (not live): {base_url} (from {path})")
         # Filtering by blocklist/disposable can be added here if needed
         for e in emails:
-            if e not in all_emails:
+            if email_spill:
+                # Only the current run is checked, so the callback may see an address again after a spill
+                if email_spill.add(e):
+                    email_callback(e)
+            elif e not in all_emails:
                 all_emails.add(e)
                 email_callback(e)
-        urls = extract_urls(text, url_regex)
-        valid_urls = set()
-        for url in urls:
-            base_url = get_clean_base_url(url)
-            if validate_urls and not validate_url_status(base_url):
-                log_callback(f"URL failed validation (not live): {base_url} (from {path})")
-                continue
-            valid_urls.add(base_url)
         for url in valid_urls:
-            if url not in all_urls:
-                all_urls.add(url)
+            if url_spill:
+                if url_spill.add(url):
+                    url_callback(url)
+                # The spill files are the URL export; the map is only needed for a mapping file
+                if not enable_mapping or url in domain_map:
+                    continue
+            elif recent_urls is not None:
+                if url in recent_urls:
+                    continue
+                if len(recent_urls) >= spill_items:
+                    recent_urls.clear()
+                recent_urls.add(url)
                 url_callback(url)
-        # Mapping logic
-        for url in valid_urls:
-            root = get_root_domain(url)
-            subd = get_subdomain(url)
-            if root:
-                rootdomain_to_urls.setdefault(root, set()).add(url)
-            if subd:
-                subdomain_to_urls.setdefault(subd, set()).add(url)
-            domain_to_urls.setdefault(url, set()).add(url)
+            elif url in domain_map:
+                continue
+            else:
+                url_callback(url)
+            domain_map.add(url, get_root_domain(url), get_subdomain(url))
         if checkpointing:
-            processed_files.add(path)
+            processed_files.update(copies.get(path, [path]))
             save_checkpoint(processed_files)
         if i % 10 == 0:
             log_callback(f"Processed {i+1}/{total_files} files...")
+    groups.close()
+    if groups.skipped:
+        log_callback(f"Skipped {groups.skipped} identical copies of other files.")
+    if stop_signal[0]:
+        log_callback(f"Extraction stopped by user after {i+1} files.")
 
     t1 = time.time()
-    export_urls = set()
-    if url_mode == "root":
-        for urls in rootdomain_to_urls.values():
-            export_urls.add(next(iter(urls)))
-    elif url_mode == "subdomain":
-        for urls in subdomain_to_urls.values():
-            export_urls.add(next(iter(urls)))
-    elif url_mode == "all":
-        export_urls = set(domain_to_urls.keys())
-
-    # Mapping output (if enabled)
+
+    # Mapping output (if enabled), streamed group by group
     if enable_mapping and map_file:
-        mapping = {}
-        if url_mode == "root":
-            mapping = {k: list(v) for k, v in rootdomain_to_urls.items()}
-        elif url_mode == "subdomain":
-            mapping = {k: list(v) for k, v in subdomain_to_urls.items()}
-        elif url_mode == "all":
-            mapping = {k: list(v) for k, v in domain_to_urls.items()}
         with open(os.path.join(output_folder, map_file), 'w', encoding='utf-8') as mf:
             if map_file.endswith('.json'):
-                json.dump(mapping, mf, indent=2)
+                domain_map.write_json(mf, url_mode)
             else:
-                writer = csv.writer(mf)
-                writer.writerow(['Domain/Subdomain', 'URLs'])
-                for k, v in mapping.items():
-                    writer.writerow([k, "; ".join(v)])
+                domain_map.write_csv(mf, url_mode)
         log_callback(f"Mapping written to: {os.path.join(output_folder, map_file)}")
 
     # Save results
-    with open(os.path.join(output_folder, email_file), 'w', encoding='utf-8') as ef:
-        for e in sorted(all_emails):
-            ef.write(e + '\n')
-    with open(os.path.join(output_folder, url_file), 'w', encoding='utf-8') as uf:
-        for u in sorted(export_urls):
-            uf.write(u + '\n')
+    if email_spill:
+        email_spill.close()
+    else:
+        with open(os.path.join(output_folder, email_file), 'w', encoding='utf-8') as ef:
+            for e in sorted(all_emails):
+                ef.write(e + '\n')
+    if url_spill:
+        url_spill.close()
+    else:
+        with open(os.path.join(output_folder, url_file), 'w', encoding='utf-8') as uf:
+            # The first URL seen for each root/subdomain (every URL in "all" mode)
+            for u in sorted(domain_map.export_urls(url_mode)):
+                uf.write(u + '\n')
     log_callback(f"Emails written to: {os.path.join(output_folder, email_file)}")
     log_callback(f"URLs written to: {os.path.join(output_folder, url_file)}")
     elapsed = t1 - t0
@@ -0,0 +1,108 @@
+import os
+import sys
+import time
+import threading
+from http.server import ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import distributed
+
+
+@pytest.fixture
+def share(tmp_path):
+    folder = tmp_path / 'share'
+    folder.mkdir()
+    for i in range(5):
+        (folder / f"f{i}.txt").write_text(f"write to person{i}@firm{i}.com\n", encoding='utf-8')
+    return folder
+
+
+def coordinator_for(share, tmp_path, **kwargs):
+    return distributed.Coordinator(str(share), str(tmp_path / 'e.txt'), str(tmp_path / 'u.txt'),
+                                   str(tmp_path / 'checkpoint.jsonl'), **kwargs)
+
+
+def serve(coordinator):
+    server = ThreadingHTTPServer(('127.0.0.1', 0), distributed.make_handler(coordinator))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+def test_lease_result_and_done(share, tmp_path):
+    coordinator = coordinator_for(share, tmp_path, batch_size=3)
+    first = coordinator.lease('w1')
+    second = coordinator.lease('w2')
+    assert len(first['paths']) == 3 and len(second['paths']) == 2
+    assert coordinator.lease('w3') == {'done': False, 'paths': [], 'root': coordinator.folder}
+    for lease in (first, second):
+        for path in lease['paths']:
+            assert coordinator.result(lease['lease'], 'w', path, ['A@Corp.com'], [])['accepted']
+    assert coordinator.finished.is_set()
+    assert not coordinator.all_released()
+    for worker in ('w1', 'w2', 'w3'):
+        assert coordinator.lease(worker)['done']
+    assert coordinator.all_released()
+    coordinator.close()
+    assert open(tmp_path / 'e.txt').read() == 'A@corp.com\n'
+
+
+def test_expired_lease_is_requeued_and_its_late_result_rejected(share, tmp_path):
+    coordinator = coordinator_for(share, tmp_path, batch_size=5, lease_timeout=0.01)
+    stale = coordinator.lease('slow')
+    time.sleep(0.05)
+    fresh = coordinator.lease('fast')
+    assert sorted(fresh['paths']) == sorted(stale['paths'])
+    assert not coordinator.result(stale['lease'], 'slow', stale['paths'][0], [], [])['accepted']
+    assert coordinator.result(fresh['lease'], 'fast', fresh['paths'][0], [], [])['accepted']
+    coordinator.close()
+
+
+def test_restarted_coordinator_skips_checkpointed_files(share, tmp_path):
+    coordinator = coordinator_for(share, tmp_path, batch_size=2)
+    lease = coordinator.lease('w')
+    for path in lease['paths']:
+        coordinator.result(lease['lease'], 'w', path, [], [])
+    coordinator.close()
+    restarted = coordinator_for(share, tmp_path)
+    assert len(restarted.queue) == 3
+    restarted.close()
+
+
+def test_worker_scans_everything_over_http(share, tmp_path):
+    coordinator = coordinator_for(share, tmp_path, batch_size=2)
+    server, url = serve(coordinator)
+    try:
+        processed = distributed.run_worker(url, os.devnull, os.devnull, worker_id='w', poll_interval=0.05)
+    finally:
+        server.shutdown()
+        coordinator.close()
+    assert processed == 5
+    assert coordinator.all_released()
+    assert sorted(open(tmp_path / 'e.txt').read().split()) == sorted(f"person{i}@firm{i}.com" for i in range(5))
+
+
+def test_idle_worker_exits_cleanly_when_the_coordinator_is_gone(share, tmp_path):
+    coordinator = coordinator_for(share, tmp_path, batch_size=5)
+    server, url = serve(coordinator)
+    lease = coordinator.lease('busy')
+    outcome = {}
+
+    def idle_worker():
+        try:
+            outcome['processed'] = distributed.run_worker(url, os.devnull, os.devnull, worker_id='idle', poll_interval=0.2)
+        except Exception as e:
+            outcome['error'] = e
+
+    thread = threading.Thread(target=idle_worker)
+    thread.start()
+    time.sleep(0.1)
+    for path in lease['paths']:
+        coordinator.result(lease['lease'], 'busy', path, [], [])
+    # The coordinator goes away while the idle worker is in its poll backoff
+    server.shutdown()
+    server.server_close()
+    thread.join(10)
+    coordinator.close()
+    assert outcome == {'processed': 0}
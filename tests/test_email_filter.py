@@ -0,0 +1,67 @@
+import os
+import sys
+import random
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from email_filter import EmailFilter, BATCH_MIN_SIZE, FORBIDDEN_WORDS
+
+DISPOSABLE = {'mailinator.com', 'trashmail.de', 'tempr.email'}
+LOCAL_PARTS = ['john', 'J.Doe', 'sales+eu', 'USER', 'noreply', 'x_test_y', 'İstanbul', 'ẞtraße', 'a', '9lives', 'DemoTeam']
+DOMAINS = ['corp.com', 'MAILINATOR.COM', 'trashmail.de', 'tempr.email', 'example.org', 'logo.png', 'Scan.PDF',
+           '123.net', '9corp.io', 'sub.corp.co.uk', 'tempr.email:25', 'corp.com/path', 'ÉCOLE.fr', 'samplehost.net']
+
+
+def random_email(rng):
+    local = rng.choice(LOCAL_PARTS)
+    if rng.random() < 0.3:
+        local += rng.choice(FORBIDDEN_WORDS).upper() if rng.random() < 0.5 else rng.choice(FORBIDDEN_WORDS)
+    domain = rng.choice(DOMAINS)
+    if rng.random() < 0.1:
+        # Words straddling the '@' must not leak into the neighbouring line's verdict
+        return local + 'us@er' + domain
+    return f"{local}@{domain}"
+
+
+def assert_same(email_filter, candidates):
+    assert email_filter.classify_batch(candidates) == [email_filter.classify_one(c) for c in candidates]
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_batch_matches_scalar_on_random_candidates(seed):
+    rng = random.Random(seed)
+    email_filter = EmailFilter(DISPOSABLE)
+    candidates = [random_email(rng) for _ in range(rng.randint(BATCH_MIN_SIZE, 8 * BATCH_MIN_SIZE))]
+    assert_same(email_filter, candidates)
+
+
+@pytest.mark.parametrize('candidates', [
+    [],
+    ['user@corp.com'],
+    ['john@corp.com'] * (BATCH_MIN_SIZE - 1),
+    ['john@corp.com'] * BATCH_MIN_SIZE + ['USER@corp.com'],
+    # Forbidden word at the very start and the very end of the joined buffer
+    ['test@corp.com'] + ['john@corp.com'] * BATCH_MIN_SIZE + ['john@corp.demo'],
+    # A candidate with a line break falls back to the scalar rules
+    ['jo\nhn@corp.com'] + ['john@corp.com'] * BATCH_MIN_SIZE,
+    # Lowercasing changes the length of these strings
+    ['İİİ@corp.com', 'ẞ@samplehost.net'] * BATCH_MIN_SIZE,
+    ['noemail', '@corp.com', 'john@', ''] * BATCH_MIN_SIZE,
+])
+def test_batch_matches_scalar_on_edge_cases(candidates):
+    assert_same(EmailFilter(DISPOSABLE), candidates)
+
+
+@pytest.mark.parametrize('forbidden_words', [[], ['a@b'], ['corp'], ['.com'], ['Sales', 'DEMO', 'Corp']])
+def test_batch_matches_scalar_with_custom_words(forbidden_words):
+    rng = random.Random(7)
+    email_filter = EmailFilter(DISPOSABLE, forbidden_words=forbidden_words)
+    assert_same(email_filter, [random_email(rng) for _ in range(4 * BATCH_MIN_SIZE)])
+
+
+def test_mixed_case_forbidden_words_match_any_case():
+    email_filter = EmailFilter(DISPOSABLE, forbidden_words=['Sales'])
+    assert email_filter.classify_one('SALES@corp.com') == 'forbidden'
+    assert email_filter.classify_one('sales@corp.com') == 'forbidden'
+    assert email_filter.classify_batch(['sales@corp.com'] * BATCH_MIN_SIZE) == ['forbidden'] * BATCH_MIN_SIZE
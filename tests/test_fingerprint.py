@@ -0,0 +1,69 @@
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import fingerprint
+from fingerprint import DuplicateGroups, FingerprintIndex
+
+
+def write(folder, name, data):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def settle(groups, timeout=10):
+    deadline = time.monotonic() + timeout
+    firsts = []
+    while not groups.done:
+        assert time.monotonic() < deadline, 'duplicate groups never settled'
+        groups.wait(0.1)
+        firsts.extend(groups.ready())
+    groups.close()
+    return firsts
+
+
+def test_identical_files_are_grouped_under_the_first_path(tmp_path):
+    a = write(tmp_path, 'a.txt', b'same payload')
+    b = write(tmp_path, 'b.txt', b'same payload')
+    c = write(tmp_path, 'c.txt', b'other payloa')
+    d = write(tmp_path, 'd.txt', b'unique size, scanned at once')
+    groups = DuplicateGroups([a, b, c, d])
+    firsts = settle(groups)
+    assert sorted(firsts) == sorted([a, c, d])
+    assert groups.copies[a] == [a, b]
+    assert groups.copies[c] == [c]
+    assert groups.skipped == 1
+
+
+def test_a_failing_digest_still_settles_its_bucket(tmp_path, monkeypatch):
+    a = write(tmp_path, 'a.txt', b'same payload')
+    b = write(tmp_path, 'b.txt', b'same payload')
+    c = write(tmp_path, 'c.txt', b'same payload')
+    real = fingerprint.cached_digest
+
+    def flaky(path):
+        if path == b:
+            raise ValueError('corrupt metadata cache entry')
+        return real(path)
+
+    monkeypatch.setattr(fingerprint, 'cached_digest', flaky)
+    groups = DuplicateGroups([a, b, c])
+    firsts = settle(groups)
+    # The failed file is scanned on its own instead of hanging the scan
+    assert sorted(firsts) == sorted([a, b])
+    assert groups.copies[a] == [a, c]
+    assert groups.copies[b] == [b]
+    assert groups.done
+
+
+def test_index_reuses_results_of_identical_files(tmp_path):
+    a = write(tmp_path, 'a.txt', b'payload')
+    b = write(tmp_path, 'b.txt', b'payload')
+    index = FingerprintIndex([a, b])
+    assert index.lookup(a) is None
+    index.store(a, ({'x@corp.com'}, set()))
+    assert index.lookup(b) == ({'x@corp.com'}, set())
+    assert index.duplicate_of(b) == a
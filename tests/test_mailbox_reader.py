@@ -0,0 +1,48 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import mailbox_reader
+
+MBOX = (b'From alice@corp.com Mon Jan  1 00:00:00 2024\n'
+        b'From: Alice <alice@corp.com>\nTo: bob.smith@firm.org, Carol <carol@agency.net>\nSubject: hi\n\n'
+        b'From the desk of Alice: see https://corp.com/a\n\n'
+        b'From dave@corp.com Tue Jan  2 00:00:00 2024\n'
+        b'From: dave.brown@corp.com\nCc: eve@firm.org\n\nbody\n')
+
+
+def write(folder, name, data):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_iter_mbox_streams_one_message_at_a_time(tmp_path):
+    messages = list(mailbox_reader.iter_mbox(write(tmp_path, 'box', MBOX)))
+    # A body line starting with "From " is not a message boundary unless it looks like a From_ line
+    assert len(messages) == 2
+    assert messages[0].startswith(b'From: Alice') and b'From the desk' in messages[0]
+    assert messages[1].startswith(b'From: dave.brown@corp.com')
+
+
+def test_header_addresses_unfold_continuation_lines():
+    header = b'From: Alice <alice@corp.com>\nTo: bob@firm.org,\n\tCarol <carol@agency.net>\nSubject: x@y.z'
+    assert mailbox_reader.header_addresses(header) == ['alice@corp.com', 'bob@firm.org', 'carol@agency.net']
+
+
+def test_collector_batches_messages_and_keeps_url_lines(tmp_path):
+    calls = []
+
+    def extract(text):
+        calls.append(text)
+        return {w for w in text.split() if '@' in w}
+
+    collector = mailbox_reader.MessageCollector(extract, batch_chars=40)
+    for raw in mailbox_reader.iter_mbox(write(tmp_path, 'box', MBOX)):
+        collector.add_message(raw)
+    emails, url_text = collector.result()
+    assert {'alice@corp.com', 'bob.smith@firm.org', 'carol@agency.net', 'dave.brown@corp.com', 'eve@firm.org'} <= emails
+    assert url_text == 'From the desk of Alice: see https://corp.com/a'
+    # Text is filtered in a few batches rather than once per message part
+    assert 1 < len(calls) < 4
@@ -0,0 +1,74 @@
+import io
+import os
+import sys
+import json
+import tarfile
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import sandbox
+
+
+def load_multi_thread(monkeypatch):
+    spec = importlib.util.spec_from_file_location('email_extractor_multi_thread',
+                                                  os.path.join(ROOT, 'email_extractor_multi-thread.py'))
+    module = importlib.util.module_from_spec(spec)
+    # Registered so the pool can pickle its task functions by module name
+    monkeypatch.setitem(sys.modules, spec.name, module)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write_tar(path, members, mode):
+    with tarfile.open(path, mode) as tar:
+        for name, data in members.items():
+            info = tarfile.TarInfo(name)
+            info.size = len(data)
+            tar.addfile(info, io.BytesIO(data))
+
+
+def run(mt, share, out):
+    mt.main(str(share), str(out / 'e.txt'), str(out / 'u.txt'), None, os.devnull, os.devnull, [],
+            num_processes=2, quarantine_file=str(out / 'quarantine.jsonl'))
+
+
+@pytest.mark.parametrize('name, mode', [('bundle.tar', 'w'), ('bundle.tar.gz', 'w:gz')])
+def test_archive_with_a_crashing_member_closes_out(tmp_path, monkeypatch, name, mode):
+    mt = load_multi_thread(monkeypatch)
+    share = tmp_path / 'share'
+    share.mkdir()
+    archive = str(share / name)
+    write_tar(archive, {'good.txt': b'mail alice@corp.com\n', 'bad.txt': b'mail bob@corp.com\n'}, mode)
+    read_text_file = mt.read_text_file
+
+    def crash_on_bad(path):
+        if path.endswith('bad.txt'):
+            # Takes the forked worker down, as a segfault in a native parser would
+            os._exit(1)
+        return read_text_file(path)
+
+    monkeypatch.setattr(mt, 'read_text_file', crash_on_bad)
+    monkeypatch.chdir(tmp_path)
+    run(mt, share, tmp_path)
+
+    assert json.load(open(mt.CHECKPOINT_FILE)) == [archive]
+    assert open(tmp_path / 'e.txt').read().split() == ['alice@corp.com']
+    journaled = [json.loads(line) for line in open(mt.JOURNAL_FILE)]
+    assert {(j['unit'], j.get('status')) for j in journaled} == {('member:good.txt', None),
+                                                                  ('member:bad.txt', sandbox.CRASHED)}
+
+    # A resumed run neither re-extracts the archive nor retries the quarantined member
+    extracted = tmp_path / 'extracted'
+
+    def mark_extract(*args, **kwargs):
+        # Runs in a forked worker, so it leaves a file behind rather than raising
+        extracted.touch()
+        return []
+
+    monkeypatch.setattr(mt, 'extract_archive', mark_extract)
+    run(mt, share, tmp_path)
+    assert not extracted.exists()
+    assert json.load(open(mt.CHECKPOINT_FILE)) == [archive]
@@ -0,0 +1,64 @@
+import os
+import re
+import sys
+import importlib.util
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import normalize
+
+
+def load_multi_thread():
+    spec = importlib.util.spec_from_file_location('email_extractor_multi_thread',
+                                                  os.path.join(ROOT, 'email_extractor_multi-thread.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+@pytest.mark.parametrize('url, host', [
+    ('https://WWW.Example.com:443/a', 'example.com'),
+    ('http://user@www.bücher.de/x', 'xn--bcher-kva.de'),
+    # Only a leading "www." label is dropped, not every leading w or dot
+    ('https://web.de', 'web.de'),
+    ('https://www.de', 'www.de'),
+    ('mailto:x@example.com', ''),
+])
+def test_url_host(url, host):
+    assert normalize.url_host(url) == host
+
+
+def test_url_key_drops_default_port_and_www_only():
+    assert normalize.url_key('https://WWW.Example.com:443/a') == 'https://example.com/a'
+    assert normalize.url_key('https://example.com:8443/a') == 'https://example.com:8443/a'
+
+
+def test_base_url_keeps_www():
+    assert normalize.base_url('https://WWW.Example.com:443/a?b') == 'https://www.example.com'
+
+
+def test_strip_tracking_keeps_other_params():
+    assert normalize.strip_tracking('https://a.com/p?utm_source=x&id=1&fbclid=2') == 'https://a.com/p?id=1'
+
+
+def test_email_key_lowercases_and_punycodes_the_domain_only():
+    assert normalize.email_key('John.Doe@EXAMPLE.com') == 'John.Doe@example.com'
+    assert normalize.email_key('a@Bücher.de') == 'a@xn--bcher-kva.de'
+
+
+def test_url_netloc_is_the_authority_as_written():
+    assert normalize.url_netloc('https://user@WWW.Example.com:8080/x') == 'user@www.example.com:8080'
+
+
+def test_multi_thread_blocklist_sees_the_raw_host(tmp_path):
+    mt = load_multi_thread()
+    blocklist = tmp_path / 'blocked.txt'
+    blocklist.write_text('www.blocked.com\nexample.org:8080\nplain.net\n', encoding='utf-8')
+    patterns = mt.load_blocklist(str(blocklist))
+    text = ('https://www.blocked.com/a https://blocked.com/b https://example.org:8080/c '
+            'https://www.plain.net/d https://kept.io/e')
+    assert set(mt.extract_urls(text, patterns)) == {'https://blocked.com/b', 'https://kept.io/e'}
+    anchored = [re.compile(r'^www\.example\.com$')]
+    assert not mt.extract_urls('see https://www.example.com/page', anchored)
@@ -0,0 +1,56 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import planner
+
+
+def write(folder, name, size):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    return path
+
+
+def test_unseen_estimate_scales_singletons():
+    seen = {'a': 1, 'b': 1, 'c': 3}
+    assert planner.unseen_estimate(seen, 1.0) == 3
+    assert planner.unseen_estimate(seen, 0.5) == 5
+    assert planner.unseen_estimate(seen, 0) == 3
+
+
+def test_recommend_processes():
+    # CPU-bound work saturates the cores; I/O-bound work gets more workers, up to MAX_PER_CORE per core
+    assert planner.recommend_processes(10.0, 10.0, 100, 4) == 4
+    assert planner.recommend_processes(10.0, 0.1, 100, 4) == 4 * planner.MAX_PER_CORE
+    assert planner.recommend_processes(10.0, 0.1, 3, 4) == 3
+    assert planner.recommend_processes(0, 0, 10, 4) == 1
+
+
+def test_full_sample_measures_every_file(tmp_path):
+    paths = [write(tmp_path, f"f{i}.txt", 100 * (i + 1)) for i in range(5)]
+    found = {p: ({f"e{i}@corp.com"}, set()) for i, p in enumerate(paths)}
+    report = planner.plan(paths, lambda p: 'txt', found.__getitem__, fraction=1.0, cores=2)
+    assert report['files'] == 5
+    assert report['sampled_files'] == 5
+    assert report['bytes'] == report['sampled_bytes'] == 1500
+    assert report['expected_unique_emails'] == 5
+    assert report['handlers']['txt']['errors'] == 0
+    assert report['recommended_processes'] in report['wall_s_by_processes']
+
+
+def test_plan_lists_files_without_sniffing_them(tmp_path, monkeypatch):
+    import extractor
+    import sniff
+
+    def no_sniff(*args, **kwargs):
+        raise AssertionError('the plan must not read file contents')
+
+    monkeypatch.setattr(sniff, 'kind_of', no_sniff)
+    monkeypatch.setattr(sniff, 'sniff_file', no_sniff)
+    known = write(tmp_path, 'a.txt', 10)
+    unknown = write(tmp_path, 'blob.dat', 10)
+    empty = write(tmp_path, 'empty.dat', 0)
+    planned = [p for p in extractor.list_files(str(tmp_path)) if extractor.is_plannable(p)]
+    assert sorted(planned) == sorted([known, unknown])
+    assert empty not in planned
@@ -0,0 +1,102 @@
+import os
+import csv
+import sys
+import base64
+import importlib.util
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+import provenance
+
+EML = (b'From: Alice <alice@corp.com>\r\nTo: bob.smith@firm.org\r\nSubject: hi\r\n'
+       b'Content-Type: text/plain\r\nContent-Transfer-Encoding: base64\r\n\r\n'
+       + base64.b64encode(b'Write to carol.jones@agency.net\n') + b'\r\n')
+MBOX = (b'From alice@corp.com Mon Jan  1 00:00:00 2024\n'
+        b'From: Alice <alice@corp.com>\nSubject: hi\n\nfirst\n\n'
+        b'From dave@corp.com Tue Jan  2 00:00:00 2024\n'
+        b'From: dave.brown@corp.com\n\nsee https://docs.agency.net/x\n')
+
+
+def load_multi_thread(monkeypatch):
+    spec = importlib.util.spec_from_file_location('email_extractor_multi_thread',
+                                                  os.path.join(ROOT, 'email_extractor_multi-thread.py'))
+    module = importlib.util.module_from_spec(spec)
+    monkeypatch.setitem(sys.modules, spec.name, module)
+    spec.loader.exec_module(module)
+    return module
+
+
+def write(folder, name, data):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def exported(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def at(row):
+    with open(row['file'], 'rb') as f:
+        data = f.read()
+    offset = int(row['offset'])
+    return data[offset:offset + len(row['entity'].encode('utf-8'))].decode('utf-8').lower()
+
+
+def test_unknown_offsets_are_exported_as_unknown(tmp_path):
+    out = tmp_path / 'sources.csv'
+    sources = provenance.Provenance(str(out))
+    sources.add('a@corp.com', provenance.EMAIL, 'f.txt', 'txt', 12)
+    sources.add('b@corp.com', provenance.EMAIL, 'f.pdf', 'pdf')
+    sources.close()
+    # A second run appends without repeating the header
+    sources = provenance.Provenance(str(out))
+    sources.add('https://corp.com', provenance.URL, 'g.txt', 'txt', 0)
+    sources.close()
+    assert [(r['entity'], r['kind'], r['offset']) for r in exported(out)] == [
+        ('a@corp.com', 'email', '12'), ('b@corp.com', 'email', provenance.UNKNOWN_OFFSET), ('https://corp.com', 'url', '0')]
+
+
+def test_extractor_offsets_point_at_the_file_bytes(tmp_path, monkeypatch):
+    import extractor
+    share = tmp_path / 'share'
+    share.mkdir()
+    write(share, 'utf8.txt', 'Grüße from zoë — write alice@corp.com or see https://corp.com/a\n'.encode('utf-8'))
+    write(share, 'latin1.txt', 'Grüße, café: bob.smith@firm.org\n'.encode('latin-1'))
+    write(share, 'utf16.txt', 'Grüße — mail carol.jones@agency.net\n'.encode('utf-16-le'))
+    write(share, 'big.txt', b'filler line\n' * (extractor.MMAP_MIN_BYTES // 12) + b'tail dave.brown@corp.com\n')
+    write(share, 'message.eml', EML)
+    write(share, 'box.mbox', MBOX)
+    out = tmp_path / 'out'
+    out.mkdir()
+    monkeypatch.chdir(out)
+    extractor.scan_folder(str(share), str(out / 'e.txt'), str(out / 'u.txt'), str(out / 'l.log'), set(), set(),
+                          provenance_file=str(out / 'sources.csv'))
+    rows = exported(out / 'sources.csv')
+    located = {(os.path.basename(r['file']), r['entity']): r for r in rows}
+    expected = {('utf8.txt', 'alice@corp.com'), ('utf8.txt', 'https://corp.com/a'), ('latin1.txt', 'bob.smith@firm.org'),
+                ('big.txt', 'dave.brown@corp.com'), ('message.eml', 'alice@corp.com'),
+                ('message.eml', 'bob.smith@firm.org'), ('box.mbox', 'dave.brown@corp.com'),
+                ('box.mbox', 'https://docs.agency.net/x')}
+    for key in expected:
+        assert at(located[key]) == key[1].lower()
+    utf16 = located[('utf16.txt', 'carol.jones@agency.net')]
+    assert open(utf16['file'], 'rb').read()[int(utf16['offset']):].decode('utf-16-le').startswith('carol.jones@')
+    # Only the decoded base64 body holds this address, so there is no byte offset to give
+    assert located[('message.eml', 'carol.jones@agency.net')]['offset'] == provenance.UNKNOWN_OFFSET
+
+
+def test_multi_thread_offsets_point_at_the_file_bytes(tmp_path, monkeypatch):
+    mt = load_multi_thread(monkeypatch)
+    path = write(tmp_path, 'notes.txt', 'Grüße — mail alice@corp.com, see https://corp.com/a\n'.encode('utf-8'))
+    emails, urls, _, _ = mt.process_file(path, [], set(), [], str(tmp_path))
+    data = open(path, 'rb').read()
+    assert data[emails['alice@corp.com']:].startswith(b'alice@corp.com')
+    assert data[urls['https://corp.com/a']:].startswith(b'https://corp.com/a')
+    # A range further into the file reports offsets from the start of the file, not of the range
+    start = data.index(b'mail')
+    emails, urls, _, _ = mt.process_range(path, start, len(data), 'utf-8', [], set(), [])
+    assert data[emails['alice@corp.com']:].startswith(b'alice@corp.com')
+    assert data[urls['https://corp.com/a']:].startswith(b'https://corp.com/a')
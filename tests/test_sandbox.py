@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sandbox
+
+
+def echo(value):
+    return value
+
+
+def fail(message):
+    raise ValueError(message)
+
+
+def hang(seconds):
+    time.sleep(seconds)
+
+
+def crash():
+    # Stands in for a segfault in a native parser
+    os._exit(3)
+
+
+def hog(mb):
+    return len(bytearray(mb * 1024 * 1024))
+
+
+def test_results_and_errors_come_back_without_quarantine(tmp_path):
+    quarantine = tmp_path / 'quarantine.jsonl'
+    with sandbox.SandboxPool(2, timeout=10, quarantine_file=str(quarantine)) as pool:
+        pool.submit('a', echo, 1)
+        pool.submit('b', fail, 'bad input')
+        results = {key: (status, value) for key, status, value in pool.as_completed()}
+    assert results['a'] == (sandbox.OK, 1)
+    assert results['b'][0] == sandbox.ERROR and 'bad input' in results['b'][1]
+    assert not quarantine.exists()
+
+
+def test_timeouts_and_crashes_are_quarantined_and_the_worker_replaced(tmp_path):
+    quarantine = tmp_path / 'quarantine.jsonl'
+    with sandbox.SandboxPool(1, timeout=0.5, quarantine_file=str(quarantine)) as pool:
+        pool.submit('slow', hang, 30)
+        pool.submit('crash', crash)
+        pool.submit('after', echo, 'still running')
+        results = {key: status for key, status, _ in pool.as_completed()}
+    assert results == {'slow': sandbox.TIMEOUT, 'crash': sandbox.CRASHED, 'after': sandbox.OK}
+    entries = [json.loads(line) for line in open(quarantine)]
+    assert [e['path'] for e in entries] == ['slow', 'crash']
+    assert entries[0]['reason'] == sandbox.TIMEOUT and entries[1]['reason'].startswith(sandbox.CRASHED)
+
+
+def test_memory_cap_is_quarantined(tmp_path):
+    with sandbox.SandboxPool(1, memory_mb=64) as pool:
+        status, _ = pool.run('hog', hog, 1024)
+        assert status == sandbox.MEMORY
+        assert pool.run('small', hog, 1) == (sandbox.OK, 1024 * 1024)
+    assert [e['path'] for e in pool.quarantined] == ['hog']
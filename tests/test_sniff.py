@@ -0,0 +1,69 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sniff
+
+MBOX = (b'From alice@corp.com Mon Jan  1 00:00:00 2024\n'
+        b'From: Alice <alice@corp.com>\nTo: bob.smith@firm.org\nSubject: hi\n\n'
+        b'Write to carol.jones@agency.net\n\n'
+        b'From dave@corp.com Tue Jan  2 00:00:00 2024\n'
+        b'From: dave.brown@corp.com\n\nbody\n')
+
+
+def write(folder, name, data):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+@pytest.mark.parametrize('head, kind', [
+    (b'', sniff.EMPTY),
+    (b'%PDF-1.7\n', sniff.PDF),
+    (b'PK\x03\x04rest', sniff.ZIP),
+    (b'\x1f\x8b\x08\x00', sniff.GZIP),
+    (b'\x89PNG\r\n\x1a\nrest', sniff.IMAGE),
+    (b'plain words and alice@corp.com\n', sniff.TEXT),
+    (MBOX, sniff.MBOX),
+    ('mail alice@corp.com please'.encode('utf-16-le'), sniff.TEXT),
+    ('mail alice@corp.com please'.encode('utf-16-be'), sniff.TEXT),
+    (bytes(range(256)) * 4, sniff.BINARY),
+])
+def test_sniff_bytes(head, kind):
+    assert sniff.sniff_bytes(head) == kind
+
+
+def test_utf16_without_bom_reports_its_byte_order():
+    assert sniff.utf16_encoding('alice@corp.com'.encode('utf-16-le')) == 'utf-16-le'
+    assert sniff.utf16_encoding('alice@corp.com'.encode('utf-16-be')) == 'utf-16-be'
+    assert sniff.utf16_encoding(b'\x00\x01\x02\x03' * 64) is None
+
+
+def test_route_trusts_matching_extensions_only(tmp_path):
+    assert sniff.route(write(tmp_path, 'a.txt', b'hello'), cached=False) == (sniff.TEXT, True)
+    assert sniff.route(write(tmp_path, 'a.pdf', b'hello'), cached=False) == (sniff.TEXT, False)
+    assert sniff.route(write(tmp_path, 'mailbox', MBOX), cached=False) == (sniff.MBOX, False)
+
+
+def test_extensionless_mailbox_is_scanned_by_both_scripts(tmp_path):
+    import extractor
+    import email_extractor_with_filter as with_filter
+    path = write(tmp_path, 'mnoext', MBOX)
+    temp_dir = str(tmp_path / '_temp_extract')
+    os.makedirs(temp_dir)
+    assert extractor.is_scannable(path)
+    assert with_filter.is_scannable(path)
+    expected = {'alice@corp.com', 'bob.smith@firm.org', 'carol.jones@agency.net', 'dave.brown@corp.com'}
+    assert set(with_filter.process_file(path, temp_dir, set())) >= expected
+    assert set(extractor.process_file(path, temp_dir, set())[0]) >= expected
+
+
+def test_binary_without_extension_is_skipped(tmp_path):
+    import extractor
+    import email_extractor_with_filter as with_filter
+    path = write(tmp_path, 'blob.bin', bytes(range(256)) * 64)
+    assert not extractor.is_scannable(path)
+    assert not with_filter.is_scannable(path)
@@ -0,0 +1,27 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import sorted_spill
+
+
+def test_small_output_is_sorted_and_deduplicated(tmp_path):
+    out = tmp_path / 'out.txt'
+    with sorted_spill.SortedSpillWriter(str(out)) as writer:
+        assert writer.add('b')
+        assert writer.add('a')
+        assert not writer.add('b')
+    assert out.read_text(encoding='utf-8') == 'a\nb\n'
+
+
+def test_spilled_runs_merge_into_one_sorted_output(tmp_path, monkeypatch):
+    monkeypatch.setattr(sorted_spill, 'MERGE_FANIN', 3)
+    out = tmp_path / 'out.txt'
+    items = [f"item{i % 37:03d}" for i in range(500)]
+    with sorted_spill.SortedSpillWriter(str(out), max_items=5) as writer:
+        for item in items:
+            writer.add(item)
+        # Fan-in keeps the number of runs on disk bounded while the scan is still going
+        assert len(writer.runs) < sorted_spill.MERGE_FANIN
+    assert out.read_text(encoding='utf-8').splitlines() == sorted(set(items))
+    assert os.listdir(tmp_path) == ['out.txt']
@@ -0,0 +1,37 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import extractor
+
+# Past both the UTF-8 sample and the mmap threshold, so only the head is checked before the file is mapped
+FILLER = 'Grüße line of ordinary text\n'.encode('utf-8') * (extractor.MMAP_MIN_BYTES // 20)
+
+
+def write(folder, name, data):
+    path = os.path.join(folder, name)
+    with open(path, 'wb') as f:
+        f.write(data)
+    return path
+
+
+def test_large_utf8_file_is_scanned_through_mmap(tmp_path):
+    path = write(tmp_path, 'big.txt', FILLER + 'mail zoë alice@corp.com or https://corp.com/grüße\n'.encode('utf-8'))
+    assert extractor.read_text_file_mmap(path, set()) is not None
+    emails, text = extractor.read_text_file(path, set())
+    assert emails == {'alice@corp.com'}
+    assert extractor.extract_urls_from_text(text, set()) == {'https://corp.com/grüße'}
+
+
+def test_latin1_tail_falls_back_to_decoding_the_whole_file(tmp_path):
+    path = write(tmp_path, 'big.txt', FILLER + 'mail josé@corp.com, see https://corp.com/café/x\n'.encode('latin-1'))
+    assert extractor.read_text_file_mmap(path, set()) is None
+    emails, text = extractor.read_text_file(path, set())
+    # Dropping the undecodable byte would have made up jos@corp.com and a truncated URL
+    assert 'jos@corp.com' not in emails
+    assert extractor.extract_urls_from_text(text, set()) == {'https://corp.com/café/x'}
+
+
+def test_utf16_section_after_the_head_is_not_byte_scanned(tmp_path):
+    path = write(tmp_path, 'big.txt', FILLER + 'mail carol.jones@agency.net\n'.encode('utf-16-le'))
+    assert extractor.read_text_file_mmap(path, set()) is None
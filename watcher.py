@@ -0,0 +1,187 @@
+import os
+import time
+import errno
+import select
+import struct
+import logging
+import ctypes
+import ctypes.util
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE_SELF = 0x00000400
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE_SELF
+EVENT_HEADER = struct.Struct('iIII')
+
+# Skip our own scratch space and anything dot-prefixed (editor swap files, partial downloads)
+IGNORED_PARTS = ('_temp_extract',)
+
+
+def _load_inotify():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class Watcher:
+    def __init__(self, folder, debounce=2.0, poll_interval=5.0, use_inotify=True, ignore=()):
+        self.folder = os.path.abspath(folder)
+        self.debounce = debounce
+        self.poll_interval = poll_interval
+        self.ignore = {os.path.abspath(p) for p in ignore}
+        self.index = {}
+        self.pending = {}
+        self.fd = None
+        self.dirs = {}
+        self.libc = _load_inotify() if use_inotify else None
+        # Files present now are the baseline; the caller scans them itself
+        for path, sig in self.walk(self.folder):
+            self.index[path] = sig
+        if self.libc:
+            fd = self.libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                logging.warning(f"inotify unavailable ({os.strerror(ctypes.get_errno())}), polling {self.folder}")
+                self.libc = None
+            else:
+                self.fd = fd
+                self.add_tree(self.folder)
+
+    @property
+    def mode(self):
+        return 'inotify' if self.fd is not None else 'polling'
+
+    def skipped(self, path):
+        return path in self.ignore or any(part in path for part in IGNORED_PARTS) or os.path.basename(path).startswith('.')
+
+    def walk(self, folder):
+        # scandir keeps the polling index cheap: the stat comes with the directory listing
+        stack = [folder]
+        while stack:
+            current = stack.pop()
+            try:
+                entries = list(os.scandir(current))
+            except OSError:
+                continue
+            for entry in entries:
+                if self.skipped(entry.path):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file():
+                        st = entry.stat()
+                        yield entry.path, (st.st_size, st.st_mtime_ns)
+                except OSError:
+                    continue
+
+    def add_tree(self, folder):
+        for root, dirs, _ in os.walk(folder):
+            dirs[:] = [d for d in dirs if not self.skipped(os.path.join(root, d))]
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(root), WATCH_MASK)
+            if wd < 0:
+                err = ctypes.get_errno()
+                if err == errno.ENOSPC:
+                    logging.warning("inotify watch limit reached (fs.inotify.max_user_watches); falling back to polling")
+                    os.close(self.fd)
+                    self.fd = None
+                    return
+                continue
+            self.dirs[wd] = root
+
+    def mark(self, path, now):
+        if not self.skipped(path):
+            self.pending[path] = (None, now)
+
+    def read_events(self, timeout):
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        now = time.monotonic()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            name = data[offset + EVENT_HEADER.size:offset + EVENT_HEADER.size + length].rstrip(b'\0')
+            offset += EVENT_HEADER.size + length
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped; compare the whole tree against the index instead
+                logging.warning(f"inotify queue overflow under {self.folder}, rescanning")
+                self.poll(now)
+                continue
+            if mask & IN_IGNORED:
+                self.dirs.pop(wd, None)
+                continue
+            root = self.dirs.get(wd)
+            if root is None or not name:
+                continue
+            path = os.path.join(root, os.fsdecode(name))
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO) and not self.skipped(path):
+                    # Files can land in a new directory before its watch exists
+                    self.add_tree(path)
+                    for file_path, _ in self.walk(path):
+                        self.mark(file_path, now)
+                continue
+            self.mark(path, now)
+
+    def poll(self, now):
+        for path, sig in self.walk(self.folder):
+            if self.index.get(path) == sig:
+                continue
+            previous = self.pending.get(path)
+            if previous is None or previous[0] != sig:
+                self.pending[path] = (sig, now)
+
+    def take_ready(self, now):
+        ready = []
+        for path, (sig, since) in list(self.pending.items()):
+            if now - since < self.debounce:
+                continue
+            del self.pending[path]
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            current = (st.st_size, st.st_mtime_ns)
+            if sig is not None and current != sig:
+                # Still being written: restart the quiet period
+                self.pending[path] = (current, now)
+                continue
+            if self.index.get(path) == current:
+                continue
+            self.index[path] = current
+            ready.append(path)
+        return sorted(ready)
+
+    def batches(self):
+        # Yields lists of new or changed files once each has been quiet for `debounce` seconds
+        next_poll = 0.0
+        while True:
+            now = time.monotonic()
+            if self.fd is not None:
+                self.read_events(min(1.0, self.debounce))
+            else:
+                if now >= next_poll:
+                    self.poll(now)
+                    next_poll = now + self.poll_interval
+                time.sleep(min(1.0, self.debounce, self.poll_interval))
+            ready = self.take_ready(time.monotonic())
+            if ready:
+                yield ready
+
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
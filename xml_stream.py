@@ -0,0 +1,185 @@
+import re
+import zipfile
+from xml.etree import ElementTree
+
+SHARED_STRINGS = 'xl/sharedStrings.xml'
+SHEET_PART = re.compile(r'xl/worksheets/[^/]+\.xml$')
+# Cells that can hold text in the sheet itself: inline strings, formula string results and formulas.
+# The literal markers are a cheap pre-check (memchr speed) before the cell pattern runs on a block.
+SHEET_TEXT_MARKERS = (b'inlineStr', b'"str"', b"'str'", b'f>', b'f ')
+TEXT_CELL = re.compile(rb'<(?:\w+:)?c\b(?:[^>]*\bt=["\'](?:inlineStr|str)["\'][^>]*>|[^>]*>\s*<(?:\w+:)?f\b).*?</(?:\w+:)?c>', re.S)
+SHEET_DATA = re.compile(rb'<(?:\w+:)?sheetData\b[^>]*>')
+ROW_END = re.compile(rb'</(?:\w+:)?row>')
+READ_BLOCK = 1024 * 1024
+# Body, headers, footers, notes and comments of Word documents and presentations
+OOXML_TEXT_PART = re.compile(
+    r'(?:word/(?:document|header\d*|footer\d*|footnotes|endnotes|comments)|ppt/(?:slides/slide|notesSlides/notesSlide|comments/\w*[cC]omment)\d*)\.xml$'
+)
+# Text-bearing elements of a paragraph (w:/a: namespaces); field codes hold HYPERLINK "..." targets
+OOXML_RUN_TEXT = {'t': None, 'instrText': None, 'tab': '\t', 'br': '\n', 'cr': '\n', 'noBreakHyphen': '-'}
+ODF_TEXT_PARTS = ('content.xml', 'styles.xml')
+ODF_BREAKS = {'tab': '\t', 'line-break': '\n'}
+
+
+def local(tag):
+    # Matches transitional and strict OOXML alike, whatever prefix the writer chose
+    return tag.rpartition('}')[2]
+
+def read_blocks(stream):
+    return iter(lambda: stream.read(READ_BLOCK), b'')
+
+def iter_units(blocks, unit_names):
+    # Pull-parses the XML and yields each complete unit element, then drops it along with everything
+    # outside a unit, so memory stays at one unit plus its open ancestors
+    parser = ElementTree.XMLPullParser(events=('start', 'end'))
+    stack = []
+    open_units = 0
+    for block in blocks:
+        parser.feed(block)
+        for event, elem in parser.read_events():
+            name = local(elem.tag)
+            if event == 'start':
+                stack.append(elem)
+                if name in unit_names:
+                    open_units += 1
+                continue
+            stack.pop()
+            if name in unit_names:
+                open_units -= 1
+                yield name, elem
+            elif open_units:
+                continue
+            if stack:
+                stack[-1].remove(elem)
+    parser.close()
+
+def last_row_end(buf):
+    # Blocks are only cut after a closing row tag, so TEXT_CELL always sees whole cells
+    pos = buf.rfind(b'row>')
+    while pos != -1:
+        if ROW_END.fullmatch(buf, buf.rfind(b'</', 0, pos), pos + 4):
+            return pos + 4
+        pos = buf.rfind(b'row>', 0, pos)
+    return 0
+
+def text_cells(blocks):
+    # Passes the sheet XML through with only the cells that can hold text kept inside <sheetData>. What
+    # is left is still well-formed, and numeric cells (usually nearly all of them) never reach the parser.
+    buf = b''
+    started = False
+    for block in blocks:
+        buf += block
+        if not started:
+            m = SHEET_DATA.search(buf)
+            if not m:
+                continue
+            yield buf[:m.end()]
+            buf = buf[m.end():]
+            started = True
+        end = last_row_end(buf)
+        if not end:
+            continue
+        rows, buf = buf[:end], buf[end:]
+        if any(marker in rows for marker in SHEET_TEXT_MARKERS):
+            yield b''.join(cell.group() for cell in TEXT_CELL.finditer(rows))
+    yield buf
+
+def attr(elem, name):
+    for key, value in elem.attrib.items():
+        if local(key) == name:
+            return value
+    return None
+
+def external_links(zf):
+    # Hyperlink targets are stored in the part relationships, not in the text
+    for name in zf.namelist():
+        if name.endswith('.rels'):
+            with zf.open(name) as stream:
+                for _, rel in iter_units(read_blocks(stream), {'Relationship'}):
+                    if rel.get('TargetMode') == 'External' and rel.get('Type', '').endswith('/hyperlink'):
+                        yield rel.get('Target', '')
+
+def ooxml_paragraph(elem):
+    parts = []
+    for child in elem.iter():
+        name = local(child.tag)
+        if name in OOXML_RUN_TEXT:
+            parts.append(OOXML_RUN_TEXT[name] or child.text or '')
+    return ''.join(parts)
+
+def odf_text(elem, links):
+    # ODF paragraphs are mixed content: text, spans and links, with runs of spaces written as <text:s c="n"/>
+    parts = [elem.text or '']
+    for child in elem:
+        name = local(child.tag)
+        if name == 's':
+            parts.append(' ' * int(attr(child, 'c') or 1))
+        elif name in ODF_BREAKS:
+            parts.append(ODF_BREAKS[name])
+        else:
+            if name == 'a' and attr(child, 'href'):
+                links.append(attr(child, 'href'))
+            parts.append(odf_text(child, links))
+        parts.append(child.tail or '')
+    return ''.join(parts)
+
+def rich_text(elem):
+    # A string item is a plain <t> or rich-text runs <r><t>; phonetic guides (<rPh>) are not part of the value
+    parts = []
+    for child in elem:
+        name = local(child.tag)
+        if name == 't':
+            parts.append(child.text or '')
+        elif name == 'r':
+            parts.extend(t.text or '' for t in child if local(t.tag) == 't')
+    return ''.join(parts)
+
+def cell_strings(elem):
+    kind = elem.get('t')
+    for child in elem:
+        name = local(child.tag)
+        if name == 'f' and child.text:
+            # openpyxl reports formula cells as their formula, which is where HYPERLINK() targets live
+            yield '=' + child.text
+        elif name == 'is':
+            yield rich_text(child)
+        elif name == 'v' and kind == 'str' and child.text:
+            yield child.text
+
+def xlsx_strings(source):
+    # Every shared string is scanned once whether or not a cell uses it; numeric cells are never converted
+    with zipfile.ZipFile(source) as zf:
+        names = zf.namelist()
+        if SHARED_STRINGS in names:
+            with zf.open(SHARED_STRINGS) as stream:
+                for _, si in iter_units(read_blocks(stream), {'si'}):
+                    yield rich_text(si)
+        for name in names:
+            if SHEET_PART.match(name):
+                with zf.open(name) as stream:
+                    for _, cell in iter_units(text_cells(read_blocks(stream)), {'c'}):
+                        yield from cell_strings(cell)
+        yield from external_links(zf)
+
+def ooxml_strings(source):
+    # Paragraph by paragraph from every text part of a .docx/.docm/.pptx, then the hyperlink targets
+    with zipfile.ZipFile(source) as zf:
+        for name in zf.namelist():
+            if OOXML_TEXT_PART.match(name):
+                with zf.open(name) as stream:
+                    for _, p in iter_units(read_blocks(stream), {'p'}):
+                        yield ooxml_paragraph(p)
+        yield from external_links(zf)
+
+def odf_strings(source):
+    # .odt/.ods: styles.xml carries headers and footers; table cells hold their text in paragraphs too
+    with zipfile.ZipFile(source) as zf:
+        names = zf.namelist()
+        for name in ODF_TEXT_PARTS:
+            if name not in names:
+                continue
+            with zf.open(name) as stream:
+                for _, p in iter_units(read_blocks(stream), {'p', 'h'}):
+                    links = []
+                    yield odf_text(p, links)
+                    yield from links